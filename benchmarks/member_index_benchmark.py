@@ -0,0 +1,85 @@
+# member_index_benchmark.py
+"""Compares looking up a guild member by encoded name by scanning all members with the member name index.
+
+Usage: python benchmarks/member_index_benchmark.py [members] [lookups]
+
+The guild is synthetic: it only has the attributes the lookup uses (members, chunked, get_member) and its members
+only have an id and a name. A part of the names contain unicode characters, so encoding them isn't a no-op.
+"""
+
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resources import members
+from resources.snapshot import encode_text
+
+
+NAME_DECORATIONS = ('', '', '', '✨', 'ツ', '★', 'ö')
+
+
+class SyntheticGuild():
+    """Guild with the attributes used by the member lookup"""
+    def __init__(self, member_count: int) -> None:
+        randomizer = random.Random(42)
+        self.id = 1
+        self.chunked = True
+        self._members = {}
+        for member_id in range(1, member_count + 1):
+            decoration = randomizer.choice(NAME_DECORATIONS)
+            name = f'{decoration}user{randomizer.randrange(member_count)}{decoration}'
+            self._members[member_id] = SimpleNamespace(id=member_id, name=name, guild=self)
+
+    @property
+    def members(self) -> List[SimpleNamespace]:
+        return list(self._members.values())
+
+    def get_member(self, member_id: int) -> Optional[SimpleNamespace]:
+        return self._members.get(member_id)
+
+
+def scan_members(guild: SyntheticGuild, user_name: str) -> Optional[SimpleNamespace]:
+    """Lookup the way get_guild_member_by_name did it before"""
+    for member in guild.members:
+        if encode_text(member.name) == user_name: return member
+    return None
+
+
+def measure(function: Callable[[SyntheticGuild, str], Optional[SimpleNamespace]], guild: SyntheticGuild,
+            user_names: List[str]) -> float:
+    """Returns the average time per lookup in microseconds"""
+    start_time = time.perf_counter()
+    for user_name in user_names:
+        function(guild, user_name)
+    return (time.perf_counter() - start_time) / len(user_names) * 1_000_000
+
+
+def main() -> None:
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lookup_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    guild = SyntheticGuild(member_count)
+    randomizer = random.Random(7)
+    all_members = guild.members
+    user_names = [encode_text(randomizer.choice(all_members).name) for _ in range(lookup_count)]
+    user_names.append('nobody with this name')
+    for user_name in user_names:
+        if scan_members(guild, user_name) is not members.find_member(guild, user_name):
+            raise AssertionError(f'Lookups disagree on {user_name}.')
+    start_time = time.perf_counter()
+    members.build_index(guild)
+    build_time = (time.perf_counter() - start_time) * 1_000
+    scan_time = measure(scan_members, guild, user_names)
+    index_time = measure(members.find_member, guild, user_names)
+    print(f'Member lookup by name, {member_count:,} members, {len(user_names):,} lookups\n')
+    print(f'Index build: {build_time:,.1f} ms')
+    print(f'Scan:        {scan_time:,.1f} µs per lookup')
+    print(f'Index:       {index_time:,.2f} µs per lookup')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# regex_benchmark.py
+"""Compares the regex cost per message of inline re.search calls with the precompiled patterns in resources/regex.py.
+
+Usage: python benchmarks/regex_benchmark.py [iterations]
+
+Every sample message runs through the searches its cog does when it processes the message, once with the pattern
+strings the cogs used before (re.search with a string, relying on the cache of the re module) and once with the
+patterns from the registry.
+"""
+
+import os
+import re
+import sys
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resources import regex
+
+
+ICON_URL = 'https://cdn.discordapp.com/avatars/123456789012345678/abcdef0123456789.png'
+COOLDOWN_AUTHOR = "Navchan's cooldown"
+COOLDOWN_TITLE = 'You have already looked around, wait at least **0h 0m 41s**...'
+COOLDOWNS_FIELDS = (
+    ':white_check_mark: ~-~ **`Daily`**\n:clock4: ~-~ **`Weekly`** (**3d 2h 1m 5s**)\n'
+    ':white_check_mark: ~-~ **`Lootbox`**\n:white_check_mark: ~-~ **`Vote`**\n'
+    ':clock4: ~-~ **`Hunt`** (**0h 0m 41s**)\n:clock4: ~-~ **`Adventure`** (**0h 32m 11s**)\n'
+    ':white_check_mark: ~-~ **`Training`**\n:clock4: ~-~ **`Duel`** (**1h 3m 4s**)\n'
+    ':white_check_mark: ~-~ **`Quest`**\n:clock4: ~-~ **`Chop | Fish | Pickup | Mine`** (**0h 1m 2s**)\n'
+    ':white_check_mark: ~-~ **`Farm`**\n:white_check_mark: ~-~ **`Horse race`**\n'
+    ':clock4: ~-~ **`Arena`** (**12h 0m 0s**)\n:clock4: ~-~ **`Miniboss`** (**8h 7m 1s**)'
+)
+HUNT_TOGETHER = (
+    '**Navchan** and **Partner** are hunting together!\n'
+    '**Navchan** found and killed a <:zombie:1> **Zombie**\n**Partner** found and killed a <:ghost:2> **Ghost**\n'
+    '**Partner** got 1 <:epiclootbox:3> EPIC lootbox'
+)
+LOOTBOX_NAMES = (
+    'common lootbox', 'uncommon lootbox', 'rare lootbox', 'EPIC lootbox', 'EDGY lootbox', 'OMEGA lootbox',
+    'MEGA present', 'ULTRA present', 'OMEGA present', 'GODLY present', 'easter lootbox',
+)
+WORK_CONTENT = '**Navchan** got 36 <:normielog:4> wooden log'
+
+
+# Samples
+def inline_cooldown() -> None:
+    re.search("avatars\/(.+?)\/", ICON_URL)
+    re.search("^(.+?)'s cooldown", COOLDOWN_AUTHOR)
+    re.search("wait at least \*\*(.+?)\*\*...", COOLDOWN_TITLE)
+
+
+def registry_cooldown() -> None:
+    regex.USER_ID_FROM_ICON_URL.search(ICON_URL)
+    regex.USER_NAME_COOLDOWN.search(COOLDOWN_AUTHOR)
+    regex.COOLDOWN_TIMESTRING.search(COOLDOWN_TITLE)
+
+
+INLINE_COOLDOWNS_PATTERNS = (
+    "Daily`\*\* \(\*\*(.+?)\*\*", "Weekly`\*\* \(\*\*(.+?)\*\*", "Lootbox`\*\* \(\*\*(.+?)\*\*",
+    'Adventure`\*\* \(\*\*(.+?)\*\*', "raining`\*\* \(\*\*(.+?)\*\*", "quest`\*\* \(\*\*(.+?)\*\*",
+    "Duel`\*\* \(\*\*(.+?)\*\*", "rena`\*\* \(\*\*(.+?)\*\*", "boss`\*\* \(\*\*(.+?)\*\*",
+    "race`\*\* \(\*\*(.+?)\*\*", "Vote`\*\* \(\*\*(.+?)\*\*", "Farm`\*\* \(\*\*(.+?)\*\*",
+    'Dynamite`\*\* \(\*\*(.+?)\*\*',
+)
+REGISTRY_COOLDOWNS_PATTERNS = (
+    regex.COOLDOWN_DAILY, regex.COOLDOWN_WEEKLY, regex.COOLDOWN_LOOTBOX, regex.COOLDOWN_ADVENTURE,
+    regex.COOLDOWN_TRAINING, regex.COOLDOWN_QUEST, regex.COOLDOWN_DUEL, regex.COOLDOWN_ARENA,
+    regex.COOLDOWN_DUNGEON_MINIBOSS, regex.COOLDOWN_HORSE, regex.COOLDOWN_VOTE, regex.COOLDOWN_FARM,
+    regex.COOLDOWN_WORK_DYNAMITE,
+)
+
+
+def inline_cooldowns() -> None:
+    re.search("avatars\/(.+?)\/", ICON_URL)
+    for pattern in INLINE_COOLDOWNS_PATTERNS:
+        re.search(pattern, COOLDOWNS_FIELDS)
+
+
+def registry_cooldowns() -> None:
+    regex.USER_ID_FROM_ICON_URL.search(ICON_URL)
+    for pattern in REGISTRY_COOLDOWNS_PATTERNS:
+        pattern.search(COOLDOWNS_FIELDS)
+
+
+def inline_hunt_together() -> None:
+    re.search("\*\*(.+?)\*\* and \*\*(.+?)\*\*", HUNT_TOGETHER)
+    for lb_name in LOOTBOX_NAMES:
+        lb_search = re.search(f"\*\* got (.+?) (.+?) {re.escape(lb_name)}", HUNT_TOGETHER)
+        if lb_search is None:
+            re.search(f"\+(.+?) (.+?) {re.escape(lb_name)}", HUNT_TOGETHER)
+
+
+def registry_hunt_together() -> None:
+    regex.NAMES_BOLD_AND.search(HUNT_TOGETHER)
+    for lb_name in LOOTBOX_NAMES:
+        if lb_name not in HUNT_TOGETHER: continue
+        lb_got_pattern, lb_plus_pattern = regex.PARTNER_LOOTBOXES[lb_name]
+        lb_search = lb_got_pattern.search(HUNT_TOGETHER)
+        if lb_search is None:
+            lb_plus_pattern.search(HUNT_TOGETHER)
+
+
+INLINE_WORK_PATTERNS = (
+    '[!1] \*\*(.+?)\*\* got', '\?\?\?\?\? \*\*(.+?)\*\* got', 'WOOAAAA!! (.+?)\*\* got',
+    'WwWOoOOoOAAa!!!1 (.+?)\*\* got', '\.\.\. \*\*(.+?)\*\* got', '\*\*(.+?)\*\* got',
+)
+
+
+def inline_work() -> None:
+    for pattern in INLINE_WORK_PATTERNS:
+        if re.search(pattern, WORK_CONTENT, re.IGNORECASE) is not None: break
+
+
+def registry_work() -> None:
+    for pattern in regex.NAMES_WORK:
+        if pattern.search(WORK_CONTENT) is not None: break
+
+
+SAMPLES: List[Tuple[str, Callable[[], None], Callable[[], None]]] = [
+    ('cooldown embed', inline_cooldown, registry_cooldown),
+    ('cooldowns overview', inline_cooldowns, registry_cooldowns),
+    ('hunt together with lootbox', inline_hunt_together, registry_hunt_together),
+    ('work', inline_work, registry_work),
+]
+
+
+# Benchmark
+def measure(function: Callable[[], None], iterations: int) -> float:
+    """Returns the average time per call in microseconds"""
+    function()
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start_time) / iterations * 1_000_000
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f'Regex cost per message, {iterations:,} iterations\n')
+    print(f'{"Message":<30}{"inline (µs)":>14}{"registry (µs)":>16}{"change":>10}')
+    for name, inline_function, registry_function in SAMPLES:
+        inline_time = measure(inline_function, iterations)
+        registry_time = measure(registry_function, iterations)
+        change = (registry_time - inline_time) / inline_time * 100
+        print(f'{name:<30}{inline_time:>14.2f}{registry_time:>16.2f}{change:>9.1f}%')
+    regex.reset_stats()
+
+
+if __name__ == '__main__':
+    main()
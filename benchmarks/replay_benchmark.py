@@ -0,0 +1,230 @@
+# replay_benchmark.py
+"""Replays a corpus of recorded EPIC RPG messages through the detection cogs and reports how long they take.
+
+Usage: python benchmarks/replay_benchmark.py [rounds] [corpus file]
+
+All cogs that register a route with the router are loaded into a stub bot (see replay_stubs.py). Every message of
+the corpus is built as a stub message from EPIC RPG, together with the user command that caused it, and is then
+classified by the router and handed to every matching handler, one after the other. The database is a temporary
+copy of database/navi_db.db, so the handlers run their full path including all queries without touching real data.
+
+The report shows the classify time and, per handler, the calls, the errors, the throughput and the p50 and p99
+latency. Rounds after the first see the reminders and log entries of the rounds before, just like the live bot.
+"""
+
+import asyncio
+from collections import defaultdict
+import importlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+
+from benchmarks.replay_stubs import (StubBot, StubChannel, StubEmbed, StubGuild, StubInteraction, StubMessage,
+                                     StubUser)
+from database import connection, statements, tracking, users
+from resources import exceptions, interactions, outbox, recent_commands, router, settings
+from resources.snapshot import MessageSnapshot
+
+
+DEFAULT_CORPUS_FILE = os.path.join(BOT_DIR, 'benchmarks/corpus/epic_rpg_messages.json')
+NAVI_ID = 1
+PLAYER_ID = 123456789012345678
+PLAYER_NAME = 'Navchan'
+PARTNER_ID = 223456789012345678
+PARTNER_NAME = 'Partner ツ'
+# Columns the code reads that database/navi_db.db doesn't have yet. They are added to the copy if missing.
+MISSING_COLUMNS = (
+    ('users', 'guild_quest_prompt_active', 'BOOLEAN NOT NULL DEFAULT (False)'),
+    ('clans', 'quest_user_id', 'INTEGER'),
+    ('clans', 'upgrade_quests_enabled', 'BOOLEAN NOT NULL DEFAULT (True)'),
+)
+
+
+# Setup
+def use_temporary_database(directory: str) -> None:
+    """Points settings.NAVI_DB to a copy of the database"""
+    db_file = os.path.join(directory, 'navi_db.db')
+    settings.NAVI_DB.close()
+    shutil.copyfile(settings.DB_FILE, db_file)
+    settings.DB_FILE = db_file
+    settings.NAVI_DB = sqlite3.connect(db_file, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES,
+                                       check_same_thread=False)
+    settings.NAVI_DB.row_factory = sqlite3.Row
+    settings.NAVI_DB.execute('PRAGMA journal_mode = WAL')
+    settings.NAVI_DB.execute('PRAGMA synchronous = NORMAL')
+    for table, column, definition in MISSING_COLUMNS:
+        columns = [row['name'] for row in settings.NAVI_DB.execute(f'PRAGMA table_info({table})')]
+        if column not in columns:
+            settings.NAVI_DB.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+async def insert_players(channel: StubChannel) -> None:
+    """Creates the player and the partner in the database"""
+    for user_id in (PLAYER_ID, PARTNER_ID):
+        try:
+            await users.get_user(user_id)
+        except exceptions.FirstTimeUserError:
+            await users.insert_user(user_id)
+    player: users.User = await users.get_user(PLAYER_ID)
+    await player.update(partner_id=PARTNER_ID, partner_name=PARTNER_NAME)
+    partner: users.User = await users.get_user(PARTNER_ID)
+    await partner.update(partner_id=PLAYER_ID, partner_name=PLAYER_NAME, partner_channel_id=channel.id)
+
+
+def load_cogs(bot: StubBot) -> List[str]:
+    """Loads every cog that registers a route and returns the route names"""
+    cogs_dir = os.path.join(BOT_DIR, 'cogs')
+    for file_name in sorted(os.listdir(cogs_dir)):
+        if not file_name.endswith('.py'): continue
+        with open(os.path.join(cogs_dir, file_name), encoding='utf-8') as file:
+            if 'router.register(' not in file.read(): continue
+        module = importlib.import_module(f'cogs.{file_name[:-3]}')
+        module.setup(bot)
+    return sorted(router.routes)
+
+
+def load_corpus(corpus_file: str) -> List[Dict[str, Any]]:
+    """Returns the messages of the corpus with the player and partner filled in"""
+    with open(corpus_file, encoding='utf-8') as file:
+        corpus_text = file.read()
+    corpus_text = (
+        corpus_text
+        .replace('{user_name}', PLAYER_NAME)
+        .replace('{user_id}', str(PLAYER_ID))
+        .replace('{partner_name}', PARTNER_NAME)
+    )
+    return json.loads(corpus_text)['messages']
+
+
+def build_message(data: Dict[str, Any], channel: StubChannel, epic_rpg: StubUser,
+                  player: StubUser) -> StubMessage:
+    """Builds the EPIC RPG message of a corpus entry and the user command before it, and feeds both to the
+    same caches the on_message listener feeds"""
+    command_message = None
+    if data.get('command'):
+        command_message = StubMessage(channel, player, data['command'])
+        channel.add_message(command_message)
+        recent_commands.add_message(command_message)
+    interaction = StubInteraction(data['interaction'], player) if data.get('interaction') else None
+    embeds = [StubEmbed(embed) for embed in data.get('embeds', ())]
+    message = StubMessage(channel, epic_rpg, data.get('content', ''), embeds, interaction)
+    channel.add_message(message)
+    interactions.add_message(message)
+    return message
+
+
+async def count_errors() -> int:
+    """Returns the number of rows in the errors table"""
+    record = await connection.fetchone('SELECT COUNT(*) FROM errors')
+    return record[0]
+
+
+# Report
+def percentile(sorted_times: List[int], fraction: float) -> int:
+    """Returns a percentile of sorted times (nearest rank)"""
+    return sorted_times[min(len(sorted_times) - 1, round(fraction * (len(sorted_times) - 1)))]
+
+
+def print_report(classify_times: List[int], handler_times: Dict[str, List[int]],
+                 handler_errors: Dict[str, int], total_time: float, message_count: int) -> None:
+    """Prints the results"""
+    classify_times.sort()
+    print(f'Messages replayed: {message_count:,} in {total_time:,.2f} s ({message_count / total_time:,.0f}/s)')
+    print(
+        f'Classify: p50 {percentile(classify_times, 0.5) / 1_000:,.1f} µs, '
+        f'p99 {percentile(classify_times, 0.99) / 1_000:,.1f} µs\n'
+    )
+    print(f'{"Handler":<20}{"calls":>8}{"errors":>8}{"msgs/s":>10}{"p50 (µs)":>12}{"p99 (µs)":>12}')
+    for name in sorted(handler_times, key=lambda name: sum(handler_times[name]), reverse=True):
+        times = sorted(handler_times[name])
+        throughput = len(times) / (sum(times) / 1_000_000_000)
+        print(
+            f'{name:<20}{len(times):>8,}{handler_errors[name]:>8,}{throughput:>10,.0f}'
+            f'{percentile(times, 0.5) / 1_000:>12,.1f}{percentile(times, 0.99) / 1_000:>12,.1f}'
+        )
+
+
+# Replay
+async def replay(rounds: int, corpus_file: str) -> None:
+    guild = StubGuild()
+    epic_rpg = guild.add_member(settings.EPIC_RPG_ID, 'EPIC RPG', bot=True)
+    navi = guild.add_member(NAVI_ID, 'Navi', bot=True)
+    player = guild.add_member(PLAYER_ID, PLAYER_NAME)
+    guild.add_member(PARTNER_ID, PARTNER_NAME)
+    channel = StubChannel(guild, navi)
+    bot = StubBot(asyncio.get_running_loop(), navi, guild, channel)
+    # The stub channel has no rate limits, the handlers shouldn't wait for the send queue buckets
+    for route_name in outbox.ROUTE_LIMITS:
+        outbox.ROUTE_LIMITS[route_name] = (1_000_000, 1.0)
+    route_names = load_cogs(bot)
+    await insert_players(channel)
+    corpus = load_corpus(corpus_file)
+    print(f'Loaded {len(route_names)} routes and {len(corpus)} corpus messages, {rounds:,} rounds\n')
+    classify_times: List[int] = []
+    handler_times: Dict[str, List[int]] = defaultdict(list)
+    handler_errors: Dict[str, int] = defaultdict(int)
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        for data in corpus:
+            message = build_message(data, channel, epic_rpg, player)
+            classify_start = time.perf_counter_ns()
+            snapshot = MessageSnapshot(message)
+            routes: Tuple[router.Route] = router.classify(snapshot)
+            classify_times.append(time.perf_counter_ns() - classify_start)
+            for route in routes:
+                errors_before = await count_errors()
+                handler_start = time.perf_counter_ns()
+                try:
+                    await route.handler(message, snapshot)
+                except Exception:
+                    handler_errors[route.name] += 1
+                handler_times[route.name].append(time.perf_counter_ns() - handler_start)
+                handler_errors[route.name] += await count_errors() - errors_before
+    await outbox.flush()
+    await tracking.flush_log_entries()
+    total_time = time.perf_counter() - start_time
+    print_report(classify_times, handler_times, handler_errors, total_time, rounds * len(corpus))
+    print(f'\nMessages sent by Navi: {len(channel.sent):,}')
+    read_stats, write_stats = connection.read_stats, connection.write_stats
+    print(
+        f'Database reads: {read_stats.queries:,}, {read_stats.average_query_time() * 1_000_000:,.1f} µs avg, '
+        f'{read_stats.average_wait_time() * 1_000_000:,.1f} µs avg wait in queue'
+    )
+    print(
+        f'Database writes: {write_stats.queries:,} in {write_stats.batches:,} batches, '
+        f'{write_stats.average_query_time() * 1_000_000:,.1f} µs avg, '
+        f'{write_stats.average_wait_time() * 1_000_000:,.1f} µs avg wait for the batch'
+    )
+    print(f'User cache: {users.cache_stats.hits:,} hits, {users.cache_stats.misses:,} misses')
+    print(
+        f'Update statements: {len(statements.update_statements):,} built, {statements.stats.hits:,} reused'
+    )
+    queue_stats = tracking.log_queue_stats
+    print(
+        f'Tracking log queue: {queue_stats.queued:,} queued, {queue_stats.flushes:,} flushes, '
+        f'{queue_stats.average_flush_size():,.1f} rows avg, {queue_stats.average_flush_time() * 1_000_000:,.1f} µs avg'
+    )
+
+
+def main() -> None:
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    corpus_file = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CORPUS_FILE
+    with tempfile.TemporaryDirectory() as directory:
+        use_temporary_database(directory)
+        try:
+            asyncio.run(replay(rounds, corpus_file))
+        finally:
+            connection.close()
+            settings.NAVI_DB.close()
+
+
+if __name__ == '__main__':
+    main()
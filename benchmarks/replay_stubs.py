@@ -0,0 +1,218 @@
+# replay_stubs.py
+"""Stand-ins for the discord objects the detection cogs use, for benchmarks/replay_benchmark.py.
+
+They only have the attributes and coroutines the cogs and the resources they call actually use. Everything that
+would talk to discord is recorded instead, so the replay can report what the cogs would have sent.
+"""
+
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Dict, List, Optional
+
+
+_snowflakes = count(900_000_000_000_000_000)
+
+
+def next_snowflake() -> int:
+    """Returns a new unique id"""
+    return next(_snowflakes)
+
+
+class StubUser():
+    """User or member"""
+    def __init__(self, user_id: int, name: str, bot: bool = False, guild: Optional['StubGuild'] = None) -> None:
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.discriminator = '0001'
+        self.bot = bot
+        self.guild = guild
+        self.mention = f'<@{user_id}>'
+        self.mutual_guilds = [guild] if guild is not None else []
+
+    def __eq__(self, other: Any) -> bool:
+        return getattr(other, 'id', None) == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return f'{self.name}#{self.discriminator}'
+
+
+class StubEmbedProxy():
+    """Embed author or footer"""
+    def __init__(self, **attributes: str) -> None:
+        self.__dict__.update(attributes)
+
+    def __len__(self) -> int:
+        return len(self.__dict__)
+
+    def __repr__(self) -> str:
+        attributes = ', '.join(f'{key}={value!r}' for key, value in self.__dict__.items())
+        return f'EmbedProxy({attributes})'
+
+
+class StubField():
+    """Embed field"""
+    def __init__(self, name: str, value: str, inline: bool = True) -> None:
+        self.name = name
+        self.value = value
+        self.inline = inline
+
+
+class StubEmbed():
+    """Embed built from the serialized form in the corpus"""
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.author = StubEmbedProxy(**data.get('author', {}))
+        self.footer = StubEmbedProxy(**data.get('footer', {}))
+        self.title = data.get('title', '')
+        self.description = data.get('description', '')
+        self.fields = [StubField(**field) for field in data.get('fields', ())]
+
+
+class StubInteraction():
+    """Interaction metadata of a slash command response"""
+    def __init__(self, name: str, user: StubUser) -> None:
+        self.id = next_snowflake()
+        self.name = name
+        self.user = user
+
+
+class StubReference():
+    """Reference of a reply"""
+    def __init__(self, message: 'StubMessage', cached: bool = True) -> None:
+        self.message_id = message.id
+        self.cached_message = message if cached else None
+
+
+class StubMessage():
+    """Message. Reactions, replies and edits are recorded on the message."""
+    def __init__(self, channel: 'StubChannel', author: StubUser, content: str = '',
+                 embeds: Optional[List[StubEmbed]] = None, interaction: Optional[StubInteraction] = None,
+                 reference: Optional[StubReference] = None) -> None:
+        self.id = next_snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = embeds if embeds is not None else []
+        self.interaction = interaction
+        self.reference = reference
+        self.created_at = datetime.now(timezone.utc)
+        self.jump_url = f'https://discord.com/channels/{self.guild.id}/{channel.id}/{self.id}'
+        self.reactions: List[str] = []
+        self.replies: List['StubMessage'] = []
+
+    async def add_reaction(self, emoji: str) -> None:
+        self.reactions.append(emoji)
+
+    async def remove_reaction(self, emoji: str, member: StubUser) -> None:
+        if emoji in self.reactions: self.reactions.remove(emoji)
+
+    async def reply(self, content: str = '', **kwargs: Any) -> 'StubMessage':
+        reply = await self.channel.send(content, **kwargs)
+        self.replies.append(reply)
+        return reply
+
+    async def edit(self, content: str = '', **kwargs: Any) -> None:
+        if content: self.content = content
+
+
+class StubHistory():
+    """Async iterator over the newest messages of a channel"""
+    def __init__(self, messages: List[StubMessage], limit: int) -> None:
+        self._messages = messages[::-1][:limit]
+
+    def __aiter__(self) -> 'StubHistory':
+        self._iterator = iter(self._messages)
+        return self
+
+    async def __anext__(self) -> StubMessage:
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def flatten(self) -> List[StubMessage]:
+        return list(self._messages)
+
+
+class StubChannel():
+    """Text channel. Messages sent by the bot are recorded in sent."""
+    def __init__(self, guild: 'StubGuild', bot_user: StubUser) -> None:
+        self.id = next_snowflake()
+        self.guild = guild
+        self.name = 'replay'
+        self.mention = f'<#{self.id}>'
+        self.messages: List[StubMessage] = []
+        self.sent: List[StubMessage] = []
+        self._bot_user = bot_user
+
+    def add_message(self, message: StubMessage) -> None:
+        """Adds a message to the channel history, keeping the last 100"""
+        self.messages.append(message)
+        if len(self.messages) > 100: del self.messages[0]
+
+    async def send(self, content: str = '', **kwargs: Any) -> StubMessage:
+        message = StubMessage(self, self._bot_user, content, kwargs.get('embeds') or [])
+        self.sent.append(message)
+        return message
+
+    def history(self, limit: int = 100) -> StubHistory:
+        return StubHistory(self.messages, limit)
+
+    async def fetch_message(self, message_id: int) -> StubMessage:
+        for message in self.messages:
+            if message.id == message_id: return message
+        raise LookupError(f'Message {message_id} not found.')
+
+
+class StubGuild():
+    """Guild with a fully loaded member list"""
+    def __init__(self) -> None:
+        self.id = next_snowflake()
+        self.name = 'Replay'
+        self.chunked = True
+        self._members: Dict[int, StubUser] = {}
+
+    @property
+    def members(self) -> List[StubUser]:
+        return list(self._members.values())
+
+    def add_member(self, user_id: int, name: str, bot: bool = False) -> StubUser:
+        member = self._members[user_id] = StubUser(user_id, name, bot, self)
+        return member
+
+    def get_member(self, user_id: int) -> Optional[StubUser]:
+        return self._members.get(user_id)
+
+    async def fetch_member(self, user_id: int) -> StubUser:
+        member = self._members.get(user_id)
+        if member is None: raise LookupError(f'Member {user_id} not found.')
+        return member
+
+
+class StubBot():
+    """Bot the cogs are loaded into"""
+    def __init__(self, loop: Any, user: StubUser, guild: StubGuild, channel: StubChannel) -> None:
+        self.loop = loop
+        self.user = user
+        self.guilds = [guild]
+        self.cogs: Dict[str, Any] = {}
+        self._channel = channel
+
+    def add_cog(self, cog: Any) -> None:
+        self.cogs[type(cog).__name__] = cog
+
+    def get_user(self, user_id: int) -> Optional[StubUser]:
+        for guild in self.guilds:
+            member = guild.get_member(user_id)
+            if member is not None: return member
+        return None
+
+    def get_channel(self, channel_id: int) -> Optional[StubChannel]:
+        return self._channel if channel_id == self._channel.id else None
+
+    async def wait_until_ready(self) -> None:
+        return None
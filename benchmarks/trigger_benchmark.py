@@ -0,0 +1,92 @@
+# trigger_benchmark.py
+"""Compares trigger detection with substring checks per phrase against the single pass TriggerMatcher.
+
+Usage: python benchmarks/trigger_benchmark.py [iterations]
+
+The substring variant does what the router and the hunt cog did before: check every trigger of every route and
+then lowercase the message for every monster. Both variants are measured with the real trigger and monster lists
+and with monster lists that are 4 and 16 times as long, to show how the cost grows with the number of phrases.
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resources import strings
+from resources.matcher import TriggerMatcher
+
+
+HUNT_MESSAGE = (
+    '**Navchan** found and killed a <:zombie:1> **Zombie**\n'
+    'Earned 21,442 coins and 12,911 XP\n'
+    'Lost 54 HP, remaining HP is 312/366\n'
+    '**Navchan** got 1 <:epiclootbox:3> EPIC lootbox'
+)
+OTHER_MESSAGE = (
+    '**Navchan** is training in the river!\nIs this a **normie fish**? <:normiefish:1>\n'
+    'You have 15 seconds to answer'
+)
+
+
+def get_trigger_groups() -> Dict[str, Tuple[str]]:
+    """Returns all trigger tuples in strings.py"""
+    return {name: getattr(strings, name) for name in dir(strings) if name.startswith('TRIGGERS_')}
+
+
+def build_substring_detector(trigger_groups: Dict[str, Tuple[str]],
+                             monsters: Tuple[str]) -> Callable[[str], set]:
+    """Returns a function that detects the way the code did before"""
+    def detect(message: str) -> set:
+        search_text = message.lower()
+        found = {name for name, triggers in trigger_groups.items()
+                 if any(trigger in search_text for trigger in triggers)}
+        if any(f'> {monster.lower()}' in message.lower() for monster in monsters): found.add('monsters-hunt')
+        return found
+    return detect
+
+
+def build_matcher_detector(trigger_groups: Dict[str, Tuple[str]],
+                           monsters: Tuple[str]) -> Callable[[str], set]:
+    """Returns a function that detects with one TriggerMatcher"""
+    phrase_groups = dict(trigger_groups)
+    phrase_groups['monsters-hunt'] = tuple(f'> {monster.lower()}' for monster in monsters)
+    matcher = TriggerMatcher(phrase_groups)
+    def detect(message: str) -> set:
+        return set(matcher.find(message.lower()))
+    return detect
+
+
+def measure(function: Callable[[str], set], message: str, iterations: int) -> float:
+    """Returns the average time per call in microseconds"""
+    function(message)
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        function(message)
+    return (time.perf_counter() - start_time) / iterations * 1_000_000
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    trigger_groups = get_trigger_groups()
+    print(f'Trigger detection per message, {iterations:,} iterations\n')
+    print(f'{"Message":<10}{"monsters":>10}{"substring (µs)":>17}{"matcher (µs)":>15}')
+    for factor in (1, 4, 16):
+        monsters = tuple(
+            f'{monster}{copy}' if copy else monster
+            for copy in range(factor) for monster in strings.MONSTERS_HUNT
+        )
+        substring_detector = build_substring_detector(trigger_groups, monsters)
+        matcher_detector = build_matcher_detector(trigger_groups, monsters)
+        for message_name, message in (('hunt', HUNT_MESSAGE), ('other', OTHER_MESSAGE)):
+            if substring_detector(message) != matcher_detector(message):
+                raise AssertionError(f'Detectors disagree on the {message_name} message.')
+            substring_time = measure(substring_detector, message, iterations)
+            matcher_time = measure(matcher_detector, message, iterations)
+            print(f'{message_name:<10}{len(monsters):>10}{substring_time:>17.2f}{matcher_time:>15.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,8 @@ import traceback
 import discord
 from discord.ext import commands
 
-from database import errors, guilds
-from resources import settings
+from database import errors, guilds, tracking
+from resources import interactions, members, outbox, recent_commands, router, settings
 
 intents = discord.Intents.none()
 intents.guilds = True   # for on_guild_join() and all guild objects
@@ -17,8 +17,19 @@ intents.message_content = True # for command detection
 
 allowed_mentions = discord.AllowedMentions(everyone=False, roles=False, replied_user=False)
 
-bot = commands.Bot(command_prefix=guilds.get_all_prefixes, help_command=None, case_insensitive=True,
-                   intents=intents, allowed_mentions=allowed_mentions)
+
+class NaviBot(commands.Bot):
+    """Bot that sends waiting reminder messages and writes queued database writes before it closes"""
+    async def close(self) -> None:
+        try:
+            await outbox.flush()
+            await tracking.flush_log_entries()
+        finally:
+            await super().close()
+
+
+bot = NaviBot(command_prefix=guilds.get_all_prefixes, help_command=None, case_insensitive=True,
+              intents=intents, allowed_mentions=allowed_mentions)
 
 
 @bot.event
@@ -40,6 +51,45 @@ async def on_error(event: str, message: discord.Message) -> None:
         await message.channel.send(embed=embed)
 
 
+@bot.listen()
+async def on_message(message: discord.Message) -> None:
+    """Remembers rpg commands of users and interactions of EPIC RPG and hands every message to the router which
+    passes messages from EPIC RPG on to the cogs that handle them"""
+    recent_commands.add_message(message)
+    interactions.add_message(message)
+    await router.dispatch(bot, message)
+
+
+@bot.listen()
+async def on_member_join(member: discord.Member) -> None:
+    """Adds new members to the member name index"""
+    members.add_member(member)
+
+
+@bot.listen()
+async def on_member_remove(member: discord.Member) -> None:
+    """Removes members that left from the member name index"""
+    members.remove_member(member)
+
+
+@bot.listen()
+async def on_member_update(before: discord.Member, after: discord.Member) -> None:
+    """Updates the member name index if the name of a member changed"""
+    if before.name != after.name: members.add_member(after)
+
+
+@bot.listen()
+async def on_user_update(before: discord.User, after: discord.User) -> None:
+    """Updates the member name index in all guilds of a user that changed their name"""
+    if before.name != after.name: members.update_user(after)
+
+
+@bot.listen()
+async def on_guild_remove(guild: discord.Guild) -> None:
+    """Drops the member name index of guilds the bot left"""
+    members.remove_guild(guild)
+
+
 EXTENSIONS = [
         'cogs.adventure',
         'cogs.arena',
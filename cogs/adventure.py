@@ -1,60 +1,58 @@
 # adventure.py
 
 from datetime import datetime
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, tracking, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class AdventureCog(commands.Cog):
     """Cog that contains the adventure detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('adventure', self.on_epic_rpg_message, strings.TRIGGERS_ADVENTURE)
+        router.register_phrases('monsters-adventure', tuple(f'> {monster}' for monster in strings.MONSTERS_ADVENTURE))
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route and the monster phrases of this cog from the router"""
+        router.unregister('adventure')
+        router.unregister_phrases('monsters-adventure')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Adventure cooldown
-            if 'you have already been in an adventure' in message_title.lower():
+            if 'you have already been in an adventure' in snapshot.title_lower:
                 user_id = user_name = user_command = None
                 user = await functions.get_interaction_user(message)
                 if user is not None:
                     user_command = '/adventure'
                 else:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in adventure cooldown message: {message.embeds[0].fields}'
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in adventure cooldown message: {message.embeds[0].fields}',
                         message
@@ -66,17 +64,14 @@ class AdventureCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.alert_adventure.enabled: return
                 if user_command is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ') and ' adv' in msg.content.lower()
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.content_lower.startswith('rpg ') and ' adv' in command.content_lower,
+                        author=user
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the adventure cooldown message.',
                             message
@@ -90,7 +85,7 @@ class AdventureCog(commands.Cog):
                         if argument in ('h', 'hardmode') and 'hardmode' not in arguments:
                             arguments = f'{arguments} hardmode'
                     user_command = f'rpg {arguments.strip()}'
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_adventure.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -100,35 +95,34 @@ class AdventureCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
         if not message.embeds:
-            message_content = message.content
             # Adventure
-            if ('** found a' in message_content.lower()
-                and any(f'> {monster.lower()}' in message_content.lower() for monster in strings.MONSTERS_ADVENTURE)):
+            if ('** found a' in snapshot.content_lower
+                and 'monsters-adventure' in router.get_matches(snapshot)):
                 user = await functions.get_interaction_user(message)
                 if user is not None:
                     user_command = '/adventure'
-                    if '(but stronger)' in message_content.lower(): user_command = f'{user_command} mode: hardmode'
+                    if '(but stronger)' in snapshot.content_lower: user_command = f'{user_command} mode: hardmode'
                 else:
                     user_command = 'rpg adventure'
-                    if '(but stronger)' in message_content.lower(): user_command = f'{user_command} hardmode'
+                    if '(but stronger)' in snapshot.content_lower: user_command = f'{user_command} hardmode'
                     user_name = None
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\* found a", message_content).group(1)
+                        user_name = regex.NAME_FOUND_START.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in adventure message: {message_content}',
+                            f'User not found in adventure message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in adventure message: {message_content}',
+                        f'User not found in adventure message: {snapshot.content}',
                         message
                     )
                     return
@@ -153,13 +147,13 @@ class AdventureCog(commands.Cog):
                         'GODLY lootbox': emojis.SURPRISE,
                     }
                     for stuff_name, stuff_emoji in found_stuff.items():
-                        if stuff_name in message_content:
-                            await message.add_reaction(stuff_emoji)
+                        if stuff_name in snapshot.content:
+                            outbox.add_reaction(message, stuff_emoji)
                 await functions.add_reminder_reaction(message, reminder, user_settings)
                 # Add an F if the user died
-                if ((message_content.find(f'**{user.name}** lost but ') > -1)
-                    or (message_content.find('but lost fighting') > -1)):
-                    if user_settings.reactions_enabled: await message.add_reaction(emojis.RIP)
+                if ((snapshot.content.find(f'**{user.name}** lost but ') > -1)
+                    or (snapshot.content.find('but lost fighting') > -1)):
+                    if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.RIP)
 
 
 # Initialization
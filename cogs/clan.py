@@ -1,68 +1,57 @@
 # clan.py
 # Contains clan detection commands
 
-import re
 
 import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
 
 from database import clans, errors, cooldowns, reminders, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class ClanCog(commands.Cog):
     """Cog that contains the clan detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('clan', self.on_epic_rpg_message, strings.TRIGGERS_CLAN)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('clan')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = message_footer = message_field0 = ''
-            message_field1 = message_description = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
-            if embed.fields:
-                message_field0 = embed.fields[0].value
-                if len(embed.fields) > 1:
-                    message_field1 = embed.fields[1].value
-            if embed.description: message_description = str(embed.description)
-            if embed.footer: message_footer = str(embed.footer.text)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Clan cooldown
-            if 'your guild has already raided or been upgraded' in message_title.lower():
+            if 'your guild has already raided or been upgraded' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 alert_message_prefix = '/' if user is not None else 'rpg '
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in clan cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in clan cooldown message: {message.embeds[0].fields}',
                         message
@@ -77,7 +66,7 @@ class ClanCog(commands.Cog):
                     user_settings: users.User = await users.get_user(user.id)
                 except exceptions.FirstTimeUserError:
                     user_settings = None
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 if clan.stealth_current >= clan.stealth_threshold:
                     alert_message = f'{alert_message_prefix}guild raid'
@@ -89,22 +78,22 @@ class ClanCog(commands.Cog):
                 )
                 if reminder.record_exists:
                     if user_settings is None:
-                        await message.add_reaction(emojis.NAVI)
+                        outbox.add_reaction(message, emojis.NAVI)
                     else:
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.add_reaction(emojis.CROSS)
+                    if settings.DEBUG_MODE: outbox.add_reaction(message, emojis.CROSS)
 
             # Clan overview
-            if 'your guild was raided' in message_footer.lower():
+            if 'your guild was raided' in snapshot.footer_lower:
                 user = await functions.get_interaction_user(message)
                 alert_message_prefix = '/' if user is not None else 'rpg '
                 if message.mentions: return # Yes that also disables it if you ping yourself but who does that
                 try:
-                    clan_name = re.search("^\*\*(.+?)\*\*", message_description).group(1)
+                    clan_name = regex.NAME_BOLD_START.search(snapshot.description).group(1)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Clan name not found in clan message: {message.embeds[0].fields}',
                         message
@@ -122,12 +111,12 @@ class ClanCog(commands.Cog):
                     except exceptions.FirstTimeUserError:
                         pass
                 try:
-                    stealth = re.search("STEALTH\*\*: (.+?)\\n", message_field1).group(1)
+                    stealth = regex.CLAN_STEALTH.search(snapshot.field_value(1)).group(1)
                     stealth = int(stealth)
                     await clan.update(stealth_current=stealth)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Stealth not found in clan message: {message.embeds[0].fields}',
                         message
@@ -137,7 +126,7 @@ class ClanCog(commands.Cog):
                     alert_message = f'{alert_message_prefix}guild raid'
                 else:
                     alert_message = f'{alert_message_prefix}guild upgrade'
-                timestring_search = re.search(":clock4: \*\*(.+?)\*\*", message_field1)
+                timestring_search = regex.CLAN_RAID_TIMESTRING.search(snapshot.field_value(1))
                 if timestring_search is None: return
                 timestring = timestring_search.group(1)
                 time_left = await functions.parse_timestring_to_timedelta(timestring)
@@ -147,28 +136,24 @@ class ClanCog(commands.Cog):
                 )
                 if reminder.record_exists:
                     if user_settings is None:
-                        await message.add_reaction(emojis.NAVI)
+                        outbox.add_reaction(message, emojis.NAVI)
                     else:
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
 
             # Guild upgrade
-            if ('guild successfully upgraded!' in message_description.lower()
-                or 'guild upgrade failed!' in message_description.lower()):
+            if ('guild successfully upgraded!' in snapshot.description_lower
+                or 'guild upgrade failed!' in snapshot.description_lower):
                 user = await functions.get_interaction_user(message)
                 alert_message_prefix = '/' if user is not None else 'rpg '
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower() == 'rpg guild upgrade' and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.content_lower == 'rpg guild upgrade'
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the clan upgrade message.',
                             message
@@ -186,11 +171,11 @@ class ClanCog(commands.Cog):
                     user_settings = None
                 clan_stealth_before = clan.stealth_current
                 try:
-                    stealth = re.search("--> \*\*(.+?)\*\*", message_field0).group(1)
+                    stealth = regex.CLAN_STEALTH_UPGRADE.search(snapshot.field_value(0)).group(1)
                     stealth = int(stealth)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Stealth not found in clan upgrade message: {message.embeds[0].fields}',
                         message
@@ -212,34 +197,34 @@ class ClanCog(commands.Cog):
                 )
                 if reminder.record_exists:
                     if user_settings is None:
-                        await message.add_reaction(emojis.NAVI)
+                        outbox.add_reaction(message, emojis.NAVI)
                     else:
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                     if clan.stealth_current >= clan.stealth_threshold:
                         if user_settings is None:
-                            await message.add_reaction(emojis.YAY)
+                            outbox.add_reaction(message, emojis.YAY)
                         else:
-                            if user_settings.reactions_enabled: await message.add_reaction(emojis.YAY)
+                            if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.YAY)
                     if clan.stealth_current == clan_stealth_before:
                         if user_settings is None:
-                            await message.add_reaction(emojis.ANGRY)
+                            outbox.add_reaction(message, emojis.ANGRY)
                         else:
-                            if user_settings.reactions_enabled: await message.add_reaction(emojis.ANGRY)
+                            if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.ANGRY)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
 
             # Guild raid
-            if ('** RAIDED **' in message_description and ':crossed_swords:' in message_description.lower()):
+            if ('** RAIDED **' in snapshot.description and ':crossed_swords:' in snapshot.description_lower):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 alert_message_prefix = '/' if user is not None else 'rpg '
                 if user is None:
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* throws", message_field0).group(1)
+                        user_name = regex.NAME_THROWS.search(snapshot.field_value(0)).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in clan raid message: {message.embeds[0].fields}',
                             message
@@ -248,7 +233,7 @@ class ClanCog(commands.Cog):
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in clan raid message: {message.embeds[0].fields}',
                         message
@@ -264,11 +249,11 @@ class ClanCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     user_settings = None
                 try:
-                    energy = re.search("earned \*\*(.+?)\*\*", message_field1).group(1)
+                    energy = regex.CLAN_ENERGY.search(snapshot.field_value(1)).group(1)
                     energy = int(energy)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Energy not found in clan raid message: {message.embeds[0].fields}',
                         message
@@ -278,7 +263,8 @@ class ClanCog(commands.Cog):
                 clan_raid = await clans.insert_clan_raid(clan.clan_name, user.id, energy, current_time)
                 if not clan_raid.raid_time == current_time:
                     if settings.DEBUG_MODE:
-                        await message.channel.send(
+                        await outbox.send_message(
+                            message.channel,
                             'There was an error adding the raid to the leaderboard. Please tell Miri he\'s an idiot.'
                         )
                 cooldown: cooldowns.Cooldown = await cooldowns.get_cooldown('clan')
@@ -296,11 +282,11 @@ class ClanCog(commands.Cog):
                 )
                 if reminder.record_exists:
                     if user_settings is None:
-                        await message.add_reaction(emojis.NAVI)
+                        outbox.add_reaction(message, emojis.NAVI)
                     else:
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
 
 
 # Initialization
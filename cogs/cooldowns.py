@@ -1,62 +1,55 @@
 # cooldowns.py
 
-import re
-
 import discord
 from discord.ext import commands
 from datetime import datetime
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class CooldownsCog(commands.Cog):
     """Cog that contains the cooldowns detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('cooldowns', self.on_epic_rpg_message, strings.TRIGGERS_COOLDOWNS)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('cooldowns')
 
-        if not message.embeds: return
-        embed: discord.Embed = message.embeds[0]
-        message_author = message_footer = message_fields = icon_url = ''
-        if embed.author:
-            message_author = str(embed.author.name)
-            icon_url = embed.author.icon_url
-        for field in embed.fields:
-            message_fields = f'{message_fields}\n{str(field.value)}'.strip()
-        if embed.footer: message_footer = str(embed.footer.text)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
-        if not 'check the short version of this command' in message_footer.lower(): return
+        if not message.embeds: return
+        if not 'check the short version of this command' in snapshot.footer_lower: return
 
         user_id = user_name = None
         user = await functions.get_interaction_user(message)
         slash_command = True if user is not None else False
         if user is None:
             try:
-                user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
             except:
                 try:
-                    user_name = re.search("^(.+?)'s cooldowns", message_author).group(1)
+                    user_name = regex.USER_NAME_COOLDOWNS.search(snapshot.author).group(1)
                     user_name = await functions.encode_text(user_name)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in cooldown message: {message.embeds[0].fields}',
                         message
                     )
                     return
             if user_id is not None:
-                user = await message.guild.fetch_member(user_id)
+                user = await members.get_member(message.guild, user_id)
             else:
                 user = await functions.get_guild_member_by_name(message.guild, user_name)
         if user is None:
             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                await message.add_reaction(emojis.WARNING)
+                outbox.add_reaction(message, emojis.WARNING)
             await errors.log_error(
                 f'User not found in cooldowns message: {message.embeds[0].fields}',
                 message
@@ -70,10 +63,10 @@ class CooldownsCog(commands.Cog):
         cooldowns = []
         if user_settings.alert_daily.enabled:
             try:
-                daily_search = re.search("Daily`\*\* \(\*\*(.+?)\*\*", message_fields)
+                daily_search = regex.COOLDOWN_DAILY.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Daily cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -86,10 +79,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['daily', daily_timestring.lower(), daily_message])
         if user_settings.alert_weekly.enabled:
             try:
-                weekly_search = re.search("Weekly`\*\* \(\*\*(.+?)\*\*", message_fields)
+                weekly_search = regex.COOLDOWN_WEEKLY.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Weekly cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -102,10 +95,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['weekly', weekly_timestring.lower(), weekly_message])
         if user_settings.alert_lootbox.enabled:
             try:
-                lb_search = re.search("Lootbox`\*\* \(\*\*(.+?)\*\*", message_fields)
+                lb_search = regex.COOLDOWN_LOOTBOX.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Lootbox cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -117,17 +110,17 @@ class CooldownsCog(commands.Cog):
                 lb_message = user_settings.alert_lootbox.message.replace('{command}', user_command)
                 cooldowns.append(['lootbox', lb_timestring.lower(), lb_message])
         if user_settings.alert_adventure.enabled:
-            if 'Adventure hardmode`**' in message_fields:
-                adv_search_string = 'Adventure hardmode`\*\* \(\*\*(.+?)\*\*'
+            if 'Adventure hardmode`**' in snapshot.fields_text:
+                adv_pattern = regex.COOLDOWN_ADVENTURE_HARDMODE
                 adv_command = '/adventure mode: hardmode' if slash_command else 'rpg adventure hardmode'
             else:
-                adv_search_string = 'Adventure`\*\* \(\*\*(.+?)\*\*'
+                adv_pattern = regex.COOLDOWN_ADVENTURE
                 adv_command = '/adventure' if slash_command else 'rpg adventure'
             try:
-                adv_search = re.search(adv_search_string, message_fields)
+                adv_search = adv_pattern.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Adventure cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -138,15 +131,15 @@ class CooldownsCog(commands.Cog):
                 adv_message = user_settings.alert_adventure.message.replace('{command}', adv_command)
                 cooldowns.append(['adventure', adv_timestring.lower(), adv_message])
         if user_settings.alert_training.enabled:
-            if 'Ultraining`**' in message_fields:
+            if 'Ultraining`**' in snapshot.fields_text:
                 tr_command = '/ultraining' if slash_command else 'rpg ultraining'
             else:
                 tr_command = '/training' if slash_command else 'rpg training'
             try:
-                tr_search = re.search("raining`\*\* \(\*\*(.+?)\*\*", message_fields)
+                tr_search = regex.COOLDOWN_TRAINING.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Training cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -158,10 +151,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['training', tr_timestring.lower(), tr_message])
         if user_settings.alert_quest.enabled:
             try:
-                quest_search = re.search("quest`\*\* \(\*\*(.+?)\*\*", message_fields)
+                quest_search = regex.COOLDOWN_QUEST.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Quest cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -174,10 +167,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['quest', quest_timestring.lower(), quest_message])
         if user_settings.alert_duel.enabled:
             try:
-                duel_search = re.search("Duel`\*\* \(\*\*(.+?)\*\*", message_fields)
+                duel_search = regex.COOLDOWN_DUEL.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Duel cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -190,10 +183,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['duel', duel_timestring.lower(), duel_message])
         if user_settings.alert_arena.enabled:
             try:
-                arena_search = re.search("rena`\*\* \(\*\*(.+?)\*\*", message_fields)
+                arena_search = regex.COOLDOWN_ARENA.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Arena cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -206,10 +199,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['arena', arena_timestring.lower(), arena_message])
         if user_settings.alert_dungeon_miniboss.enabled:
             try:
-                dungmb_search = re.search("boss`\*\* \(\*\*(.+?)\*\*", message_fields)
+                dungmb_search = regex.COOLDOWN_DUNGEON_MINIBOSS.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Miniboss cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -222,10 +215,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['dungeon-miniboss', dungmb_timestring.lower(), dungmb_message])
         if user_settings.alert_horse_breed.enabled:
             try:
-                horse_search = re.search("race`\*\* \(\*\*(.+?)\*\*", message_fields)
+                horse_search = regex.COOLDOWN_HORSE.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Horse cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -238,10 +231,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['horse', horse_timestring.lower(), horse_message])
         if user_settings.alert_vote.enabled:
             try:
-                vote_search = re.search("Vote`\*\* \(\*\*(.+?)\*\*", message_fields)
+                vote_search = regex.COOLDOWN_VOTE.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Vote cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -254,10 +247,10 @@ class CooldownsCog(commands.Cog):
                 cooldowns.append(['vote', vote_timestring.lower(), vote_message])
         if user_settings.alert_farm.enabled:
             try:
-                farm_search = re.search("Farm`\*\* \(\*\*(.+?)\*\*", message_fields)
+                farm_search = regex.COOLDOWN_FARM.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Farm cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -269,15 +262,15 @@ class CooldownsCog(commands.Cog):
                 farm_message = user_settings.alert_farm.message.replace('{command}', user_command)
                 cooldowns.append(['farm', farm_timestring.lower(), farm_message])
         if user_settings.alert_work.enabled:
-            if 'Mine`**' in message_fields: work_search_string = 'Mine`\*\* \(\*\*(.+?)\*\*'
-            elif 'Pickaxe`**' in message_fields: work_search_string = 'Pickaxe`\*\* \(\*\*(.+?)\*\*'
-            elif 'Drill`**' in message_fields: work_search_string = 'Drill`\*\* \(\*\*(.+?)\*\*'
-            else: work_search_string = 'Dynamite`\*\* \(\*\*(.+?)\*\*'
+            if 'Mine`**' in snapshot.fields_text: work_pattern = regex.COOLDOWN_WORK_MINE
+            elif 'Pickaxe`**' in snapshot.fields_text: work_pattern = regex.COOLDOWN_WORK_PICKAXE
+            elif 'Drill`**' in snapshot.fields_text: work_pattern = regex.COOLDOWN_WORK_DRILL
+            else: work_pattern = regex.COOLDOWN_WORK_DYNAMITE
             try:
-                work_search = re.search(work_search_string, message_fields)
+                work_search = work_pattern.search(snapshot.fields_text)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Work cooldown not found in cooldown message: {message.embeds[0].fields}',
                     message
@@ -299,9 +292,9 @@ class CooldownsCog(commands.Cog):
                                                             message.channel.id, cd_message, overwrite_message=False)
                 )
                 if not reminder.record_exists:
-                    await message.channel.send(strings.MSG_ERROR)
+                    await outbox.send_message(message.channel, strings.MSG_ERROR)
                     return
-        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
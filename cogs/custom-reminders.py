@@ -3,7 +3,7 @@
 from discord.ext import commands
 
 from database import reminders, users
-from resources import emojis, exceptions, functions, strings
+from resources import emojis, exceptions, functions, outbox, strings
 
 
 class CustomRemindersCog(commands.Cog):
@@ -68,7 +68,7 @@ class CustomRemindersCog(commands.Cog):
                                                     ctx.channel.id, reminder_text.strip())
         )
         if reminder.record_exists:
-            await ctx.message.add_reaction(emojis.NAVI)
+            outbox.add_reaction(ctx.message, emojis.NAVI)
         else:
             await ctx.reply(strings.MSG_ERROR)
 
@@ -105,7 +105,7 @@ class CustomRemindersCog(commands.Cog):
             return
         await reminder.delete()
         if not reminder.record_exists:
-            await ctx.message.add_reaction(emojis.NAVI)
+            outbox.add_reaction(ctx.message, emojis.NAVI)
         else:
             await ctx.reply('There was an error deleting the reminder, RIP.')
 
@@ -9,8 +9,8 @@ import sys
 import discord
 from discord.ext import commands
 
-from database import cooldowns
-from resources import emojis, strings
+from database import connection, cooldowns, reminders, statements, tracking, users
+from resources import emojis, interactions, members, outbox, recent_commands, regex, router, strings
 
 
 class DevCog(commands.Cog):
@@ -247,6 +247,165 @@ class DevCog(commands.Cog):
             message = f'{message}\n{action}'
         await ctx.send(f'```diff\n{message}\n```')
 
+    @dev.command(name='router')
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def dev_router(self, ctx: commands.Context) -> None:
+        """Shows how many messages the router checked and how long classifying and handling took"""
+        if ctx.prefix.lower() == 'rpg ': return
+        stats = router.stats
+        message = (
+            f'Messages checked: {stats.messages_checked:,}\n'
+            f'Messages routed: {stats.messages_routed:,}\n'
+            f'Classify time: {stats.average_classify_time() * 1_000_000:,.1f} µs avg, '
+            f'{stats.classify_time_max * 1_000_000:,.1f} µs max\n'
+            f'Matcher: {router.get_matcher().phrase_count:,} phrases, {router.get_matcher().state_count:,} states\n'
+        )
+        for name in sorted(stats.handler_calls):
+            message = (
+                f'{message}\n{emojis.BP} `{name}`: {stats.handler_calls[name]:,} calls, '
+                f'{stats.average_handler_time(name) * 1_000:,.1f} ms avg'
+            )
+        await ctx.reply(message)
+
+    @dev.command(name='regex')
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def dev_regex(self, ctx: commands.Context) -> None:
+        """Shows the 20 regex patterns that took the most time in total"""
+        if ctx.prefix.lower() == 'rpg ': return
+        all_patterns = [pattern for pattern in regex.get_all_patterns() if pattern.calls > 0]
+        all_patterns.sort(key=lambda pattern: pattern.time, reverse=True)
+        total_time = sum(pattern.time for pattern in all_patterns)
+        total_calls = sum(pattern.calls for pattern in all_patterns)
+        message = f'Regex calls: {total_calls:,}\nRegex time: {total_time / 1_000_000:,.2f} ms\n'
+        for pattern in all_patterns[:20]:
+            message = (
+                f'{message}\n{emojis.BP} `{pattern.name}`: {pattern.calls:,} calls, {pattern.matches:,} matches, '
+                f'{pattern.average_time() / 1_000:,.1f} µs avg'
+            )
+        await ctx.reply(message)
+
+    @dev.command(name='database', aliases=('db',))
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def dev_database(self, ctx: commands.Context) -> None:
+        """Shows how many queries ran on the database threads and how long they waited in the queue"""
+        if ctx.prefix.lower() == 'rpg ': return
+        message = ''
+        for name, stats in (('Reads', connection.read_stats), ('Writes', connection.write_stats)):
+            message = (
+                f'{message}**{name}**\n'
+                f'Queries: {stats.queries:,}\n'
+                f'Queue depth: {stats.queue_depth:,} now, {stats.queue_depth_max:,} max\n'
+                f'Wait time: {stats.average_wait_time() * 1_000:,.2f} ms avg, '
+                f'{stats.wait_time_max * 1_000:,.2f} ms max\n'
+                f'Query time: {stats.average_query_time() * 1_000:,.2f} ms avg, '
+                f'{stats.query_time_max * 1_000:,.2f} ms max\n\n'
+            )
+        write_stats = connection.write_stats
+        message = (
+            f'{message}Batches: {write_stats.batches:,}, {write_stats.average_batch_size():,.1f} writes avg, '
+            f'{write_stats.batch_size_max:,} max, {write_stats.failed_batches:,} failed\n'
+            f'Update statements: {len(statements.update_statements):,} built, {statements.stats.hits:,} reused\n\n'
+        )
+        queue_stats = tracking.log_queue_stats
+        message = (
+            f'{message}**Tracking log queue**\n'
+            f'Queued: {queue_stats.queued:,}, waiting: {len(tracking.log_queue):,}\n'
+            f'Flushes: {queue_stats.flushes:,}, {queue_stats.failed_flushes:,} failed, '
+            f'{queue_stats.full_queue_waits:,} waits for a full queue\n'
+            f'Flush size: {queue_stats.average_flush_size():,.1f} avg, {queue_stats.flush_size_max:,} max\n'
+            f'Flush time: {queue_stats.average_flush_time() * 1_000:,.2f} ms avg, '
+            f'{queue_stats.flush_time_max * 1_000:,.2f} ms max'
+        )
+        await ctx.reply(message)
+
+    @dev.command(name='schedule')
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def dev_schedule(self, ctx: commands.Context) -> None:
+        """Shows how many reminders are scheduled and how late they were handed out"""
+        if ctx.prefix.lower() == 'rpg ': return
+        stats = reminders.scheduler_stats
+        message = (
+            f'**Reminder schedule**\n'
+            f'Scheduled now: {len(reminders.scheduled_reminders):,}, loaded until {reminders.loaded_until} UTC\n'
+            f'Scheduled: {stats.scheduled:,}, unscheduled: {stats.unscheduled:,}\n'
+            f'Loaded: {stats.loaded:,} in {stats.loads:,} windows, {stats.failed_loads:,} failed\n'
+            f'Due: {stats.due:,}, {stats.wakeups:,} wakeups\n'
+            f'Lateness: {stats.average_lateness() * 1_000:,.2f} ms avg, {stats.lateness_max * 1_000:,.2f} ms max'
+        )
+        tasks_cog = self.bot.get_cog('TasksCog')
+        if tasks_cog is not None and tasks_cog.due_reminders is not None:
+            delivery_stats = tasks_cog.delivery_stats
+            message = (
+                f'{message}\n\n**Reminder delivery**\n'
+                f'Workers: {len(tasks_cog.delivery_workers):,}\n'
+                f'Waiting: {tasks_cog.due_reminders.qsize():,} now, {delivery_stats.queue_depth_max:,} max\n'
+                f'Groups handed to the outbox: {delivery_stats.groups:,}'
+            )
+        outbox_stats = outbox.stats
+        message = (
+            f'{message}\n\n**Outbox**\n'
+            f'Channels waiting: {len(outbox.channel_buffers):,}\n'
+            f'Blocks: {outbox_stats.blocks:,} in {outbox_stats.messages:,} messages '
+            f'({outbox_stats.average_blocks_per_message():,.2f} per message), '
+            f'{outbox_stats.failed_messages:,} failed\n'
+            f'Lateness: {outbox_stats.average_lateness() * 1_000:,.2f} ms avg, '
+            f'{outbox_stats.lateness_max * 1_000:,.2f} ms max'
+        )
+        queue_stats = outbox.queue_stats
+        message = f'{message}\n\n**Send queue**\nWaiting: {outbox.get_queue_depth():,} now, {queue_stats.queue_depth_max:,} max'
+        for priority, priority_name in enumerate(outbox.PRIORITY_NAMES):
+            message = (
+                f'{message}\n{priority_name}: {queue_stats.sent[priority]:,} sent, '
+                f'{queue_stats.average_wait_time(priority) * 1_000:,.2f} ms avg wait, '
+                f'{queue_stats.wait_time_max[priority] * 1_000:,.2f} ms max'
+            )
+        message = (
+            f'{message}\nFailed: {queue_stats.failed:,}\n'
+            f'Reactions dropped: {queue_stats.dropped_reactions:,}'
+        )
+        await ctx.reply(message)
+
+    @dev.command(name='caches')
+    @commands.is_owner()
+    @commands.bot_has_permissions(send_messages=True)
+    async def dev_caches(self, ctx: commands.Context) -> None:
+        """Shows the size and hit rates of the in memory caches"""
+        if ctx.prefix.lower() == 'rpg ': return
+        command_stats = recent_commands.stats
+        message = (
+            f'**Recent commands**\n'
+            f'{emojis.BP} Channels: {len(recent_commands.channels):,}\n'
+            f'{emojis.BP} Commands added: {command_stats.commands_added:,}\n'
+            f'{emojis.BP} Buffer hits: {command_stats.hits:,}\n'
+            f'{emojis.BP} History fallbacks: {command_stats.fallbacks:,} ({command_stats.fallback_hits:,} found)\n'
+            f'**Member names**\n'
+            f'{emojis.BP} Guilds indexed: {len(members.guild_indexes):,}\n'
+            f'{emojis.BP} Lookups: {members.stats.lookups:,} ({members.stats.hits:,} found)\n'
+            f'{emojis.BP} Index builds: {members.stats.rebuilds:,}\n'
+            f'{emojis.BP} Stale entries fixed: {members.stats.stale_entries:,}\n'
+            f'**Members by id**\n'
+            f'{emojis.BP} Gateway cache hits: {members.resolver_stats.gateway_hits:,}\n'
+            f'{emojis.BP} Fetched cache hits: {members.resolver_stats.fetched_hits:,} '
+            f'({len(members.fetched_members):,} cached)\n'
+            f'{emojis.BP} Misses: {members.resolver_stats.misses:,} '
+            f'({members.resolver_stats.fetches:,} fetched, {members.resolver_stats.coalesced:,} coalesced)\n'
+            f'**Interactions**\n'
+            f'{emojis.BP} Messages stored: {len(interactions.message_interactions):,}\n'
+            f'{emojis.BP} Hits: {interactions.stats.hits:,}\n'
+            f'{emojis.BP} Misses: {interactions.stats.misses:,} '
+            f'({interactions.stats.fetches:,} fetched, {interactions.stats.coalesced:,} coalesced)\n'
+            f'**Users**\n'
+            f'{emojis.BP} Users cached: {len(users.cached_users):,}\n'
+            f'{emojis.BP} Hits: {users.cache_stats.hits:,}\n'
+            f'{emojis.BP} Misses: {users.cache_stats.misses:,}\n'
+            f'{emojis.BP} Patched: {users.cache_stats.patches:,}, invalidated: {users.cache_stats.invalidations:,}'
+        )
+        await ctx.reply(message)
+
     # Enable/disable commands
     @dev.command(aliases=('disable',))
     @commands.is_owner()
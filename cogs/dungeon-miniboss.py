@@ -1,58 +1,53 @@
 # dungeon-miniboss.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, members, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class DungeonMinibossCog(commands.Cog):
     """Cog that contains the dungeon/miniboss detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('dungeon-miniboss', self.on_epic_rpg_message, strings.TRIGGERS_DUNGEON_MINIBOSS)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('dungeon-miniboss')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Dungeon / Miniboss cooldown
-            if 'you have been in a fight with a boss recently' in message_title.lower():
+            if 'you have been in a fight with a boss recently' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in miniboss cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in dungeon / miniboss cooldown message: {message.embeds[0].fields}',
                         message
@@ -63,7 +58,7 @@ class DungeonMinibossCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.alert_dungeon_miniboss.enabled: return
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_dungeon_miniboss.message.replace('{command}', 'rpg dungeon / miniboss')
                 reminder: reminders.Reminder = (
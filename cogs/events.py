@@ -7,13 +7,19 @@ import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class EventsCog(commands.Cog):
     """Cog that contains the Event detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('events', self.on_epic_rpg_message, strings.TRIGGERS_EVENTS)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('events')
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
@@ -39,23 +45,18 @@ class EventsCog(commands.Cog):
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
-        if message.author.id != settings.EPIC_RPG_ID: return
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if not message.embeds:
-            message_content = message.content
             # Cel Multiply
-            if 'you feel 5% more rich' in message_content.lower():
-                message_history = await message.channel.history(limit=50).flatten()
-                user_command_message = None
-                for msg in message_history:
-                    if msg.content is not None:
-                        if (msg.content.lower().replace(' ','').startswith('rpgcel')
-                            and msg.content.lower().endswith('multiply')
-                            and not msg.author.bot):
-                            user_command_message = msg
-                            break
+            if 'you feel 5% more rich' in snapshot.content_lower:
+                user_command_message = await recent_commands.find_command(
+                    message.channel,
+                    lambda command: command.compact.startswith('rpgcel') and command.content_lower.endswith('multiply')
+                )
                 if user_command_message is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         'Couldn\'t find a command for the cel multiply message.',
                         message
@@ -78,14 +79,14 @@ class EventsCog(commands.Cog):
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
-            if 'you cannot multiply your celebration coins' in message_content.lower() and message.mentions:
+            if 'you cannot multiply your celebration coins' in snapshot.content_lower and message.mentions:
                 user = message.mentions[0]
                 try:
                     user_settings: users.User = await users.get_user(user.id)
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled: return
-                timestring = re.search("another \*\*(.+?)\*\*", message_content).group(1)
+                timestring = regex.CEL_MULTIPLY_TIMESTRING.search(snapshot.content).group(1)
                 time_left = await functions.parse_timestring_to_timedelta(timestring)
                 reminder_message = 'Hey! It\'s time for `rpg cel multiply`!'
                 reminder: reminders.Reminder = (
@@ -95,14 +96,14 @@ class EventsCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
             """
-            if 'you already completed the quest of today!' in message_content.lower() and message.mentions:
+            if 'you already completed the quest of today!' in snapshot.content_lower and message.mentions:
                 user = message.mentions[0]
                 try:
                     user_settings: users.User = await users.get_user(user.id)
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled: return
-                timestring = re.search("in \*\*(.+?)\*\*", message_content).group(1)
+                timestring = re.search("in \*\*(.+?)\*\*", snapshot.content).group(1)
                 time_left = await functions.parse_timestring_to_timedelta(timestring)
                 reminder_message = 'Hey! It\'s time for `rpg cel dailyquest`!'
                 reminder: reminders.Reminder = (
@@ -110,32 +111,22 @@ class EventsCog(commands.Cog):
                                                          message.channel.id, reminder_message)
                 )
                 if reminder.record_exists:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
             """
 
         if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_field_name = message_field_value = ''
-            if len(embed.fields) > 1:
-                message_field_name = embed.fields[1].name
-                message_field_value = embed.fields[1].value
-
-            if not message_field_name.lower() == 'normal events': return
+            if not snapshot.field_name(1, lower=True) == 'normal events': return
 
             user = await functions.get_interaction_user(message)
             if user is None:
-                message_history = await message.channel.history(limit=50).flatten()
-                user_command_message = None
-                for msg in message_history:
-                    if msg.content is not None:
-                        if msg.content.lower().replace(' ','').startswith('rpgevent') and not msg.author.bot:
-                            user_command_message = msg
-                            break
+                user_command_message = await recent_commands.find_command(
+                    message.channel, lambda command: command.compact.startswith('rpgevent')
+                )
                 if user_command_message is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         'Couldn\'t find a command for the events message.',
                         message
@@ -150,10 +141,10 @@ class EventsCog(commands.Cog):
             cooldowns = []
             if user_settings.alert_big_arena.enabled:
                 try:
-                    big_arena_search = re.search("Big arena\*\*: (.+?)\\n", message_field_value)
+                    big_arena_search = regex.EVENT_BIG_ARENA.search(snapshot.field_value(1))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Big arena cooldown not found in event message: {message.embeds[0].fields}',
                         message
@@ -165,10 +156,10 @@ class EventsCog(commands.Cog):
                     cooldowns.append(['big-arena', big_arena_timestring.lower(), big_arena_message])
             if user_settings.alert_lottery.enabled:
                 try:
-                    lottery_search = re.search("Lottery\*\*: (.+?)\\n", message_field_value)
+                    lottery_search = regex.EVENT_LOTTERY.search(snapshot.field_value(1))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Lottery cooldown not found in event message: {message.embeds[0].fields}',
                         message
@@ -180,10 +171,10 @@ class EventsCog(commands.Cog):
                     cooldowns.append(['lottery', lottery_timestring.lower(), lottery_message])
             if user_settings.alert_pet_tournament.enabled:
                 try:
-                    pet_search = re.search("tournament\*\*: (.+?)\\n", message_field_value)
+                    pet_search = regex.EVENT_PET_TOURNAMENT.search(snapshot.field_value(1))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Pet tournament cooldown not found in event message: {message.embeds[0].fields}',
                         message
@@ -195,10 +186,10 @@ class EventsCog(commands.Cog):
                     cooldowns.append(['pet-tournament', pet_timestring.lower(), pet_message])
             if user_settings.alert_horse_race.enabled:
                 try:
-                    horse_search = re.search("race\*\*: (.+?)\\n", message_field_value)
+                    horse_search = regex.EVENT_HORSE_RACE.search(snapshot.field_value(1))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Horse race cooldown not found in event message: {message.embeds[0].fields}',
                         message
@@ -230,9 +221,9 @@ class EventsCog(commands.Cog):
                                                             message.channel.id, cd_message, overwrite_message=False)
                     )
                     if not reminder.record_exists:
-                        await message.channel.send(strings.MSG_ERROR)
+                        await outbox.send_message(message.channel, strings.MSG_ERROR)
                         return
-            if updated_reminder and user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+            if updated_reminder and user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
@@ -1,35 +1,31 @@
 # farm.py
 
 from datetime import datetime
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, tracking, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class FarmCog(commands.Cog):
     """Cog that contains the farm detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('farm', self.on_epic_rpg_message, strings.TRIGGERS_FARM)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('farm')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Farm cooldown
-            if 'you have farmed already' in message_title.lower():
+            if 'you have farmed already' in snapshot.title_lower:
                 user_id = user_name = user_command = None
                 user = await functions.get_interaction_user(message)
                 if user is not None:
@@ -37,26 +33,26 @@ class FarmCog(commands.Cog):
                 else:
                     user_command = 'rpg farm'
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in farm cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in farm cooldown message: {message.embeds[0].fields}',
                         message
@@ -67,29 +63,28 @@ class FarmCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.alert_farm.enabled: return
-                message_history = await message.channel.history(limit=50).flatten()
                 if user_command is None:
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgfarm') and msg.author == user:
-                                if user_command_message.content.lower().startswith('rpgfarmcarrot'):
-                                    user_command = f'{user_command} carrot'
-                                elif user_command_message.content.lower().startswith('rpgfarmpotato'):
-                                    user_command = f'{user_command} potato'
-                                elif user_command_message.content.lower().startswith('rpgfarmbread'):
-                                    user_command = f'{user_command} bread'
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgfarm'),
+                        author=user
+                    )
+                    if user_command_message is not None:
+                        user_command_content = user_command_message.content.lower().replace(' ','')
+                        if user_command_content.startswith('rpgfarmcarrot'):
+                            user_command = f'{user_command} carrot'
+                        elif user_command_content.startswith('rpgfarmpotato'):
+                            user_command = f'{user_command} potato'
+                        elif user_command_content.startswith('rpgfarmbread'):
+                            user_command = f'{user_command} bread'
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the farm cooldown message.',
                             message
                         )
                         return
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_farm.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -99,30 +94,29 @@ class FarmCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
         if not message.embeds:
-            message_content = message.content
             # Farm
-            if 'have grown from the seed' in message_content.lower():
+            if 'have grown from the seed' in snapshot.content_lower:
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
                 if user is None:
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\* plants", message_content).group(1)
+                        user_name = regex.NAME_PLANTS.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in farm message: {message_content}',
+                            f'User not found in farm message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in farm message: {message_content}',
+                        f'User not found in farm message: {snapshot.content}',
                         message
                     )
                     return
@@ -135,12 +129,11 @@ class FarmCog(commands.Cog):
                 if user_settings.tracking_enabled:
                     await tracking.insert_log_entry(user.id, message.guild.id, 'farm', current_time)
                 if not user_settings.alert_farm.enabled: return
-                message_history = await message.channel.history(limit=50).flatten()
-                if 'bread seed in the ground' in message_content.lower():
+                if 'bread seed in the ground' in snapshot.content_lower:
                     user_command = 'rpg farm bread' if not slash_command else '/farm seed: bread'
-                elif 'carrot seed in the ground' in message_content.lower():
+                elif 'carrot seed in the ground' in snapshot.content_lower:
                     user_command = 'rpg farm carrot' if not slash_command else '/farm seed: carrot'
-                elif 'potato seed in the ground' in message_content.lower():
+                elif 'potato seed in the ground' in snapshot.content_lower:
                     user_command = 'rpg farm potato' if not slash_command else '/farm seed: potato'
                 else:
                     user_command = 'rpg farm' if not slash_command else '/farm'
@@ -151,39 +144,39 @@ class FarmCog(commands.Cog):
                                                          message.channel.id, reminder_message)
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
-                if 'also got' in message_content.lower():
-                    if 'potato seed**' in message_content.lower():
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.SEED_POTATO)
-                    elif 'carrot seed**' in message_content.lower():
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.SEED_CARROT)
-                    elif 'bread seed**' in message_content.lower():
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.SEED_BREAD)
+                if 'also got' in snapshot.content_lower:
+                    if 'potato seed**' in snapshot.content_lower:
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.SEED_POTATO)
+                    elif 'carrot seed**' in snapshot.content_lower:
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.SEED_CARROT)
+                    elif 'bread seed**' in snapshot.content_lower:
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.SEED_BREAD)
 
             # Farm event
-            if ('hits the floor with the' in message_content.lower()
-                or 'is about to plant another seed' in message_content.lower()):
+            if ('hits the floor with the' in snapshot.content_lower
+                or 'is about to plant another seed' in snapshot.content_lower):
                 user_name = user_command = None
                 user = await functions.get_interaction_user(message)
                 if user is not None:
                     user_command = '/farm'
                 else:
                     try:
-                        user_name = re.search("\*\*(.+?)\*\*", message_content).group(1)
+                        user_name = regex.NAME_BOLD.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in farm event message: {message_content}',
+                            f'User not found in farm event message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in farm event message: {message_content}',
+                        f'User not found in farm event message: {snapshot.content}',
                         message
                     )
                     return
@@ -196,18 +189,15 @@ class FarmCog(commands.Cog):
                 if user_settings.tracking_enabled:
                     await tracking.insert_log_entry(user.id, message.guild.id, 'farm', current_time)
                 if not user_settings.alert_farm.enabled: return
-                message_history = await message.channel.history(limit=50).flatten()
                 if user_command is None:
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ') and 'farm' in msg.content.lower()
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.content_lower.startswith('rpg ') and 'farm' in command.content_lower,
+                        author=user
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the farm event message.',
                             message
@@ -1,19 +1,24 @@
 # fun.py
 """Contains some nonsense"""
 
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class FunCog(commands.Cog):
     """Cog with events and help and about commands"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        router.register('fun', self.on_epic_rpg_message, strings.TRIGGERS_FUN)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('fun')
 
     @commands.command(aliases=('listen',))
     @commands.bot_has_permissions(send_messages=True, embed_links=True, read_message_history=True)
@@ -30,32 +35,33 @@ class FunCog(commands.Cog):
         if not message.embeds and not message.author.bot:
             message_content = message.content
             if message_content.lower() == 'navi lit':
-                await message.reply('https://tenor.com/view/betty-white-dab-mood-gif-5044603')
+                await outbox.reply(message, 'https://tenor.com/view/betty-white-dab-mood-gif-5044603')
 
-        if not message.embeds and message.author.id == settings.EPIC_RPG_ID:
-            message_content = message.content
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
+        if not message.embeds:
             laugh_terms = [
                 'You just lost your lootbox',
             ]
-            if 'died fighting the **mysterious man**' in message_content.lower():
+            if 'died fighting the **mysterious man**' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\*", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in heal event message for the fun reaction: {message_content}',
+                            f'User not found in heal event message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the heal event reaction.',
                             message
@@ -66,27 +72,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEPE_LAUGH)
+                outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
-            if 'is now in the jail' in message_content.lower():
+            if 'is now in the jail' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("car \*\*(.+?)\\n", message_content).group(1)
+                        user_name = regex.NAME_JAIL.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in epic guard message for the fun reaction: {message_content}',
+                            f'User not found in epic guard message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the jail reaction.',
                             message
@@ -97,27 +103,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEEPO_JAIL)
+                outbox.add_reaction(message, emojis.PEEPO_JAIL)
 
-            if 'again, it **exploded**' in message_content.lower():
+            if 'again, it **exploded**' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* tries to", message_content).group(1)
+                        user_name = regex.NAME_TRIES_TO.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in enchant message for the fun reaction: {message_content}',
+                            f'User not found in enchant message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the failed enchant reaction.',
                             message
@@ -128,27 +134,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEPE_LAUGH)
+                outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
-            if 'took the seed from the ground and decided to try planting it again later' in message_content.lower():
+            if 'took the seed from the ground and decided to try planting it again later' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* HITS", message_content).group(1)
+                        user_name = regex.NAME_HITS.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in farm event message for the fun reaction: {message_content}',
+                            f'User not found in farm event message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the failed farm event reaction.',
                             message
@@ -159,27 +165,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEPE_LAUGH)
+                outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
-            if 'fighting them wasn\'t very clever' in message_content.lower():
+            if 'fighting them wasn\'t very clever' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* fights", message_content).group(1)
+                        user_name = regex.NAME_FIGHTS.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in hunt event message for the fun reaction: {message_content}',
+                            f'User not found in hunt event message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the failed hunt event reaction.',
                             message
@@ -190,27 +196,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEPE_LAUGH)
+                outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
-            if 'you just lost your lootbox' in message_content.lower():
+            if 'you just lost your lootbox' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* uses a", message_content).group(1)
+                        user_name = regex.NAME_USES_A.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in lootbox event message for the fun reaction: {message_content}',
+                            f'User not found in lootbox event message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the failed lootbox event reaction.',
                             message
@@ -221,27 +227,27 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.PEPE_LAUGH)
+                outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
-            if 'christmas slime' in message_content.lower() and 'got 100' in message_content.lower():
+            if 'christmas slime' in snapshot.content_lower and 'got 100' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     user_name = None
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\*", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in christmas slime message for the fun reaction: {message_content}',
+                            f'User not found in christmas slime message for the fun reaction: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the christmas slime reaction.',
                             message
@@ -252,9 +258,9 @@ class FunCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                await message.add_reaction(emojis.XMAS_YAY)
+                outbox.add_reaction(message, emojis.XMAS_YAY)
 
-        if message.embeds and message.author.id == settings.EPIC_RPG_ID:
+        if message.embeds:
             embed: discord.Embed = message.embeds[0]
 
             if embed.fields:
@@ -264,15 +270,13 @@ class FunCog(commands.Cog):
                 if '** got bored and left' in field.value.lower():
                     user = await functions.get_interaction_user(message)
                     if user is None:
-                        message_history = await message.channel.history(limit=50).flatten()
-                        for msg in message_history:
-                            if msg.content is not None:
-                                if msg.content.lower().replace(' ','').startswith('rpgtr') and not msg.author.bot:
-                                    user = msg.author
-                                    break
+                        user_command_message = await recent_commands.find_command(
+                            message.channel, lambda command: command.compact.startswith('rpgtr')
+                        )
+                        if user_command_message is not None: user = user_command_message.author
                         if user is None:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 'Couldn\'t find a user for the lost pet reaction.',
                                 message
@@ -283,7 +287,7 @@ class FunCog(commands.Cog):
                     except exceptions.FirstTimeUserError:
                         return
                     if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                    await message.add_reaction(emojis.PANDA_SAD)
+                    outbox.add_reaction(message, emojis.PANDA_SAD)
 
                 # Shitty lootbox reaction
                 shitty_lootbox_found = False
@@ -296,15 +300,13 @@ class FunCog(commands.Cog):
                 if shitty_lootbox_found:
                     user = await functions.get_interaction_user(message)
                     if user is None:
-                        message_history = await message.channel.history(limit=50).flatten()
-                        for msg in message_history:
-                            if msg.content is not None:
-                                if msg.content.lower().replace(' ','').startswith('rpgopen') and not msg.author.bot:
-                                    user = msg.author
-                                    break
+                        user_command_message = await recent_commands.find_command(
+                            message.channel, lambda command: command.compact.startswith('rpgopen')
+                        )
+                        if user_command_message is not None: user = user_command_message.author
                         if user is None:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 'Couldn\'t find a user for the shitty lootbox reaction.',
                                 message
@@ -315,7 +317,7 @@ class FunCog(commands.Cog):
                     except exceptions.FirstTimeUserError:
                         return
                     if not user_settings.bot_enabled or not user_settings.reactions_enabled: return
-                    await message.add_reaction(emojis.PEPE_LAUGH)
+                    outbox.add_reaction(message, emojis.PEPE_LAUGH)
 
 
 # Initialization
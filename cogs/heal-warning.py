@@ -6,34 +6,37 @@ import discord
 from discord.ext import commands
 
 from database import errors, users
-from resources import emojis, functions, exceptions, logs, settings
+from resources import emojis, exceptions, functions, logs, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class HealWarningCog(commands.Cog):
     """Cog that contains the heal warning detection"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('heal-warning', self.on_epic_rpg_message, strings.TRIGGERS_HEAL_WARNING)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('heal-warning')
+
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if message.embeds: return
-        message_content = message.content
 
         # Hunt together
-        if 'are hunting together' in message_content.lower():
+        if 'are hunting together' in snapshot.content_lower:
             user_name = None
             try:
-                user_name_search = re.search("\*\*(.+?)\*\* and \*\*(.+?)\*\*", message_content)
+                user_name_search = regex.NAMES_BOLD_AND.search(snapshot.content)
                 user_name = user_name_search.group(1)
                 partner_name = user_name_search.group(2)
                 user_name_encoded = await functions.encode_text(user_name)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User or partner not found in hunt together message for heal warning: {message_content}'
+                    f'User or partner not found in hunt together message for heal warning: {snapshot.content}'
                 )
                 return
             user = await functions.get_interaction_user(message)
@@ -41,13 +44,13 @@ class HealWarningCog(commands.Cog):
                 user = await functions.get_guild_member_by_name(message.guild, user_name_encoded)
             if user is None:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in hunt together message for heal warning: {message_content}',
+                    f'User not found in hunt together message for heal warning: {snapshot.content}',
                     message
                 )
                 logs.logger.error(
-                    f'User not found in hunt together message for heal warning: {message_content}\n'
+                    f'User not found in hunt together message for heal warning: {snapshot.content}\n'
                     f'Full guild.members list:\n{message.guild.members}'
                 )
                 return
@@ -56,19 +59,21 @@ class HealWarningCog(commands.Cog):
             except exceptions.FirstTimeUserError:
                 return
             if not user_settings.bot_enabled or not user_settings.heal_warning_enabled: return
-            if message_content.startswith('__'):
-                partner_start = message_content.rfind(partner_name)
-                message_content_user = message_content[:partner_start]
-                health_search = re.search('-(.+?) HP \(:heart: (.+?)/', message_content_user)
+            if snapshot.content.startswith('__'):
+                partner_start = snapshot.content.rfind(partner_name)
+                message_content_user = snapshot.content[:partner_start]
+                health_search = regex.HEALTH_PARTNER.search(message_content_user)
             else:
-                health_search = re.search(f'\*\*{re.escape(user_name)}\*\* lost (.+?) HP, remaining HP is (.+?)/', message_content)
+                health_search = regex.get_dynamic_pattern(
+                    'health lost user', f'\*\*{re.escape(user_name)}\*\* lost (.+?) HP, remaining HP is (.+?)/'
+                ).search(snapshot.content)
             if health_search is None:
-                if (f'{user_name}** lost but' not in message_content
-                    and 'but lost fighting' not in message_content.lower()):
+                if (f'{user_name}** lost but' not in snapshot.content
+                    and 'but lost fighting' not in snapshot.content_lower):
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'Health not found in hunt together message for heal warning: {message_content}',
+                        f'Health not found in hunt together message for heal warning: {snapshot.content}',
                         message
                     )
                     return
@@ -83,7 +88,7 @@ class HealWarningCog(commands.Cog):
                     health_remaining = 0
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Health not found in hunt together message for heal warning: {error}',
                     message
@@ -92,22 +97,22 @@ class HealWarningCog(commands.Cog):
             if health_lost > (health_remaining - (health_lost / 9)):
                 warning = f'Hey! Time to heal! {emojis.LIFE_POTION}'
                 if not user_settings.dnd_mode_enabled:
-                    await message.channel.send(f'{user.mention} {warning}')
+                    await outbox.send_message(message.channel, f'{user.mention} {warning}')
                 else:
-                    await message.channel.send(f'**{user.name}**, {warning}')
+                    await outbox.send_message(message.channel, f'**{user.name}**, {warning}')
 
         # Hunt solo and adventure
-        elif '** found a' in message_content.lower():
+        elif '** found a' in snapshot.content_lower:
             user_name = None
             try:
-                user_name_search = re.search("^\*\*(.+?)\*\* ", message_content)
+                user_name_search = regex.NAME_BOLD_START_SPACE.search(snapshot.content)
                 user_name = user_name_search.group(1)
                 user_name_encoded = await functions.encode_text(user_name)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in hunt/adventure message for heal warning: {message_content}',
+                    f'User not found in hunt/adventure message for heal warning: {snapshot.content}',
                     message
                 )
                 return
@@ -116,9 +121,9 @@ class HealWarningCog(commands.Cog):
                 user = await functions.get_guild_member_by_name(message.guild, user_name_encoded)
             if user is None:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in hunt/adventure message for heal warning: {message_content}',
+                    f'User not found in hunt/adventure message for heal warning: {snapshot.content}',
                     message
                 )
                 return
@@ -127,14 +132,14 @@ class HealWarningCog(commands.Cog):
             except exceptions.FirstTimeUserError:
                 return
             if not user_settings.bot_enabled or not user_settings.heal_warning_enabled: return
-            health_search = re.search('Lost (.+?) HP, remaining HP is (.+?)/', message_content)
+            health_search = regex.HEALTH_LOST.search(snapshot.content)
             if health_search is None:
-                if (f'{user_name}** lost but' not in message_content
-                    and 'but lost fighting' not in message_content.lower()):
+                if (f'{user_name}** lost but' not in snapshot.content
+                    and 'but lost fighting' not in snapshot.content_lower):
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'Health not found in hunt/adventure message for heal warning: {message_content}',
+                        f'Health not found in hunt/adventure message for heal warning: {snapshot.content}',
                         message
                     )
                     return
@@ -149,7 +154,7 @@ class HealWarningCog(commands.Cog):
                     health_remaining = 0
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
                     f'Health not found in hunt/adventure message for heal warning: {error}',
                     message
@@ -158,9 +163,9 @@ class HealWarningCog(commands.Cog):
             if health_lost > (health_remaining - (health_lost / 10)):
                 warning = f'Hey! Time to heal! {emojis.LIFE_POTION}'
                 if not user_settings.dnd_mode_enabled:
-                    await message.channel.send(f'{user.mention} {warning}')
+                    await outbox.send_message(message.channel, f'{user.mention} {warning}')
                 else:
-                    await message.channel.send(f'**{user.name}**, {warning}')
+                    await outbox.send_message(message.channel, f'**{user.name}**, {warning}')
 
 
 # Initialization
@@ -1,26 +1,27 @@
 # horse-race.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class HorseRaceCog(commands.Cog):
     """Cog that contains the horse race detection"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('horse-race', self.on_epic_rpg_message, strings.TRIGGERS_HORSE_RACE)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('horse-race')
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if message.embeds: return
-        message_content = message.content
-        if 'the next race is in' in message_content.lower():
+        if 'the next race is in' in snapshot.content_lower:
             user_name = None
             user = await functions.get_interaction_user(message)
             if user is None:
@@ -28,22 +29,22 @@ class HorseRaceCog(commands.Cog):
                     user = message.mentions[0]
                 else:
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\*,", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START_COMMA.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in horse race message: {message_content}',
+                            f'User not found in horse race message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
             if user is None:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in horse race message: {message_content}',
+                    f'User not found in horse race message: {snapshot.content}',
                     message
                 )
                 return
@@ -52,7 +53,7 @@ class HorseRaceCog(commands.Cog):
             except exceptions.FirstTimeUserError:
                 return
             if not user_settings.bot_enabled or not user_settings.alert_horse_race.enabled: return
-            timestring = re.search("next race is in \*\*(.+?)\*\*", message_content).group(1)
+            timestring = regex.HORSE_RACE_TIMESTRING.search(snapshot.content).group(1)
             time_left = await functions.calculate_time_left_from_timestring(message, timestring)
             reminder_message = user_settings.alert_horse_race.message.replace('{event}', 'horse race')
             reminder: reminders.Reminder = (
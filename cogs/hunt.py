@@ -1,47 +1,45 @@
 # hunt.py
 
 from datetime import datetime, timedelta
-import re
 
 import discord
 from discord.ext import commands
 
 from database import cooldowns, errors, reminders, tracking, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class HuntCog(commands.Cog):
     """Cog that contains the hunt detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('hunt', self.on_epic_rpg_message, strings.TRIGGERS_HUNT)
+        router.register_phrases('monsters-hunt', tuple(f'> {monster}' for monster in strings.MONSTERS_HUNT))
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route and the monster phrases of this cog from the router"""
+        router.unregister('hunt')
+        router.unregister_phrases('monsters-hunt')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Hunt cooldown
-            if 'you have already looked around' in message_title.lower():
+            if 'you have already looked around' in snapshot.title_lower:
                 user_id = user_name = embed_user = user_command = None
                 interaction_user = await functions.get_interaction_user(message)
                 if interaction_user is not None: user_command = '/hunt'
                 try:
-                    user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                    user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                 except:
                     try:
-                        user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                        user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in hunt cooldown message: {message.embeds[0].fields}',
                             message
@@ -49,24 +47,20 @@ class HuntCog(commands.Cog):
                         return
                 if user_id is not None:
                     try:
-                        embed_user = await message.guild.fetch_member(user_id)
+                        embed_user = await members.get_member(message.guild, user_id)
                     except:
                         pass
                 else:
                     embed_user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if embed_user is not None: user_id = embed_user.id
                 if user_command is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpghunt'):
-                                user_command_message = msg
-                                interaction_user = msg.author
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpghunt')
+                    )
+                    if user_command_message is not None: interaction_user = user_command_message.author
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the hunt cooldown message.',
                             message
@@ -90,7 +84,7 @@ class HuntCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.alert_hunt.enabled: return
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 bot_answer_time = message.created_at.replace(microsecond=0, tzinfo=None)
                 current_time = datetime.utcnow().replace(microsecond=0)
@@ -117,41 +111,38 @@ class HuntCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
         if not message.embeds:
-            message_content = message.content
             # Hunt
-            if ('found a' in message_content.lower()
-                and any(f'> {monster.lower()}' in message_content.lower() for monster in strings.MONSTERS_HUNT)):
+            if ('found a' in snapshot.content_lower
+                and 'monsters-hunt' in router.get_matches(snapshot)):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
-                hardmode = True if '(but stronger)' in message_content.lower() else False
-                alone = True if '(way stronger!!!)' in message_content.lower() else False
-                together = True if 'hunting together' in message_content.lower() else False
-                new = True if '__**' in message_content.lower() else False
+                hardmode = True if '(but stronger)' in snapshot.content_lower else False
+                alone = True if '(way stronger!!!)' in snapshot.content_lower else False
+                together = True if 'hunting together' in snapshot.content_lower else False
+                new = True if '__**' in snapshot.content_lower else False
                 if together:
-                    name_search = re.search("\*\*(.+?)\*\* and \*\*(.+?)\*\*", message_content)
+                    name_search = regex.NAMES_BOLD_AND.search(snapshot.content)
                     user_name = name_search.group(1)
                     user_name = await functions.encode_text(user_name)
                     partner_name = name_search.group(2)
                 if user is None:
                     if not together:
-                        user_name_search = re.search("\*\*(.+?)\*\* found a", message_content)
+                        user_name_search = regex.NAME_FOUND.search(snapshot.content)
                         user_name = user_name_search.group(1)
                         user_name = await functions.encode_text(user_name)
                     if user_name != 'Both players':
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                     if user is None:
-                        message_history = await message.channel.history(limit=50).flatten()
-                        for msg in message_history:
-                            if msg.content is not None:
-                                if msg.content.lower().replace(' ','').startswith('rpghunt'):
-                                    user = msg.author
-                                    break
+                        user_command_message = await recent_commands.find_command(
+                            message.channel, lambda command: command.compact.startswith('rpghunt')
+                        )
+                        if user_command_message is not None: user = user_command_message.author
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in hunt message: {message_content}',
+                        f'User not found in hunt message: {snapshot.content}',
                         message
                     )
                     return
@@ -195,7 +186,7 @@ class HuntCog(commands.Cog):
                                                          message.channel.id, reminder_message)
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
-                partner_start = len(message_content)
+                partner_start = len(snapshot.content)
                 if user_settings.partner_id is not None:
                     partner: users.User = await users.get_user(user_settings.partner_id)
                     await self.bot.wait_until_ready()
@@ -215,18 +206,20 @@ class HuntCog(commands.Cog):
                             'GODLY present': emojis.PRESENT_GODLY,
                             'easter lootbox': emojis.EASTER_LOOTBOX,
                         }
-                        partner_loot_start = message_content.find(f'**{user_settings.partner_name}** got ')
+                        partner_loot_start = snapshot.content.find(f'**{user_settings.partner_name}** got ')
                         if partner_loot_start == -1:
-                            partner_loot_start = message_content.find(f'**{user_settings.partner_name}**:')
+                            partner_loot_start = snapshot.content.find(f'**{user_settings.partner_name}**:')
                         if partner_loot_start != -1:
                             partner_start = partner_loot_start
-                        lb_search_content = message_content[partner_start:]
+                        lb_search_content = snapshot.content[partner_start:]
                         lootbox_alert = ''
                         for lb_name, lb_emoji in lootboxes.items():
+                            if lb_name not in lb_search_content: continue
+                            lb_got_pattern, lb_plus_pattern = regex.PARTNER_LOOTBOXES[lb_name]
                             try:
-                                lb_search = re.search(f"\*\* got (.+?) (.+?) {re.escape(lb_name)}", lb_search_content)
+                                lb_search = lb_got_pattern.search(lb_search_content)
                                 if lb_search is None:
-                                    lb_search = re.search(f"\+(.+?) (.+?) {re.escape(lb_name)}", lb_search_content)
+                                    lb_search = lb_plus_pattern.search(lb_search_content)
                                 if lb_search is None:
                                     continue
                                 lb_amount = lb_search.group(1)
@@ -251,8 +244,8 @@ class HuntCog(commands.Cog):
                                 else:
                                     lb_message = f'{partner_discord.mention} {lootbox_alert}'
                                 await self.bot.wait_until_ready()
-                                await self.bot.get_channel(partner.partner_channel_id).send(lb_message)
-                                if user_settings.reactions_enabled: await message.add_reaction(emojis.PARTNER_ALERT)
+                                await outbox.send_message(self.bot.get_channel(partner.partner_channel_id), lb_message)
+                                if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.PARTNER_ALERT)
                             except Exception as error:
                                 await errors.log_error(
                                     f'Had the following error while trying to send the partner alert:\n{error}',
@@ -264,7 +257,7 @@ class HuntCog(commands.Cog):
                             f'{hm_message} **{partner_discord.name}** is currently **hardmoding**.\n'
                             f'If you want to hardmode too, please activate hardmode mode and hunt solo.'
                         )
-                        await message.channel.send(hm_message)
+                        await outbox.send_message(message.channel, hm_message)
                     elif not together and not partner.hardmode_mode_enabled:
                         partner_discord = self.bot.get_user(user_settings.partner_id)
                         hm_message = user.mention if not user_settings.dnd_mode_enabled else f'**{user.name}**,'
@@ -272,46 +265,46 @@ class HuntCog(commands.Cog):
                             f'{hm_message} **{partner_discord.name}** is not hardmoding, '
                             f'feel free to take them hunting.'
                         )
-                        await message.channel.send(hm_message)
+                        await outbox.send_message(message.channel, hm_message)
                 if user_settings.reactions_enabled:
                     found_stuff = {
                         'OMEGA lootbox': emojis.SURPRISE,
                         'GODLY lootbox': emojis.SURPRISE,
                     }
                     for stuff_name, stuff_emoji in found_stuff.items():
-                        if (stuff_name in message_content) and (message_content.rfind(stuff_name) < partner_start):
-                            await message.add_reaction(stuff_emoji)
+                        if (stuff_name in snapshot.content) and (snapshot.content.rfind(stuff_name) < partner_start):
+                            outbox.add_reaction(message, stuff_emoji)
                     # Add an F if the user died
-                    if ((message_content.find(f'**{user.name}** lost but ') > -1)
-                        or (message_content.find('but lost fighting') > -1)):
-                        await message.add_reaction(emojis.RIP)
+                    if ((snapshot.content.find(f'**{user.name}** lost but ') > -1)
+                        or (snapshot.content.find('but lost fighting') > -1)):
+                        outbox.add_reaction(message, emojis.RIP)
 
             # Hunt event
-            if ('pretends to be a zombie' in message_content.lower()
-                or 'fights the horde' in message_content.lower()
-                or 'thankfully, the horde did not notice' in message_content.lower()):
+            if ('pretends to be a zombie' in snapshot.content_lower
+                or 'fights the horde' in snapshot.content_lower
+                or 'thankfully, the horde did not notice' in snapshot.content_lower):
                 user_name = user_command = None
                 user = await functions.get_interaction_user(message)
                 if user is not None:
                     user_command = '/hunt'
                 else:
                     try:
-                        user_name = re.search("\*\*(.+?)\*\*", message_content).group(1)
+                        user_name = regex.NAME_BOLD.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await(
-                            f'User not found in hunt event message: {message_content}',
+                            f'User not found in hunt event message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in hunt event message: {message_content}',
+                        f'User not found in hunt event message: {snapshot.content}',
                         message
                     )
                     return
@@ -324,18 +317,15 @@ class HuntCog(commands.Cog):
                 if user_settings.tracking_enabled:
                     await tracking.insert_log_entry(user.id, message.guild.id, 'hunt', current_time)
                 if not user_settings.alert_hunt.enabled: return
-                message_history = await message.channel.history(limit=50).flatten()
                 if user_command is None:
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ') and 'hunt' in msg.content.lower()
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.content_lower.startswith('rpg ') and 'hunt' in command.content_lower,
+                        author=user
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the hunt event message.',
                             message
@@ -1,59 +1,54 @@
 # lootbox.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class BuyCog(commands.Cog):
     """Cog that contains the lootbox detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('lootbox', self.on_epic_rpg_message, strings.TRIGGERS_LOOTBOX)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('lootbox')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Lootbox cooldown
-            if 'you have already bought a lootbox' in message_title.lower():
+            if 'you have already bought a lootbox' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 user_command = 'rpg buy [lootbox]' if user is None else '/buy item: [lootbox]'
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in lootbox cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await(
                         f'User not found in lootbox cooldown message: {message.embeds[0].fields}',
                         message
@@ -64,7 +59,7 @@ class BuyCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.alert_lootbox.enabled: return
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_lootbox.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -74,26 +69,21 @@ class BuyCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
         if not message.embeds:
-            message_content = message.content
             # Buy lootbox
-            if ("lootbox` successfully bought for" in message_content.lower()
-                and not 'guild ring' in message_content.lower()
-                and not 'smol coin' in message_content.lower()):
+            if ("lootbox` successfully bought for" in snapshot.content_lower
+                and not 'guild ring' in snapshot.content_lower
+                and not 'smol coin' in snapshot.content_lower):
                 user = await functions.get_interaction_user(message)
                 user_command = 'rpg buy [lootbox]' if user is None else '/buy item: [lootbox]'
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().replace(' ','').startswith('rpgbuy')
-                                and ('lb' in msg.content.lower() or 'lootbox' in msg.content.lower())
-                                and not msg.author.bot):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: (command.compact.startswith('rpgbuy')
+                                         and ('lb' in command.content_lower or 'lootbox' in command.content_lower))
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the lootbox message.',
                             message
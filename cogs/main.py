@@ -7,7 +7,7 @@ import discord
 from discord.ext import commands
 from discord.ext.commands import errors
 
-from database import errors, guilds, users
+from database import cooldowns, errors, guilds, users
 from resources import emojis, exceptions, logs, settings
 
 
@@ -107,6 +107,7 @@ class MainCog(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         """Fires when bot has finished starting"""
+        await cooldowns.load_cooldowns()
         startup_info = f'{self.bot.user.name} has connected to Discord!'
         print(startup_info)
         logs.logger.info(startup_info)
@@ -1,28 +1,29 @@
 # nsmb-bigarena.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class NotSoMiniBossBigArenaCog(commands.Cog):
     """Cog that contains the not so mini boss and big arena detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('nsmb-bigarena', self.on_epic_rpg_message, strings.TRIGGERS_NSMB_BIGARENA)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('nsmb-bigarena')
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if message.embeds: return
-        message_content = message.content
-        if ('successfully registered for the next **big arena** event!' in message_content.lower()
-            or 'successfully registered for the next **minin\'tboss** event!' in message_content.lower()
-            or 'you are already registered!' in message_content.lower()):
+        if ('successfully registered for the next **big arena** event!' in snapshot.content_lower
+            or 'successfully registered for the next **minin\'tboss** event!' in snapshot.content_lower
+            or 'you are already registered!' in snapshot.content_lower):
             user_name = None
             user = await functions.get_interaction_user(message)
             slash_command = True if user is not None else False
@@ -31,22 +32,22 @@ class NotSoMiniBossBigArenaCog(commands.Cog):
                     user = message.mentions[0]
                 else:
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\*,", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START_COMMA.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in big-arena or minin\'tboss message: {message_content}',
+                            f'User not found in big-arena or minin\'tboss message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
             if user is None:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in big-arena or minin\'tboss message: {message_content}',
+                    f'User not found in big-arena or minin\'tboss message: {snapshot.content}',
                     message
 
                 )
@@ -61,18 +62,15 @@ class NotSoMiniBossBigArenaCog(commands.Cog):
                 user_command = '/big arena' if interaction.name == 'big' else '/minint'
                 user_command = f'{user_command} join: true'
             else:
-                message_history = await message.channel.history(limit=50).flatten()
-                user_command_message = None
-                for msg in message_history:
-                    if msg.content is not None:
-                        if ((msg.content.lower().startswith('rpg ')
-                            and 'big arena join' in msg.content.lower() or 'minintboss join' in msg.content.lower())
-                            and msg.author == user):
-                            user_command_message = msg
-                            break
+                user_command_message = await recent_commands.find_command(
+                    message.channel,
+                    lambda command: ((command.content_lower.startswith('rpg ') and 'big arena join' in command.content_lower)
+                                     or 'minintboss join' in command.content_lower),
+                    author=user
+                )
                 if user_command_message is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         'Couldn\'t find a command for the big-arena or minin\'tboss message.',
                         message
@@ -87,7 +85,7 @@ class NotSoMiniBossBigArenaCog(commands.Cog):
                 if not user_settings.alert_big_arena.enabled: return
                 event = 'big-arena'
                 reminder_message = user_settings.alert_big_arena.message.replace('{event}', event.replace('-',' '))
-            timestring = re.search("next event is in \*\*(.+?)\*\*", message_content).group(1)
+            timestring = regex.BIG_ARENA_TIMESTRING.search(snapshot.content).group(1)
             time_left = await functions.calculate_time_left_from_timestring(message, timestring)
             reminder: reminders.Reminder = (
                 await reminders.insert_user_reminder(user.id, event, time_left,
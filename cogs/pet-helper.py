@@ -1,34 +1,29 @@
 # pet-helper.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class PetHelperCog(commands.Cog):
     """Cog that contains the pets detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('pet-helper', self.on_epic_rpg_message, strings.TRIGGERS_PET_HELPER)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_field_name = message_field_value = message_author = ''
-            if embed.fields:
-                message_field_name = str(embed.fields[0].name)
-                message_field_value = str(embed.fields[0].value)
-                message_author = str(embed.author.name)
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('pet-helper')
 
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
+        if message.embeds:
             # Pet catch
-            if ('happiness' in message_field_value.lower() and 'hunger' in message_field_value.lower()
-                and 'suddenly' in message_field_name.lower()):
+            if ('happiness' in snapshot.field_value(0, lower=True) and 'hunger' in snapshot.field_value(0, lower=True)
+                and 'suddenly' in snapshot.field_name(0, lower=True)):
 
                 async def design_pet_catch_field(feeds: int, pats: int, slash: bool) -> str:
                     """Returns an embed field with the commands and the catch chance"""
@@ -56,7 +51,7 @@ class PetHelperCog(commands.Cog):
                     for x in range(0,pats):
                         commands = f'{commands} pat'
                     commands = f'`{commands.upper().strip()}`'
-                    hunger_emoji = emojis.PET_HUNGER_EASTER if 'bunny' in message_author else emojis.PET_HUNGER
+                    hunger_emoji = emojis.PET_HUNGER_EASTER if 'bunny' in snapshot.author else emojis.PET_HUNGER
                     actions = f'{emojis.PET_HAPPINESS} {pats} pats, {hunger_emoji} {feeds} feeds'
                     if pats + feeds < 6:
                         actions = f'{actions}, {emojis.PET_RANDOM} tame'
@@ -70,14 +65,14 @@ class PetHelperCog(commands.Cog):
                 slash_command = True if user is not None else False
                 if user is None:
                     try:
-                        user_name_search = re.search("APPROACHING \*\*(.+?)\*\*", message_field_name)
+                        user_name_search = regex.NAME_PET_CATCH.search(snapshot.field_name(0))
                         if user_name_search is None:
-                            user_name_search = re.search("^(.+?)'s bunny", message_author)
+                            user_name_search = regex.USER_NAME_BUNNY.search(snapshot.author)
                         user_name = user_name_search.group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in pet catch message for pet helper: {message.embeds[0].fields}',
                             message
@@ -86,7 +81,7 @@ class PetHelperCog(commands.Cog):
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in pet catch message for pet helper: {message.embeds[0].fields}',
                         message
@@ -98,19 +93,19 @@ class PetHelperCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.pet_helper_enabled: return
                 try:
-                    happiness_search = re.search("Happiness\*\*: (.+?)\\n", message_field_value)
+                    happiness_search = regex.PET_HAPPINESS.search(snapshot.field_value(0))
                     if happiness_search is None:
-                        happiness_search = re.search("Happiness: (.+?)\\n", message_field_value)
+                        happiness_search = regex.PET_HAPPINESS_PLAIN.search(snapshot.field_value(0))
                     happiness = happiness_search.group(1)
                     happiness = int(happiness)
-                    hunger_search = re.search("Hunger\*\*: (.+?)$", message_field_value)
+                    hunger_search = regex.PET_HUNGER.search(snapshot.field_value(0))
                     if hunger_search is None:
-                        hunger_search = re.search("Hunger: (.+?)$", message_field_value)
+                        hunger_search = regex.PET_HUNGER_PLAIN.search(snapshot.field_value(0))
                     hunger = hunger_search.group(1)
                     hunger = int(hunger)
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Happiness or hunger not found in pet catch message for pet helper: {message.embeds[0].fields}',
                         message
@@ -144,7 +139,7 @@ class PetHelperCog(commands.Cog):
                 high_skill_name = 'HIGHER CHANCE AT SKILL' if command_amount_low_risk < 6 else 'CHANCE AT SKILL'
                 embed.add_field(name='LOWEST RISK', value=field_low_risk, inline=False)
                 embed.add_field(name=high_skill_name, value=field_high_risk, inline=False)
-                await message.reply(embed=embed)
+                await outbox.reply(message, embed=embed)
 
 
 # Initialization
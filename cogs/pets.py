@@ -1,49 +1,71 @@
 # pets.py
 
+from collections import OrderedDict
 from datetime import datetime
-import re
+from typing import Set
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, logs, settings
+from resources import emojis, exceptions, functions, logs, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
+
+
+EDITED_MESSAGES_MAX = 1_000
+PAGES_PER_MESSAGE_MAX = 25
 
 
 class PetsCog(commands.Cog):
     """Cog that contains the pets detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        self.processed_pages: 'OrderedDict[int, Set[int]]' = OrderedDict()
+        router.register('pets', self.on_epic_rpg_message, strings.TRIGGERS_PETS)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('pets')
 
     @commands.Cog.listener()
     async def on_message_edit(self, message_before: discord.Message, message_after: discord.Message) -> None:
-        """Runs when a message is edited in a channel."""
-        await self.on_message(message_after)
+        """Runs when a message is edited in a channel.
+        Edits are skipped if their text was already processed, e.g. if only the buttons changed or if a page of the
+        pet list is shown again."""
+        if message_after.author.id != settings.EPIC_RPG_ID: return
+        snapshot = MessageSnapshot(message_after)
+        if 'pets' not in router.get_matches(snapshot): return
+        if snapshot.content_hash in self.processed_pages.get(message_after.id, ()): return
+        await self.on_epic_rpg_message(message_after, snapshot)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def remember_page(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Remembers the text of a message, so edits with the same text can be skipped"""
+        pages = self.processed_pages.get(message.id)
+        if pages is None:
+            pages = self.processed_pages[message.id] = set()
+            if len(self.processed_pages) > EDITED_MESSAGES_MAX: self.processed_pages.popitem(last=False)
+        else:
+            self.processed_pages.move_to_end(message.id)
+        if len(pages) < PAGES_PER_MESSAGE_MAX: pages.add(snapshot.content_hash)
+
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
+        self.remember_page(message, snapshot)
 
         if not message.embeds:
-            message_content = message.content
             # Single pet adventure
-            if ('your pet has started an adventure and will be back' in message_content.lower()
-                or 'pets have started an adventure!' in message_content.lower()):
+            if ('your pet has started an adventure and will be back' in snapshot.content_lower
+                or 'pets have started an adventure!' in snapshot.content_lower):
                 interaction = await functions.get_interaction(message)
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().replace(' ','').startswith('rpgpet') and ' adv' in msg.content.lower()
-                                and not msg.author.bot):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.compact.startswith('rpgpet') and ' adv' in command.content_lower
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for pet adventure message.',
                             message
@@ -64,15 +86,15 @@ class PetsCog(commands.Cog):
                         f'{emojis.BP} `rpg pets status`'
                     ) # Message split up like this because I'm unsure if I want to always send the first part
                     await user_settings.update(pet_tip_read=True)
-                    await message.reply(pet_message)
-                if 'for some completely unknown reason, the following pets are back instantly' in message_content.lower():
-                    if user_settings.reactions_enabled: await message.add_reaction(emojis.SKILL_TIME_TRAVELER)
-                if interaction is not None or 'pets have started an adventure!' in message_content.lower(): return
+                    await outbox.reply(message, pet_message)
+                if 'for some completely unknown reason, the following pets are back instantly' in snapshot.content_lower:
+                    if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.SKILL_TIME_TRAVELER)
+                if interaction is not None or 'pets have started an adventure!' in snapshot.content_lower: return
                 arguments = user_command_message.content.split()
                 pet_id = arguments[-1].upper()
                 if pet_id == 'EPIC': return
                 current_time = datetime.utcnow().replace(microsecond=0)
-                timestring = re.search("will be back in \*\*(.+?)\*\*", message_content).group(1)
+                timestring = regex.PET_BACK_TIMESTRING.search(snapshot.content).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_pets.message.replace('{id}', pet_id).replace('{emoji}','')
                 reminder: reminders.Reminder = (
@@ -81,24 +103,21 @@ class PetsCog(commands.Cog):
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
-            if 'pet adventure(s) cancelled' in message_content.lower():
+            if 'pet adventure(s) cancelled' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is not None:
-                    await message.reply(
+                    await outbox.reply(
+                        message,
                         f'**{user.name}**, please use `/pets list` to update your pet reminders.'
                     )
                     return
-                message_history = await message.channel.history(limit=50).flatten()
-                user_command_message = None
-                for msg in message_history:
-                    if msg.content is not None:
-                        if (msg.content.lower().replace(' ','').startswith('rpgpet') and ' cancel ' in msg.content.lower()
-                            and not msg.author.bot):
-                            user_command_message = msg
-                            break
+                user_command_message = await recent_commands.find_command(
+                    message.channel,
+                    lambda command: command.compact.startswith('rpgpet') and ' cancel ' in command.content_lower
+                )
                 if user_command_message is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         'Couldn\'t find a command for pet cancel message.',
                         message
@@ -116,7 +135,7 @@ class PetsCog(commands.Cog):
                     if arg not in ('rpg','pets','pet','adventure','adv','cancel'): pet_ids.append(arg.upper())
                 if not pet_ids:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         'Couldn\'t find a pet ID for pet cancel message.',
                         message
@@ -134,21 +153,19 @@ class PetsCog(commands.Cog):
                             f'{datetime.now()}: Had an error deleting the pet reminder with activity '
                             f'{activity}.'
                         )
-                if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
-            if 'it came back instantly!!' in message_content.lower():
+            if 'it came back instantly!!' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().replace(' ','').startswith('rpgpet') and ' adv' in msg.content.lower()
-                                and not msg.author.bot):
-                                user = msg.author
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.compact.startswith('rpgpet') and ' adv' in command.content_lower
+                    )
+                    if user_command_message is not None: user = user_command_message.author
                     if user is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a user for the pet time travel reaction.',
                             message
@@ -161,18 +178,13 @@ class PetsCog(commands.Cog):
                 if (not user_settings.bot_enabled or not user_settings.alert_pets.enabled
                     or not user_settings.reactions_enabled):
                     return
-                await message.add_reaction(emojis.SKILL_TIME_TRAVELER)
+                outbox.add_reaction(message, emojis.SKILL_TIME_TRAVELER)
 
         if message.embeds:
             embed: discord.Embed = message.embeds[0]
-            message_author = message_description = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.description: message_description = str(embed.description)
 
             # Pet list
-            if 'pets can collect items and coins, more information' in message_description.lower():
+            if 'pets can collect items and coins, more information' in snapshot.description_lower:
                 pet_names_emojis = {
                     'cat': emojis.PET_CAT,
                     'dog': emojis.PET_DOG,
@@ -189,28 +201,28 @@ class PetsCog(commands.Cog):
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s pets", message_author).group(1)
+                            user_name = regex.USER_NAME_PETS.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
-                                f'User not found in pet list message: {message_author}',
+                                f'User not found in pet list message: {snapshot.author}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in pet list message: {message_author}',
+                        f'User not found in pet list message: {snapshot.author}',
                         message
                     )
                     return
@@ -225,13 +237,13 @@ class PetsCog(commands.Cog):
                 time_elapsed = current_time - bot_answer_time
                 for field in embed.fields:
                     try:
-                        pet_id_search = re.search('`ID: (.+?)`', field.name)
+                        pet_id_search = regex.PET_ID.search(field.name)
                         pet_emoji = ''
                         for pet, emoji in pet_names_emojis.items():
                             if pet in field.name.lower():
                                 pet_emoji = emoji
                                 break
-                        pet_action_timestring_search = re.search('Status__:\*\* (.+?) \| \*\*(.+?)\*\*', field.value)
+                        pet_action_timestring_search = regex.PET_STATUS.search(field.value)
                         if pet_id_search is None: continue
                         pet_id = pet_id_search.group(1)
                         if pet_action_timestring_search is None:
@@ -248,7 +260,7 @@ class PetsCog(commands.Cog):
                         time_left = time_left - time_elapsed
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'Pet id, action or timestring not found in pet list field: {field.value}',
                             message
@@ -261,7 +273,7 @@ class PetsCog(commands.Cog):
                         await reminders.insert_user_reminder(user.id, f'pets-{pet_id}', time_left,
                                                              message.channel.id, reminder_message)
                     )
-                if reminder_created and user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                if reminder_created and user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
 # Initialization
 def setup(bot):
@@ -1,62 +1,55 @@
 # quest.py
 
 from datetime import datetime, timedelta
-import re
 
 import discord
 from discord.ext import commands
 
 from database import cooldowns, clans, errors, reminders, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class QuestCog(commands.Cog):
     """Cog that contains the quest detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('quest', self.on_epic_rpg_message, strings.TRIGGERS_QUEST)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('quest')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = message_description = icon_url = field_value = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.fields:
-                field_value = embed.fields[0].value
-            if embed.title: message_title = str(embed.title)
-            if embed.description: message_description = embed.description
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Guild quest check
-            if 'do a guild raid' in field_value.lower() and 'are you looking for a quest' in message_description.lower():
+            if 'do a guild raid' in snapshot.field_value(0, lower=True) and 'are you looking for a quest' in snapshot.description_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s quest", message_author).group(1)
+                            user_name = regex.USER_NAME_QUEST.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in guild quest message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in guild quest message: {message.embeds[0].fields}',
                         message
@@ -73,20 +66,23 @@ class QuestCog(commands.Cog):
                 if not user_settings.bot_enabled or not user_settings.alert_quest.enabled: return
                 if not clan.alert_enabled: return
                 if clan.stealth_current < clan.stealth_threshold and not clan.upgrade_quests_enabled:
-                    await message.reply(
+                    await outbox.reply(
+                        message,
                         f'{emojis.ERROR} Guild quest spot not available.\n'
                         f'Your guild doesn\'t allow doing guild quests below the '
                         f'stealth threshold ({clan.stealth_threshold}).'
                     )
                     return
                 if clan.quest_user_id is not None:
-                    await message.reply(
+                    await outbox.reply(
+                        message,
                         f'{emojis.ERROR} Guild quest spot not available.\n'
                         f'Another guild member is already doing a guild quest.'
                     )
                     return
                 await user_settings.update(guild_quest_prompt_active=True)
-                await message.reply(
+                await outbox.reply(
+                    message,
                     f'{emojis.CHECK} Guild quest spot available.\n'
                     f'If you accept this quest, the next guild reminder will ping you solo first. '
                     f'You will have 5 minutes to raid before the other members are pinged.\n'
@@ -94,32 +90,32 @@ class QuestCog(commands.Cog):
                 )
 
             # Quest cooldown
-            if 'you have already claimed a quest' in message_title.lower():
+            if 'you have already claimed a quest' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in quest cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in quest cooldown message: {message.embeds[0].fields}',
                         message
@@ -134,26 +130,21 @@ class QuestCog(commands.Cog):
                     interaction = await functions.get_interaction(message)
                     user_command = '/quest start' if interaction.name == 'quest' else '/epic quest'
                 else:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            msg_content = msg.content.lower()
-                            if ((msg_content.replace(' ','').startswith('rpgquest')
-                                 or msg_content.replace(' ','').startswith('rpgepicquest'))
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: command.compact.startswith(('rpgquest', 'rpgepicquest')),
+                        author=user
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the quest cooldown message.',
                             message
                         )
                         return
                     user_command = user_command_message.content.lower()
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_quest.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -163,31 +154,31 @@ class QuestCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
             # Quest in void areas
-            if 'i don\'t think i can give you any quest here' in message_description.lower():
+            if 'i don\'t think i can give you any quest here' in snapshot.description_lower:
                 user = await functions.get_interaction_user(message)
                 user_command = 'rpg quest' if user is None else '/quest start'
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s quest", message_author).group(1)
+                            user_name = regex.USER_NAME_QUEST.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in void quest message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in void quest message: {message.embeds[0].fields}',
                         message
@@ -207,27 +198,27 @@ class QuestCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
             # Epic Quest
-            if '__wave #1__' in message_description.lower():
+            if '__wave #1__' in snapshot.description_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 user_command = 'rpg epic quest' if user is None else '/epic quest'
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s epic quest", message_author).group(1)
+                            user_name = regex.USER_NAME_EPIC_QUEST.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in epic quest message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         for member in message.guild.members:
                             member_name = await functions.encode_text(member.name)
@@ -236,7 +227,7 @@ class QuestCog(commands.Cog):
                                 break
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in epic quest message: {message.embeds[0].fields}',
                         message
@@ -265,15 +256,14 @@ class QuestCog(commands.Cog):
                                                          message.channel.id, reminder_message)
                 )
                 if reminder.record_exists:
-                    if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                    if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
 
         if not message.embeds:
-            message_content = message.content
             # Quest
-            if ('you did not accept the quest' in message_content.lower()
-                or 'got a **new quest**!' in message_content.lower()):
+            if ('you did not accept the quest' in snapshot.content_lower
+                or 'got a **new quest**!' in snapshot.content_lower):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 user_command = '/quest start' if user is not None else 'rpg quest'
@@ -282,13 +272,13 @@ class QuestCog(commands.Cog):
                         user = message.mentions[0]
                     else:
                         try:
-                            user_name = re.search("^\*\*(.+?)\*\* ", message_content).group(1)
+                            user_name = regex.NAME_BOLD_START_SPACE.search(snapshot.content).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
-                                f'User not found in quest message: {message_content}',
+                                f'User not found in quest message: {snapshot.content}',
                                 message
                             )
                             return
@@ -299,9 +289,9 @@ class QuestCog(commands.Cog):
                                 break
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in quest message: {message_content}',
+                        f'User not found in quest message: {snapshot.content}',
                         message
                     )
                     return
@@ -340,12 +330,12 @@ class QuestCog(commands.Cog):
                             pass
                     await user_settings.update(guild_quest_prompt_active=False)
                 if reminder.record_exists:
-                    if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                    if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
                 else:
-                    if settings.DEBUG_MODE: await message.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message.channel, strings.MSG_ERROR)
 
             # Aborted guild quest
-            if 'you don\'t have a quest anymore' in message_content.lower() and message.mentions:
+            if 'you don\'t have a quest anymore' in snapshot.content_lower and message.mentions:
                 user = message.mentions[0]
                 try:
                     user_settings: users.User = await users.get_user(user.id)
@@ -358,7 +348,7 @@ class QuestCog(commands.Cog):
                 if clan.quest_user_id is not None:
                     if clan.quest_user_id == user.id:
                         await clan.update(quest_user_id=None)
-                        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+                        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
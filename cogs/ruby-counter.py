@@ -1,46 +1,39 @@
 # ruby_counter.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class RubyCounterCog(commands.Cog):
     """Cog that contains all commands related to the ruby counter"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('ruby-counter', self.on_epic_rpg_message, strings.TRIGGERS_RUBY_COUNTER)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('ruby-counter')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_description = message_field = message_author = ''
-            if embed.description: message_description = str(embed.description)
-            if embed.fields: message_field = str(embed.fields[0].value)
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Rubies from trades E and F
-            if 'our trade is done then' in message_description.lower() and '<:ruby' in message_field.lower():
+            if 'our trade is done then' in snapshot.description_lower and '<:ruby' in snapshot.field_value(0, lower=True):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        search_string = "\*\*(.+?)\*\*"
-                        user_name = re.search(search_string, message_field).group(1)
-                        if user_name == 'EPIC NPC': user_name = re.search(search_string, message_field).group(2)
+                        user_name = regex.NAME_BOLD.search(snapshot.field_value(0)).group(1)
+                        if user_name == 'EPIC NPC': user_name = regex.NAME_BOLD.search(snapshot.field_value(0)).group(2)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in trade message for ruby counter: {message.embeds[0].fields}',
                             message
@@ -49,7 +42,7 @@ class RubyCounterCog(commands.Cog):
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in trade message for ruby counter: {message.embeds[0].fields}',
                         message
@@ -60,16 +53,16 @@ class RubyCounterCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
-                epic_npc_pos = message_field.find('**EPIC NPC**')
-                ruby_pos = message_field.find('<:ruby')
+                epic_npc_pos = snapshot.field_value(0).find('**EPIC NPC**')
+                ruby_pos = snapshot.field_value(0).find('<:ruby')
                 trade_type = 'F' if ruby_pos > epic_npc_pos else 'E'
-                search_string = "603304907650629653> x(.+?) \\n"  if trade_type == 'E' else "603304907650629653> x(.+?)$"
+                trade_pattern = regex.RUBIES_TRADE_E if trade_type == 'E' else regex.RUBIES_TRADE_F
                 try:
-                    ruby_count = re.search(search_string, message_field).group(1)
+                    ruby_count = trade_pattern.search(snapshot.field_value(0)).group(1)
                     ruby_count = int(ruby_count.replace(',',''))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Ruby count not found in trade message for ruby counter: {message.embeds[0].fields}',
                         message
@@ -80,34 +73,34 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from lootboxes
-            if "'s lootbox" in message_author.lower() and '<:ruby' in message_field.lower():
+            if "'s lootbox" in snapshot.author_lower and '<:ruby' in snapshot.field_value(0, lower=True):
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s lootbox", message_author).group(1)
+                            user_name = regex.USER_NAME_LOOTBOX.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in lootbox message for ruby counter: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in lootbox message for ruby counter: {message.embeds[0].fields}',
                         message
@@ -119,13 +112,13 @@ class RubyCounterCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
                 try:
-                    ruby_pos = message_field.find('<:ruby')
-                    number_start_pos = message_field.rfind('+', 0, ruby_pos)
-                    ruby_count = re.search('\+(.+?) <:ruby', message_field[number_start_pos:]).group(1)
+                    ruby_pos = snapshot.field_value(0).find('<:ruby')
+                    number_start_pos = snapshot.field_value(0).rfind('+', 0, ruby_pos)
+                    ruby_count = regex.RUBIES_LOOTBOX.search(snapshot.field_value(0)[number_start_pos:]).group(1)
                     ruby_count = int(ruby_count.replace(',',''))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'Ruby count not found in lootbox message for ruby counter: {message.embeds[0].fields}',
                         message
@@ -135,34 +128,34 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from inventory
-            if "'s inventory" in message_author.lower():
+            if "'s inventory" in snapshot.author_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s inventory", message_author).group(1)
+                            user_name = regex.USER_NAME_INVENTORY.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in inventory message for ruby counter: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in inventory message for ruby counter: {message.embeds[0].fields}',
                         message
@@ -173,19 +166,19 @@ class RubyCounterCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
-                if  '<:ruby' not in message_field.lower():
+                if  '<:ruby' not in snapshot.field_value(0, lower=True):
                     ruby_count = 0
                 else:
                     try:
-                        ruby_count = re.search("ruby\*\*: (.+?)\\n", message_field).group(1)
+                        ruby_count = regex.RUBIES_INVENTORY.search(snapshot.field_value(0)).group(1)
                         ruby_count = int(ruby_count.replace(',',''))
                     except:
                         try:
-                            ruby_count = re.search("ruby\*\*: (.+?)$", message_field).group(1)
+                            ruby_count = regex.RUBIES_INVENTORY_LAST.search(snapshot.field_value(0)).group(1)
                             ruby_count = int(ruby_count.replace(',',''))
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'Ruby count not found in inventory message for ruby counter: {message.embeds[0].fields}',
                                 message
@@ -193,32 +186,31 @@ class RubyCounterCog(commands.Cog):
                             return
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
         if not message.embeds:
-            message_content = message.content
             # Ruby training helper
-            if '** is training in the mine!' in message_content.lower():
+            if '** is training in the mine!' in snapshot.content_lower:
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\* ", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START_SPACE.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in ruby training helper message for ruby counter: {message_content}',
+                            f'User not found in ruby training helper message for ruby counter: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in ruby training helper message for ruby counter: {message_content}',
+                        f'User not found in ruby training helper message for ruby counter: {snapshot.content}',
                         message
                     )
                     return
@@ -228,33 +220,29 @@ class RubyCounterCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
                 try:
-                    ruby_count = re.search('more than (.+?) <:ruby', message_content).group(1)
+                    ruby_count = regex.RUBIES_MORE_THAN.search(snapshot.content).group(1)
                     ruby_count = int(ruby_count.replace(',',''))
                 except Exception as error:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'Ruby count not found in ruby training helper message for ruby counter: {message_content}',
+                        f'Ruby count not found in ruby training helper message for ruby counter: {snapshot.content}',
                         message
                     )
                     return
                 answer = 'YES' if user_settings.rubies > ruby_count else 'NO'
-                await message.reply(f'`{answer}` (you have {user_settings.rubies:,} {emojis.RUBY})')
+                await outbox.reply(message, f'`{answer}` (you have {user_settings.rubies:,} {emojis.RUBY})')
 
             # Rubies from selling
-            if '`ruby` successfully sold' in message_content.lower():
+            if '`ruby` successfully sold' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgsellruby') and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgsellruby')
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the ruby sell message.',
                             message
@@ -267,13 +255,13 @@ class RubyCounterCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
                 try:
-                    ruby_count = re.search('^(.+?) <:ruby', message_content, re.IGNORECASE).group(1)
+                    ruby_count = regex.RUBIES_START.search(snapshot.content).group(1)
                     ruby_count = int(ruby_count.replace(',',''))
                 except:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'Ruby count not found in sell message for ruby counter: {message_content}',
+                        f'Ruby count not found in sell message for ruby counter: {snapshot.content}',
                         message
                     )
                     return
@@ -281,30 +269,30 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from work commands
-            if '** got ' in message_content.lower() and '<:ruby' in message_content.lower():
+            if '** got ' in snapshot.content_lower and '<:ruby' in snapshot.content_lower:
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_name = re.search("\*\*(.+?)\*\* got", message_content, re.IGNORECASE).group(1)
+                        user_name = regex.NAME_GOT.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in work message for ruby counter: {message_content}',
+                            f'User not found in work message for ruby counter: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in work message for ruby counter: {message_content}',
+                        f'User not found in work message for ruby counter: {snapshot.content}',
                         message
                     )
                     return
@@ -314,17 +302,17 @@ class RubyCounterCog(commands.Cog):
                     return
                 if not user_settings.bot_enabled or not user_settings.ruby_counter_enabled: return
                 try:
-                    ruby_count = re.search('\*\* got (.+?) <:ruby', message_content, re.IGNORECASE).group(1)
+                    ruby_count = regex.RUBIES_GOT.search(snapshot.content).group(1)
                     ruby_count = int(ruby_count.replace(',',''))
                 except Exception as error:
                     try:
-                        ruby_count = re.search(' had (.+?) <:ruby', message_content).group(1)
+                        ruby_count = regex.RUBIES_HAD.search(snapshot.content).group(1)
                         ruby_count = int(ruby_count.replace(',',''))
                     except:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'Ruby count not found in work message for ruby counter: {message_content}',
+                            f'Ruby count not found in work message for ruby counter: {snapshot.content}',
                             message
                         )
                         return
@@ -333,19 +321,15 @@ class RubyCounterCog(commands.Cog):
                 await user_settings.update(rubies=ruby_count)
 
             # Rubies from crafting ruby sword
-            if '`ruby sword` successfully crafted' in message_content.lower():
+            if '`ruby sword` successfully crafted' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgcraftrubysword') and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgcraftrubysword')
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the ruby sword crafting message.',
                             message
@@ -361,22 +345,18 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from crafting ruby armor
-            if '`ruby armor` successfully crafted' in message_content.lower():
+            if '`ruby armor` successfully crafted' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgcraftrubyarmor') and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgcraftrubyarmor')
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the ruby armor crafting message.',
                             message
@@ -392,22 +372,18 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from crafting coin sword
-            if '`coin sword` successfully crafted' in message_content.lower():
+            if '`coin sword` successfully crafted' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgcraftcoinsword') and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgcraftcoinsword')
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the coin sword crafting message.',
                             message
@@ -423,22 +399,18 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
             # Rubies from crafting ultra-edgy armor
-            if '`ultra-edgy armor` successfully forged' in message_content.lower():
+            if '`ultra-edgy armor` successfully forged' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if msg.content.lower().replace(' ','').startswith('rpgforgeultra-edgyarmor') and not msg.author.bot:
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel, lambda command: command.compact.startswith('rpgforgeultra-edgyarmor')
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the ultra-edgy armor crafting message.',
                             message
@@ -454,7 +426,7 @@ class RubyCounterCog(commands.Cog):
                 if ruby_count < 0: ruby_count == 0
                 await user_settings.update(rubies=ruby_count)
                 if user_settings.rubies == ruby_count and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                    outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
@@ -7,7 +7,7 @@ import discord
 from discord.ext import commands
 
 from database import clans, reminders, users
-from resources import emojis, exceptions, settings, strings
+from resources import emojis, exceptions, outbox, settings, strings
 
 
 class SettingsClanCog(commands.Cog):
@@ -423,7 +423,8 @@ class SettingsClanCog(commands.Cog):
                             await clan.delete()
                             await self.bot.wait_until_ready()
                             leader = self.bot.get_user(clan.leader_id)
-                            await message_after.channel.send(
+                            await outbox.send_message(
+                                message_after.channel,
                                 f'{leader.mention} Found two guilds with unmatching members with you as a leader which '
                                 f'is an invalid state I can\'t resolve.\n'
                                 f'As a consequence I deleted the guild **{clan.clan_name}** including **all settings and '
@@ -439,7 +440,7 @@ class SettingsClanCog(commands.Cog):
                 except exceptions.NoDataFoundError:
                     clan: clans.Clan = await clans.insert_clan(clan_name, clan_leader_id, clan_member_ids)
                 if not clan.record_exists or clan.leader_id != clan_leader_id or clan.member_ids != tuple(clan_member_ids):
-                    if settings.DEBUG_MODE: await message_after.channel.send(strings.MSG_ERROR)
+                    if settings.DEBUG_MODE: await outbox.send_message(message_after.channel, strings.MSG_ERROR)
                     return
                 for member_id in clan.member_ids:
                     try:
@@ -457,14 +458,16 @@ class SettingsClanCog(commands.Cog):
                                 old_member_ids = sorted(old_member_ids, key=lambda id: (id is None, id))
                                 if old_leader_id is None and all(id is None for id in old_member_ids):
                                     await old_clan.delete()
-                                    await message_after.channel.send(
+                                    await outbox.send_message(
+                                        message_after.channel,
                                         f'Removed the guild **{old_clan.clan_name}** because it doesn\'t have any '
                                         f'registered members anymore.'
                                     )
                                 else:
                                     await old_clan.update(leader_id=old_leader_id, member_ids=old_member_ids)
                                     if old_leader_id is None:
-                                        await message_after.channel.send(
+                                        await outbox.send_message(
+                                            message_after.channel,
                                             f'Note that the guild **{old_clan.clan_name}** doesn\'t have a leader '
                                             f'registered anymore. Please tell one of the remaining members to use '
                                             f'`rpg guild list` to update it.'
@@ -473,14 +476,14 @@ class SettingsClanCog(commands.Cog):
                                 pass
                         await user.update(clan_name=clan.clan_name)
                         if user.clan_name != clan.clan_name:
-                            await message_after.channel.send(strings.MSG_ERROR)
+                            await outbox.send_message(message_after.channel, strings.MSG_ERROR)
                             return
                     except exceptions.FirstTimeUserError:
                         pass
                 users_with_clan_name = await users.get_users_by_clan_name(clan_name)
                 for user in users_with_clan_name:
                     if not user.user_id in clan_member_ids: await user.update(clan_name=None)
-                await message_after.add_reaction(emojis.NAVI)
+                outbox.add_reaction(message_after, emojis.NAVI)
 
 
 # Initialization
@@ -1,46 +1,48 @@
 # sleepy-potion.py
 
 from datetime import timedelta
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class SleepyPotionCog(commands.Cog):
     """Cog that contains the sleepy potion detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('sleepy-potion', self.on_epic_rpg_message, strings.TRIGGERS_SLEEPY_POTION)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('sleepy-potion')
+
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if message.embeds: return
-        message_content = message.content
         # Sleepy Potion
-        if 'has slept for a day' in message_content.lower():
+        if 'has slept for a day' in snapshot.content_lower:
             user_name = user = None
             try:
-                user_name = re.search("^\*\*(.+?)\*\* drinks", message_content).group(1)
+                user_name = regex.NAME_DRINKS.search(snapshot.content).group(1)
                 user_name = await functions.encode_text(user_name)
             except Exception as error:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in sleepy potion message: {message_content}',
+                    f'User not found in sleepy potion message: {snapshot.content}',
                     message
                 )
                 return
             user = await functions.get_guild_member_by_name(message.guild, user_name)
             if user is None:
                 if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                    await message.add_reaction(emojis.WARNING)
+                    outbox.add_reaction(message, emojis.WARNING)
                 await errors.log_error(
-                    f'User not found in sleepy potion message: {message_content}',
+                    f'User not found in sleepy potion message: {snapshot.content}',
                     message
                 )
                 return
@@ -50,7 +52,7 @@ class SleepyPotionCog(commands.Cog):
                 return
             if not user_settings.bot_enabled: return
             await reminders.reduce_reminder_time(user.id, timedelta(days=1))
-            if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+            if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
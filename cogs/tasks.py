@@ -2,39 +2,52 @@
 """Contains task related stuff"""
 
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List
+import sqlite3
+from typing import List, Optional
 
 import discord
 from discord.ext import commands, tasks
 
-from database import clans, errors, reminders, users
-from resources import emojis, exceptions, functions, settings, strings
+from database import clans, errors, reminders, tracking, users
+from resources import emojis, exceptions, functions, outbox, settings, strings
 
 
-running_tasks = {}
+DELIVERY_WORKERS = 4
+
+
+# Containers
+@dataclass()
+class DeliveryStats():
+    """Object that summarizes the reminder deliveries since startup. The lateness of the sent messages is in
+    outbox.stats."""
+    groups: int = 0
+    queue_depth_max: int = 0
 
 
 class TasksCog(commands.Cog):
     """Cog with tasks"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.due_reminders: Optional[asyncio.Queue] = None
+        self.delivery_workers: List[asyncio.Task] = []
+        self.delivery_stats = DeliveryStats()
 
-    # Task management
-    async def background_task(self, reminders_list: List[reminders.Reminder]) -> None:
-        """Background task for scheduling reminders"""
-        first_reminder = reminders_list[0]
-        current_time = datetime.utcnow().replace(microsecond=0)
-        def get_time_left() -> timedelta:
-            time_left = first_reminder.end_time - current_time
-            if time_left.total_seconds() < 0: time_left = timedelta(seconds=0)
-            return time_left
+    def cog_unload(self) -> None:
+        """Stops the dispatcher and the delivery workers"""
+        self.dispatch_reminders.cancel()
+        for worker in self.delivery_workers:
+            worker.cancel()
 
+    # Reminder delivery
+    async def send_reminders(self, reminders_list: List[reminders.Reminder]) -> None:
+        """Sends a group of due reminders"""
+        first_reminder = reminders_list[0]
         try:
             await self.bot.wait_until_ready()
             channel = self.bot.get_channel(first_reminder.channel_id)
             if first_reminder.reminder_type == 'user':
-                await self.bot.wait_until_ready()
                 user = self.bot.get_user(first_reminder.user_id)
                 user_settings = await users.get_user(user.id)
                 message_no = 1
@@ -74,19 +87,12 @@ class TasksCog(commands.Cog):
                             f'{messages[message_no]}'
                             f'➜ {pets_left} left. Next pet (`{next_pet_id}`) will return in **{timestring}**.'
                         )
-                time_left = get_time_left()
-                try:
-                    await asyncio.sleep(time_left.total_seconds())
-                    allowed_mentions = discord.AllowedMentions(users=[user,])
-                    for message in messages.values():
-                        await channel.send(message.strip(), allowed_mentions=allowed_mentions)
-                except asyncio.CancelledError:
-                    return
+                for message in messages.values():
+                    outbox.send_reminder(channel, message.strip(), first_reminder.end_time, (user,))
 
             if first_reminder.reminder_type == 'clan':
                 clan = await clans.get_clan_by_clan_name(first_reminder.clan_name)
                 if clan.quest_user_id is not None:
-                    await self.bot.wait_until_ready()
                     quest_user = self.bot.get_user(clan.quest_user_id)
                     if quest_user is None:
                         await errors.log_error(
@@ -101,68 +107,68 @@ class TasksCog(commands.Cog):
                             alert_message = f'{alert_message_prefix}guild raid'
                         else:
                             alert_message = f'{alert_message_prefix}guild upgrade'
-                        time_left = get_time_left()
-                        try:
-                            await asyncio.sleep(time_left.total_seconds())
-                            await channel.send(
-                                f'{quest_user.mention} Hey! It\'s time for your raid quest. '
-                                f'You have 5 minutes, chop chop.'
-                            )
-                            reminder: reminders.Reminder = (
-                                await reminders.insert_clan_reminder(clan.clan_name, time_left_all_members,
-                                                                    clan.channel_id, alert_message)
-                            )
-                        except asyncio.CancelledError:
-                            return
+                        await outbox.send_reminder_message(
+                            channel,
+                            f'{quest_user.mention} Hey! It\'s time for your raid quest. '
+                            f'You have 5 minutes, chop chop.',
+                            allowed_mentions=discord.AllowedMentions(users=[quest_user]),
+                            end_time=first_reminder.end_time
+                        )
+                        await reminders.insert_clan_reminder(clan.clan_name, time_left_all_members,
+                                                             clan.channel_id, alert_message)
                 message_mentions = ''
+                members = []
                 for member_id in clan.member_ids:
                     if member_id is not None:
-                        await self.bot.wait_until_ready()
                         member = self.bot.get_user(member_id)
                         if member is not None:
                             message_mentions = f'{message_mentions}{member.mention} '
-                time_left = get_time_left()
-                try:
-                    await asyncio.sleep(time_left.total_seconds())
-                    embed = discord.Embed(title=first_reminder.message)
-                    await channel.send(f'{message_mentions}\nIt\'s time for:', embed=embed)
-                except asyncio.CancelledError:
-                    return
-            running_tasks.pop(first_reminder.task_name, None)
+                            members.append(member)
+                embed = discord.Embed(title=first_reminder.message)
+                await outbox.send_reminder_message(
+                    channel, f'{message_mentions}\nIt\'s time for:', embed=embed,
+                    allowed_mentions=discord.AllowedMentions(users=members), end_time=first_reminder.end_time
+                )
         except Exception as error:
             await errors.log_error(error)
 
-    async def create_task(self, reminders_list: List[reminders.Reminder]) -> None:
-        """Creates a new background task"""
-        await self.delete_task(reminders_list[0].task_name)
-        task = self.bot.loop.create_task(self.background_task(reminders_list))
-        running_tasks[reminders_list[0].task_name] = task
-
-    async def delete_task(self, task_name: str) -> None:
-        """Stops and deletes a running task if it exists"""
-        if task_name in running_tasks:
-            running_tasks[task_name].cancel()
-            running_tasks.pop(task_name, None)
-        return
+    async def deliver_reminders(self) -> None:
+        """Delivery worker. Sends the due reminder groups from the queue one after the other."""
+        while True:
+            reminders_list = await self.due_reminders.get()
+            try:
+                await self.send_reminders(reminders_list)
+                self.delivery_stats.groups += 1
+            finally:
+                self.due_reminders.task_done()
 
     # Events
     @commands.Cog.listener()
     async def on_ready(self) -> None:
         """Fires when bot has finished starting"""
-        reminders.schedule_reminders.start()
+        try:
+            await reminders.load_reminders()
+        except (sqlite3.Error, LookupError):
+            pass # Already logged
+        if not self.delivery_workers:
+            self.due_reminders = asyncio.Queue()
+            self.delivery_workers = [
+                self.bot.loop.create_task(self.deliver_reminders()) for _ in range(DELIVERY_WORKERS)
+            ]
         self.delete_old_reminders.start()
         self.reset_clans.start()
-        self.schedule_tasks.start()
+        self.dispatch_reminders.start()
+        self.compact_tracking_log.start()
 
     # Tasks
-    @tasks.loop(seconds=0.5)
-    async def schedule_tasks(self):
-        """Task that creates or deletes tasks from scheduled reminders.
-        Reminders that fire at the same second for the same user in the same channel are combined into one task.
+    @tasks.loop()
+    async def dispatch_reminders(self) -> None:
+        """Task that waits until the next reminders are due and queues them for the delivery workers.
+        Reminders that fire at the same second for the same user in the same channel are combined into one group.
         """
+        reminder_groups = []
         user_reminders = {}
-        for reminder in reminders.scheduled_for_tasks.copy().values():
-            reminders.scheduled_for_tasks.pop(reminder.task_name, None)
+        for reminder in await reminders.get_due_reminders():
             if reminder.reminder_type == 'user':
                 reminder_user_channel = f'{reminder.user_id}-{reminder.channel_id}-{reminder.end_time}'
                 if reminder_user_channel in user_reminders:
@@ -170,21 +176,20 @@ class TasksCog(commands.Cog):
                 else:
                     user_reminders[reminder_user_channel] = [reminder,]
             else:
-                await self.create_task([reminder,])
-        for reminder in reminders.scheduled_for_deletion.copy().values():
-            reminders.scheduled_for_deletion.pop(reminder.task_name, None)
-            await self.delete_task(reminder.task_name)
-        if user_reminders:
-            for reminders_list in user_reminders.values():
-                reminders_list.sort(key=lambda reminder: reminder.activity)
-                pet_reminders = []
-                other_reminders = []
-                for reminder in reminders_list:
-                    if reminder.activity.startswith('pets'):
-                        pet_reminders.append(reminder)
-                    else:
-                        other_reminders.append(reminder)
-                await self.create_task(other_reminders + pet_reminders)
+                reminder_groups.append([reminder,])
+        for reminders_list in user_reminders.values():
+            reminders_list.sort(key=lambda reminder: reminder.activity)
+            pet_reminders = []
+            other_reminders = []
+            for reminder in reminders_list:
+                if reminder.activity.startswith('pets'):
+                    pet_reminders.append(reminder)
+                else:
+                    other_reminders.append(reminder)
+            reminder_groups.append(other_reminders + pet_reminders)
+        for reminders_list in reminder_groups:
+            self.due_reminders.put_nowait(reminders_list)
+        self.delivery_stats.queue_depth_max = max(self.due_reminders.qsize(), self.delivery_stats.queue_depth_max)
 
     @tasks.loop(minutes=2.0)
     async def delete_old_reminders(self) -> None:
@@ -207,6 +212,14 @@ class TasksCog(commands.Cog):
                     f'Error deleting old reminder.\nFunction: delete_old_reminders\nReminder: {reminder}\nError: {error}'
             )
 
+    @tasks.loop(hours=1.0)
+    async def compact_tracking_log(self) -> None:
+        """Task that rolls old tracking log buckets into bigger ones"""
+        try:
+            await tracking.compact_log_entries()
+        except sqlite3.Error:
+            pass # Already logged
+
     @tasks.loop(minutes=1.0)
     async def reset_clans(self) -> None:
         """Task that creates the weekly reports and resets the clans"""
@@ -262,7 +275,7 @@ class TasksCog(commands.Cog):
                     )
                 await self.bot.wait_until_ready()
                 clan_channel = self.bot.get_channel(clan.channel_id)
-                await clan_channel.send(message)
+                await outbox.send_reminder_message(clan_channel, message)
             # Delete leaderboard
             await clans.delete_clan_leaderboard()
 
@@ -2,19 +2,24 @@
 """Contains commands related to command tracking"""
 
 from datetime import datetime, timedelta
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, users, tracking
-from resources import emojis, functions, exceptions, settings, strings
+from resources import emojis, exceptions, functions, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class TrackingCog(commands.Cog):
     """Cog with command tracking commands"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        router.register('tracking', self.on_epic_rpg_message, strings.TRIGGERS_TRACKING)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('tracking')
 
     @commands.cooldown(1, 5, commands.BucketType.user)
     @commands.command(aliases=('statistics','statistic','stat'))
@@ -78,61 +83,54 @@ class TrackingCog(commands.Cog):
         await ctx.reply(embed=embed)
 
     # Events
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Fires when a message is sent"""
-        if message.author.id == settings.EPIC_RPG_ID:
-            if not message.embeds:
-                message_content = message.content
-                # Epic Guard
-                if 'we have to check you are actually playing' in message_content.lower():
-                    user = await functions.get_interaction_user(message)
-                    if user is None:
-                        if message.mentions:
-                            user = message.mentions[0]
-                        else:
-                            return
-                    try:
-                        user_settings: users.User = await users.get_user(user.id)
-                    except exceptions.FirstTimeUserError:
-                        return
-                    if user_settings.tracking_enabled and user_settings.bot_enabled:
-                        current_time = datetime.utcnow().replace(microsecond=0)
-                        await tracking.insert_log_entry(user.id, message.guild.id, 'epic guard', current_time)
-
-            if message.embeds:
-                # Last time travel
-                try:
-                    message_content = str(message.embeds[0].description)
-                except:
-                    return
-                if 'has traveled in time' not in message_content.lower(): return
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
+        if not message.embeds:
+            # Epic Guard
+            if 'we have to check you are actually playing' in snapshot.content_lower:
                 user = await functions.get_interaction_user(message)
                 if user is None:
-                    try:
-                        user_name = re.search("\*\*(.+?)\*\* has", message_content).group(1)
-                    except Exception as error:
-                        await errors.log_error(
-                            f'Error while reading user name from time travel message:\n{error}',
-                            message
-                        )
+                    if message.mentions:
+                        user = message.mentions[0]
+                    else:
                         return
-                    user_name = await functions.encode_text(user_name)
-                    user = await functions.get_guild_member_by_name(message.guild, user_name)
-                if user is None:
-                    await errors.log_error(
-                        f'Couldn\'t find a user with user_name {user_name}.',
-                        message
-                    )
-                    return
                 try:
                     user_settings: users.User = await users.get_user(user.id)
                 except exceptions.FirstTimeUserError:
                     return
-                tt_time = message.created_at.replace(microsecond=0, tzinfo=None)
-                await user_settings.update(last_tt=tt_time.isoformat(sep=' '))
-                if user_settings.last_tt == tt_time and user_settings.bot_enabled and user_settings.reactions_enabled:
-                    await message.add_reaction(emojis.NAVI)
+                if user_settings.tracking_enabled and user_settings.bot_enabled:
+                    current_time = datetime.utcnow().replace(microsecond=0)
+                    await tracking.insert_log_entry(user.id, message.guild.id, 'epic guard', current_time)
+
+        if message.embeds:
+            # Last time travel
+            if 'has traveled in time' not in snapshot.description_lower: return
+            user = await functions.get_interaction_user(message)
+            if user is None:
+                try:
+                    user_name = regex.NAME_HAS.search(snapshot.description).group(1)
+                except Exception as error:
+                    await errors.log_error(
+                        f'Error while reading user name from time travel message:\n{error}',
+                        message
+                    )
+                    return
+                user_name = await functions.encode_text(user_name)
+                user = await functions.get_guild_member_by_name(message.guild, user_name)
+            if user is None:
+                await errors.log_error(
+                    f'Couldn\'t find a user with user_name {user_name}.',
+                    message
+                )
+                return
+            try:
+                user_settings: users.User = await users.get_user(user.id)
+            except exceptions.FirstTimeUserError:
+                return
+            tt_time = message.created_at.replace(microsecond=0, tzinfo=None)
+            await user_settings.update(last_tt=tt_time.isoformat(sep=' '))
+            if user_settings.last_tt == tt_time and user_settings.bot_enabled and user_settings.reactions_enabled:
+                outbox.add_reaction(message, emojis.NAVI)
 
 
 # Initialization
@@ -143,34 +141,26 @@ def setup(bot):
 # --- Embeds ---
 async def embed_stats_overview(ctx: commands.Context, user: discord.User) -> discord.Embed:
     """Stats overview embed"""
-
-    async def command_count(command: str, timeframe: timedelta) -> str:
-        try:
-            report = await tracking.get_log_report(user.id, command, timeframe)
-            text = f'{emojis.BP} `{report.command}`: {report.command_count:,}'
-        except exceptions.NoDataFoundError:
-            text = f'{emojis.BP} `{command}`: 0'
-
-        return text
-
     user_settings: users.User = await users.get_user(user.id)
-    field_last_1h = field_last_12h = field_last_24h = field_last_7d = field_last_4w = field_last_1y = field_last_tt = ''
     current_time = datetime.utcnow().replace(microsecond=0)
-    for command in strings.TRACKED_COMMANDS:
-        last_1h = await command_count(command, timedelta(hours=1))
-        field_last_1h = f'{field_last_1h}\n{last_1h}'
-        last_12h = await command_count(command, timedelta(hours=12))
-        field_last_12h = f'{field_last_12h}\n{last_12h}'
-        last_24h = await command_count(command, timedelta(hours=24))
-        field_last_24h = f'{field_last_24h}\n{last_24h}'
-        last_7d = await command_count(command, timedelta(days=7))
-        field_last_7d = f'{field_last_7d}\n{last_7d}'
-        last_4w = await command_count(command, timedelta(days=28))
-        field_last_4w = f'{field_last_4w}\n{last_4w}'
-        last_1y = await command_count(command, timedelta(days=365))
-        field_last_1y = f'{field_last_1y}\n{last_1y}'
-        last_tt = await command_count(command, current_time-user_settings.last_tt)
-        field_last_tt = f'{field_last_tt}\n{last_tt}'
+    timeframes = (
+        timedelta(hours=1),
+        timedelta(hours=12),
+        timedelta(hours=24),
+        timedelta(days=7),
+        timedelta(days=28),
+        timedelta(days=365),
+        current_time - user_settings.last_tt,
+    )
+    reports = await tracking.get_log_reports(user.id, strings.TRACKED_COMMANDS, timeframes)
+    fields = []
+    for timeframe in timeframes:
+        field = ''
+        for command in strings.TRACKED_COMMANDS:
+            report = reports[(command, timeframe)]
+            field = f'{field}\n{emojis.BP} `{report.command}`: {report.command_count:,}'
+        fields.append(field)
+    field_last_1h, field_last_12h, field_last_24h, field_last_7d, field_last_4w, field_last_1y, field_last_tt = fields
     try:
         timestamp = user_settings.last_tt.timestamp()
     except OSError as error: # Windows throws an error if datetime is set to 0 apparently
@@ -198,12 +188,10 @@ async def embed_stats_timeframe(ctx: commands.Context, user: discord.Member, tim
     """Stats timeframe embed"""
     field_timeframe = ''
     user_settings: users.User = await users.get_user(user.id)
+    reports = await tracking.get_log_reports(user.id, strings.TRACKED_COMMANDS, (time_left,))
     for command in strings.TRACKED_COMMANDS:
-        try:
-            report = await tracking.get_log_report(user.id, command, time_left)
-            field_timeframe = f'{field_timeframe}\n{emojis.BP} `{report.command}`: {report.command_count:,}'
-        except exceptions.NoDataFoundError:
-            field_timeframe = f'{field_timeframe}\n{emojis.BP} `{command}`: 0'
+        report = reports[(command, time_left)]
+        field_timeframe = f'{field_timeframe}\n{emojis.BP} `{report.command}`: {report.command_count:,}'
 
     time_left_seconds = int(time_left.total_seconds())
     days = time_left_seconds // 86400
@@ -1,6 +1,5 @@
 # training-helper.py
 
-import re
 from datetime import datetime
 
 import discord
@@ -8,30 +7,32 @@ from discord.ext import commands
 
 from database import errors, users
 from database import settings as settings_db
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class TrainingHelperCog(commands.Cog):
     """Cog that contains the training helper detection"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('training-helper', self.on_epic_rpg_message, strings.TRIGGERS_TRAINING_HELPER)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('training-helper')
+
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
         if message.embeds:
             embed: discord.Embed = message.embeds[0]
-            message_description = ''
-            if embed.description: message_description = embed.description
             # Void area unseal times
-            if 'help us unseal the next areas!' in message_description.lower():
+            if 'help us unseal the next areas!' in snapshot.description_lower:
                 updated_settings = False
                 for field in embed.fields:
                     if 'unsealed' in field.value.lower():
                         try:
                             area_no = int(field.name[-2:])
-                            seal_timestring = re.search("__: (.+?)$", field.value).group(1).replace(' ','')
+                            seal_timestring = regex.SEAL_TIMESTRING.search(field.value).group(1).replace(' ','')
                             seal_time_left = await functions.parse_timestring_to_timedelta(seal_timestring.lower())
                             current_time = datetime.utcnow().replace(microsecond=0)
                             seal_time = current_time + seal_time_left
@@ -39,38 +40,37 @@ class TrainingHelperCog(commands.Cog):
                             updated_settings = True
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'Error when trying to read unseal time: {error}',
                                 message
                             )
                             return
-                if updated_settings: await message.add_reaction(emojis.NAVI)
+                if updated_settings: outbox.add_reaction(message, emojis.NAVI)
 
         if not message.embeds:
-            message_content = message.content
             # Training helper
-            if '** is training in the' in message_content.lower() and not 'in the mine!' in message_content.lower():
+            if '** is training in the' in snapshot.content_lower and not 'in the mine!' in snapshot.content_lower:
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 if user is None:
                     try:
-                        user_name = re.search("^\*\*(.+?)\*\* ", message_content).group(1)
+                        user_name = regex.NAME_BOLD_START_SPACE.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in training helper message: {message_content}',
+                            f'User not found in training helper message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in training helper message: {message_content}',
+                        f'User not found in training helper message: {snapshot.content}',
                         message
                     )
                     return
@@ -79,8 +79,8 @@ class TrainingHelperCog(commands.Cog):
                 except exceptions.FirstTimeUserError:
                     return
                 if not user_settings.bot_enabled or not user_settings.training_helper_enabled: return
-                answer = await functions.get_training_answer(message_content.lower())
-                await message.reply(answer)
+                answer = await functions.get_training_answer(snapshot.content_lower)
+                await outbox.reply(message, answer)
 
 
 # Initialization
@@ -1,62 +1,56 @@
 # training.py
 
 from datetime import datetime
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, tracking, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class TrainingCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        router.register('training', self.on_epic_rpg_message, strings.TRIGGERS_TRAINING)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('training')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = message_description = message_field1_value = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
-            if embed.description: message_description = str(embed.description)
-            if len(embed.fields) > 1: message_field1_value = embed.fields[1].value
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Training cooldown
-            if 'you have trained already' in message_title.lower():
+            if 'you have trained already' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in training cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in training cooldown message: {message.embeds[0].fields}',
                         message
@@ -71,18 +65,15 @@ class TrainingCog(commands.Cog):
                     interaction = await functions.get_interaction(message)
                     user_command = f'/{interaction.name}'
                 else:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ')
-                                and (' tr' in msg.content.lower() or 'ultr' in msg.content.lower())
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: (command.content_lower.startswith('rpg ')
+                                         and (' tr' in command.content_lower or 'ultr' in command.content_lower)),
+                        author=user
+                    )
                     if user_command_message is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the training cooldown message.',
                             message
@@ -92,7 +83,7 @@ class TrainingCog(commands.Cog):
                     if user_command.endswith(' ultr'): user_command = user_command.replace(' ultr',' ultraining')
                     if user_command.endswith(' tr'): user_command = user_command.replace(' tr',' training')
                     user_command = " ".join(user_command.split())
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_training.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -101,17 +92,17 @@ class TrainingCog(commands.Cog):
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
-            if '**epic npc**: well done, **' in message_description.lower():
+            if '**epic npc**: well done, **' in snapshot.description_lower:
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 user_command = '/ultraining' if user is not None else 'rpg ultraining'
                 if user is None:
                     try:
-                        user_name = re.search(", \*\*(.+?)\*\*!", message_description).group(1)
+                        user_name = regex.NAME_TRAINING_DESCRIPTION.search(snapshot.description).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in ultraining message: {message.embeds[0].fields}',
                             message
@@ -120,7 +111,7 @@ class TrainingCog(commands.Cog):
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in ultraining message: {message.embeds[0].fields}',
                         message
@@ -142,35 +133,34 @@ class TrainingCog(commands.Cog):
                                                          message.channel.id, reminder_message)
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
-                if 'better luck next time' in message_field1_value.lower():
-                    if user_settings.reactions_enabled: await message.add_reaction(emojis.NOOB)
+                if 'better luck next time' in snapshot.field_value(1, lower=True):
+                    if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NOOB)
 
         if not message.embeds:
-            message_content = message.content
             # Training
-            if ('well done, **' in message_content.lower()
-                or 'better luck next time, **' in message_content.lower()):
+            if ('well done, **' in snapshot.content_lower
+                or 'better luck next time, **' in snapshot.content_lower):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 user_command = '/training' if user is not None else 'rpg training'
                 if user is None:
                     try:
-                        user_name = re.search(", \*\*(.+?)\*\* !", message_content).group(1)
+                        user_name = regex.NAME_TRAINING_CONTENT.search(snapshot.content).group(1)
                         user_name = await functions.encode_text(user_name)
                     except Exception as error:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
-                            f'User not found in training message: {message_content}',
+                            f'User not found in training message: {snapshot.content}',
                             message
                         )
                         return
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
-                        f'User not found in training message: {message_content}',
+                        f'User not found in training message: {snapshot.content}',
                         message
                     )
                     return
@@ -1,23 +1,25 @@
 # vote.py
 
-import re
-
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, users
-from resources import emojis, exceptions, functions, settings
+from resources import emojis, exceptions, functions, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class VoteCog(commands.Cog):
     """Cog that contains the dungeon/miniboss detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('vote', self.on_epic_rpg_message, strings.TRIGGERS_VOTE)
+
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('vote')
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
         if message.embeds:
             if message.embeds[0].fields:
@@ -25,21 +27,19 @@ class VoteCog(commands.Cog):
 
                 # Vote cooldown
                 if field.name.lower() == 'next vote rewards':
-                    timestring_search = re.search("Cooldown: \*\*(.+?)\*\*", field.value)
+                    timestring_search = regex.COOLDOWN_VOTE_EMBED.search(field.value)
                     if timestring_search is None: return
                     timestring = timestring_search.group(1)
                     user = await functions.get_interaction_user(message)
                     user_command = 'rpg vote' if user is None else '/vote'
                     if user is None:
-                        message_history = await message.channel.history(limit=50).flatten()
-                        for msg in message_history:
-                            if msg.content is not None:
-                                if msg.content.lower().replace(' ','').startswith('rpgvote') and not msg.author.bot:
-                                    user = msg.author
-                                    break
+                        user_command_message = await recent_commands.find_command(
+                            message.channel, lambda command: command.compact.startswith('rpgvote')
+                        )
+                        if user_command_message is not None: user = user_command_message.author
                         if user is None:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 'Couldn\'t find a user for the vote embed.',
                                 message
@@ -1,60 +1,56 @@
 # work.py
 
 from datetime import datetime
-import re
 
 import discord
 from discord.ext import commands
 
 from database import errors, reminders, tracking, users
-from resources import emojis, exceptions, functions, settings, strings
+from resources import emojis, exceptions, functions, members, outbox, recent_commands, regex, router, settings, strings
+from resources.snapshot import MessageSnapshot
 
 
 class WorkCog(commands.Cog):
     """Cog that contains the work detection commands"""
     def __init__(self, bot):
         self.bot = bot
+        router.register('work', self.on_epic_rpg_message, strings.TRIGGERS_WORK)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        """Runs when a message is sent in a channel."""
-        if message.author.id != settings.EPIC_RPG_ID: return
+    def cog_unload(self) -> None:
+        """Removes the route of this cog from the router"""
+        router.unregister('work')
 
-        if message.embeds:
-            embed: discord.Embed = message.embeds[0]
-            message_author = message_title = icon_url = ''
-            if embed.author:
-                message_author = str(embed.author.name)
-                icon_url = embed.author.icon_url
-            if embed.title: message_title = str(embed.title)
+    async def on_epic_rpg_message(self, message: discord.Message, snapshot: MessageSnapshot) -> None:
+        """Runs when the router hands over a message from EPIC RPG that matches one of this cog's triggers."""
 
+        if message.embeds:
             # Work cooldown
-            if 'you have already got some resources' in message_title.lower():
+            if 'you have already got some resources' in snapshot.title_lower:
                 user_id = user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
                 if user is None:
                     try:
-                        user_id = int(re.search("avatars\/(.+?)\/", icon_url).group(1))
+                        user_id = int(regex.USER_ID_FROM_ICON_URL.search(snapshot.icon_url).group(1))
                     except:
                         try:
-                            user_name = re.search("^(.+?)'s cooldown", message_author).group(1)
+                            user_name = regex.USER_NAME_COOLDOWN.search(snapshot.author).group(1)
                             user_name = await functions.encode_text(user_name)
                         except Exception as error:
                             if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                                await message.add_reaction(emojis.WARNING)
+                                outbox.add_reaction(message, emojis.WARNING)
                             await errors.log_error(
                                 f'User not found in work cooldown message: {message.embeds[0].fields}',
                                 message
                             )
                             return
                     if user_id is not None:
-                        user = await message.guild.fetch_member(user_id)
+                        user = await members.get_member(message.guild, user_id)
                     else:
                         user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found in work cooldown message: {message.embeds[0].fields}',
                         message
@@ -69,26 +65,25 @@ class WorkCog(commands.Cog):
                     interaction = await functions.get_interaction(message)
                     user_command = f'/{interaction.name}'
                 else:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = user_command = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ')
-                                and any(command in msg.content.lower() for command in strings.WORK_COMMANDS)
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command = None
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: (command.content_lower.startswith('rpg ')
+                                         and any(work_command in command.content_lower
+                                                 for work_command in strings.WORK_COMMANDS)),
+                        author=user
+                    )
                     if user_command_message is not None:
                         user_command = user_command_message.content.lower()
                     else:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             'Couldn\'t find a command for the work cooldown message.',
                             message
                         )
                         return
-                timestring = re.search("wait at least \*\*(.+?)\*\*...", message_title).group(1)
+                timestring = regex.COOLDOWN_TIMESTRING.search(snapshot.title).group(1)
                 time_left = await functions.calculate_time_left_from_timestring(message, timestring)
                 reminder_message = user_settings.alert_work.message.replace('{command}', user_command)
                 reminder: reminders.Reminder = (
@@ -98,29 +93,20 @@ class WorkCog(commands.Cog):
                 await functions.add_reminder_reaction(message, reminder, user_settings)
 
         if not message.embeds:
-            message_content = message.content
             # Work
             excluded_strings = ('hunting together','** found','** plants','** throws', 'new quest')
-            if ('** got ' in message_content.lower()
-                and not any(string in message_content.lower() for string in excluded_strings)):
+            if ('** got ' in snapshot.content_lower
+                and not any(string in snapshot.content_lower for string in excluded_strings)):
                 user_name = None
                 user = await functions.get_interaction_user(message)
                 slash_command = True if user is not None else False
                 if user is None:
-                    search_strings = [
-                        '[!1] \*\*(.+?)\*\* got',
-                        '\?\?\?\?\? \*\*(.+?)\*\* got',
-                        'WOOAAAA!! (.+?)\*\* got',
-                        'WwWOoOOoOAAa!!!1 (.+?)\*\* got',
-                        '\.\.\. \*\*(.+?)\*\* got',
-                        '\*\*(.+?)\*\* got',
-                    ]
-                    for search_string in search_strings:
-                        user_name_search = re.search(search_string, message_content, re.IGNORECASE)
+                    for pattern in regex.NAMES_WORK:
+                        user_name_search = pattern.search(snapshot.content)
                         if user_name_search is not None: break
                     if user_name_search is None:
                         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                            await message.add_reaction(emojis.WARNING)
+                            outbox.add_reaction(message, emojis.WARNING)
                         await errors.log_error(
                             f'User not found in work message: {message.content}',
                             message
@@ -131,7 +117,7 @@ class WorkCog(commands.Cog):
                     user = await functions.get_guild_member_by_name(message.guild, user_name)
                 if user is None:
                     if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-                        await message.add_reaction(emojis.WARNING)
+                        outbox.add_reaction(message, emojis.WARNING)
                     await errors.log_error(
                         f'User not found for user name {user_name} in work message: {message.content}',
                         message
@@ -150,36 +136,34 @@ class WorkCog(commands.Cog):
                     interaction = await functions.get_interaction(message)
                     user_command = f'/{interaction.name}'
                 else:
-                    message_history = await message.channel.history(limit=50).flatten()
-                    user_command_message = None
-                    for msg in message_history:
-                        if msg.content is not None:
-                            if (msg.content.lower().startswith('rpg ')
-                                and any(command.lower() in msg.content.lower() for command in strings.WORK_COMMANDS)
-                                and msg.author == user):
-                                user_command_message = msg
-                                break
+                    user_command_message = await recent_commands.find_command(
+                        message.channel,
+                        lambda command: (command.content_lower.startswith('rpg ')
+                                         and any(work_command.lower() in command.content_lower
+                                                 for work_command in strings.WORK_COMMANDS)),
+                        author=user
+                    )
                     if user_command_message is not None:
                         user_command = user_command_message.content.lower()
                     else:
-                        if ('three chainsaw' in message_content.lower()
-                        or 'is this a **dream**??' in message_content.lower()
-                        or 'this may be the luckiest moment of your life' in message_content.lower()):
+                        if ('three chainsaw' in snapshot.content_lower
+                        or 'is this a **dream**??' in snapshot.content_lower
+                        or 'this may be the luckiest moment of your life' in snapshot.content_lower):
                             action = 'chainsaw'
-                        elif 'two bow saw' in message_content.lower(): action = 'bowsaw'
-                        elif 'axe' in message_content.lower(): action = 'axe'
-                        elif 'log' in message_content.lower(): action = 'chop'
-                        elif 'three nets' in message_content.lower(): action = 'bigboat'
-                        elif 'a **net**' in message_content.lower(): action = 'net'
-                        elif 'fish' in message_content.lower(): action = 'fish'
-                        elif 'two tractors' in message_content.lower(): action = 'greenhouse'
-                        elif 'tractor' in message_content.lower(): action = 'tractor'
-                        elif 'both hands' in message_content.lower(): action = 'ladder'
-                        elif 'apple' in message_content.lower() or 'banana' in message_content.lower(): action = 'pickup'
-                        elif 'four drills' in message_content.lower(): action = 'dynamite'
-                        elif 'two drills' in message_content.lower(): action = 'drill'
-                        elif 'pickaxe' in message_content.lower(): action = 'pickaxe'
-                        elif 'coins' in message_content.lower() or 'ruby' in message_content.lower(): action = 'mine'
+                        elif 'two bow saw' in snapshot.content_lower: action = 'bowsaw'
+                        elif 'axe' in snapshot.content_lower: action = 'axe'
+                        elif 'log' in snapshot.content_lower: action = 'chop'
+                        elif 'three nets' in snapshot.content_lower: action = 'bigboat'
+                        elif 'a **net**' in snapshot.content_lower: action = 'net'
+                        elif 'fish' in snapshot.content_lower: action = 'fish'
+                        elif 'two tractors' in snapshot.content_lower: action = 'greenhouse'
+                        elif 'tractor' in snapshot.content_lower: action = 'tractor'
+                        elif 'both hands' in snapshot.content_lower: action = 'ladder'
+                        elif 'apple' in snapshot.content_lower or 'banana' in snapshot.content_lower: action = 'pickup'
+                        elif 'four drills' in snapshot.content_lower: action = 'dynamite'
+                        elif 'two drills' in snapshot.content_lower: action = 'drill'
+                        elif 'pickaxe' in snapshot.content_lower: action = 'pickaxe'
+                        elif 'coins' in snapshot.content_lower or 'ruby' in snapshot.content_lower: action = 'mine'
                         else: action = '[work command]'
                         user_command = f'rpg {action}'
                 time_left = await functions.calculate_time_left_from_cooldown(message, user_settings, 'work')
@@ -190,26 +174,26 @@ class WorkCog(commands.Cog):
                 )
                 await functions.add_reminder_reaction(message, reminder, user_settings)
                 if user_settings.reactions_enabled:
-                    if 'quite a large leaf' in message_content.lower():
-                        await message.add_reaction(emojis.WOAH_THERE)
-                    elif 'mined with too much force' in message_content.lower():
-                        await message.add_reaction(emojis.SWEATY)
-                    elif 'for some reason, one of the fish was carrying' in message_content.lower():
-                        await message.add_reaction(emojis.FISHPOGGERS)
-                    elif 'one of them had' in message_content.lower() and 'rubies in it' in message_content.lower():
-                        await message.add_reaction(emojis.WOW)
-                    elif 'wooaaaa!!' in message_content.lower():
-                        await message.add_reaction(emojis.FIRE)
-                    elif 'wwwooooooaaa!!!1' in message_content.lower():
-                        await message.add_reaction(emojis.FIRE)
-                    elif 'is this a **dream**??' in message_content.lower():
-                        await message.add_reaction(emojis.PEEPO_WOAH)
-                    elif 'watermelon' in message_content.lower():
-                        await message.add_reaction(emojis.PANDA_MELON)
-                    elif 'ultimate log' in message_content.lower():
-                        await message.add_reaction(emojis.PANDA_COOL)
-                    elif 'super fish' in message_content.lower():
-                        await message.add_reaction(emojis.PANDA_FISH)
+                    if 'quite a large leaf' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.WOAH_THERE)
+                    elif 'mined with too much force' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.SWEATY)
+                    elif 'for some reason, one of the fish was carrying' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.FISHPOGGERS)
+                    elif 'one of them had' in snapshot.content_lower and 'rubies in it' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.WOW)
+                    elif 'wooaaaa!!' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.FIRE)
+                    elif 'wwwooooooaaa!!!1' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.FIRE)
+                    elif 'is this a **dream**??' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.PEEPO_WOAH)
+                    elif 'watermelon' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.PANDA_MELON)
+                    elif 'ultimate log' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.PANDA_COOL)
+                    elif 'super fish' in snapshot.content_lower:
+                        outbox.add_reaction(message, emojis.PANDA_FISH)
 
 
 # Initialization
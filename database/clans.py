@@ -2,12 +2,12 @@
 """Provides access to the table "clans" in the database"""
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 import sqlite3
-from typing import List, NamedTuple, Optional, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
-from database import errors
+from database import connection, errors, statements
 from resources import exceptions, settings, strings
 
 
@@ -62,7 +62,7 @@ class Clan():
         self.upgrade_quests_enabled = new_settings.upgrade_quests_enabled
 
     async def update(self, **kwargs) -> None:
-        """Updates the clan record in the database. Also calls refresh().
+        """Updates the clan record in the database and sets the updated values on the object.
 
         Arguments
         ---------
@@ -85,7 +85,10 @@ class Clan():
         Also logs all errors to the database.
         """
         await _update_clan(self.clan_name, **kwargs)
-        await self.refresh()
+        try:
+            _apply_columns(self, kwargs)
+        except LookupError:
+            await self.refresh()
 
 
 class ClanRaid(NamedTuple):
@@ -109,6 +112,28 @@ class ClanWeeklyReport(NamedTuple):
     worst_raid: ClanRaid
 
 # Miscellaneous functions
+def _apply_columns(clan: Clan, columns: Dict[str, Any]) -> None:
+    """Sets the values of updated columns on a Clan object, converted the same way _dict_to_clan does.
+
+    Raises
+    ------
+    LookupError if a column has no matching attribute on Clan.
+    """
+    clan_fields = [field.name for field in fields(Clan)]
+    for column, value in columns.items():
+        if column == 'member_ids':
+            if value is None: continue
+            member_ids = [None] * 10
+            for index, member_id in enumerate(value):
+                member_ids[index] = member_id
+            value = tuple(member_ids)
+        elif column in ('alert_enabled', 'upgrade_quests_enabled'):
+            value = bool(value)
+        elif column not in clan_fields or column == 'record_exists':
+            raise LookupError(f'Clan has no attribute "{column}".')
+        setattr(clan, column, value)
+
+
 async def _dict_to_clan(record: dict) -> Clan:
     """Creates a Clan object from a database record
 
@@ -212,9 +237,7 @@ async def get_clan_by_user_id(user_id: int) -> Clan:
         f'or member5_id=? or member6_id=? or member7_id=? or member8_id=? or member9_id=? or member10_id=?'
     )
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id,) * 11)
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (user_id,) * 11)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -245,9 +268,7 @@ async def get_clan_by_clan_name(clan_name: str) -> Clan:
     function_name = 'get_clan_by_clan_name'
     sql = f'SELECT * FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name,))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -278,9 +299,7 @@ async def get_all_clans() -> Tuple[Clan]:
     function_name = 'get_all_clans'
     sql = f'SELECT * FROM {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        records = cur.fetchall()
+        records = await connection.fetchall(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -316,9 +335,7 @@ async def get_clan_raid(clan_name: str, user_id: str, raid_time: datetime) -> Cl
     function_name = 'get_clan_raid'
     sql = f'SELECT * FROM {table} WHERE clan_name=? AND user_id=? AND raid_time=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name, user_id, raid_time))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (clan_name, user_id, raid_time))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -352,9 +369,7 @@ async def get_leaderboard(clan: Clan) -> ClanLeaderboard:
     stealth_threshold = 500
     sql = f'SELECT * FROM {table} WHERE clan_name=? AND energy>={stealth_threshold} ORDER BY energy DESC LIMIT 5'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan.clan_name,))
-        records_best = cur.fetchall()
+        records_best = await connection.fetchall(sql, (clan.clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -362,9 +377,7 @@ async def get_leaderboard(clan: Clan) -> ClanLeaderboard:
         raise
     sql = f'SELECT * FROM {table} WHERE clan_name=? AND energy<{stealth_threshold} ORDER BY energy ASC LIMIT 5'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan.clan_name,))
-        records_worst = cur.fetchall()
+        records_worst = await connection.fetchall(sql, (clan.clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -404,9 +417,7 @@ async def get_weekly_report(clan: Clan) -> ClanWeeklyReport:
     function_name = 'get_weekly_report'
     sql = f'SELECT text FROM {table} ORDER BY RANDOM() LIMIT 1'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        praise_record = cur.fetchone()
+        praise_record = await connection.fetchone(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -415,9 +426,7 @@ async def get_weekly_report(clan: Clan) -> ClanWeeklyReport:
     table = 'clans_leaderboard_roasts'
     sql = f'SELECT text FROM {table} ORDER BY RANDOM() LIMIT 1'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        roast_record = cur.fetchone()
+        roast_record = await connection.fetchone(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -426,9 +435,7 @@ async def get_weekly_report(clan: Clan) -> ClanWeeklyReport:
     table = 'clans_raids'
     sql = f'SELECT energy FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan.clan_name,))
-        all_raids_records = cur.fetchall()
+        all_raids_records = await connection.fetchall(sql, (clan.clan_name,))
     except:
         raise exceptions.NoDataFoundError(f'No raids found for clan {clan.clan_name}')
     energy_total = 0
@@ -459,8 +466,7 @@ async def _delete_clan(clan_name: str) -> None:
     function_name = '_delete_clan'
     sql = f'DELETE FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name,))
+        await connection.execute(sql, (clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -509,15 +515,11 @@ async def _update_clan(clan_name: str, **kwargs) -> None:
         for index, member_id in enumerate(member_ids):
             kwargs[f'member{index+1}_id'] = member_id
         kwargs.pop('member_ids', None)
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
+        sql = await statements.update_sql(table, kwargs, 'clan_name = :clan_name_old')
         kwargs['clan_name_old'] = clan_name
-        sql = f'{sql} WHERE clan_name = :clan_name_old'
-        cur.execute(sql, kwargs)
+        await connection.execute(sql, kwargs)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -537,8 +539,7 @@ async def delete_clan_leaderboard(clan_name: Optional[str] = None) -> None:
     function_name = 'delete_clan_leaderboard'
     sql = f'DELETE FROM {table}' if clan_name is None else f'DELETE FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql) if clan_name is None else cur.execute(sql, (clan_name,))
+        await connection.execute(sql, () if clan_name is None else (clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -581,8 +582,7 @@ async def insert_clan(clan_name: str, leader_id: int, member_ids: Union[Tuple[in
         for index, member_id in enumerate(member_ids):
             member_ids_all[index] = member_id
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(
+        await connection.execute(
             sql,
             (clan_name, 1, settings.CLAN_DEFAULT_STEALTH_THRESHOLD, leader_id,
              member_ids_all[0], member_ids_all[1], member_ids_all[2], member_ids_all[3], member_ids_all[4],
@@ -614,13 +614,12 @@ async def insert_clan_raid(clan_name: str, user_id: int, energy: int, raid_time:
     table = 'clans_raids'
     sql = f'INSERT INTO {table} (clan_name, user_id, energy, raid_time) VALUES (?, ?, ?, ?)'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name, user_id, energy, raid_time))
+        await connection.execute(sql, (clan_name, user_id, energy, raid_time))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
-    clan_raid = await get_clan_raid(clan_name, user_id, raid_time)
+    clan_raid = ClanRaid(clan_name=clan_name, energy=energy, raid_time=raid_time, user_id=user_id)
 
     return clan_raid
\ No newline at end of file
@@ -0,0 +1,223 @@
+# connection.py
+"""Runs all database queries outside of the event loop.
+
+sqlite3 calls block until they are done. Run directly in a coroutine, every query stalls the whole event loop,
+including gateway heartbeats, reminders and the processing of other messages. The database modules therefore hand
+their queries to this module and await the result.
+
+The database runs in WAL mode, so reads don't wait for writes and the other way around:
+- Queries (fetchone, fetchall) run on a pool of READERS threads, each with its own read-only connection.
+- Statements (execute, run) are queued for a single writer thread that owns settings.NAVI_DB. While a batch is
+written, new writes queue up and are then written together in one transaction, with a savepoint per write so a
+failing write doesn't take the others with it. A write only returns after its batch is committed, so a query
+started afterwards always sees it.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from resources import settings
+
+
+READERS = 4
+
+Parameters = Union[Sequence[Any], Dict[str, Any]]
+
+
+# Containers
+@dataclass()
+class DatabaseStats():
+    """Object that summarizes the reads or the writes since startup. Times are in seconds."""
+    queries: int = 0
+    queue_depth: int = 0
+    queue_depth_max: int = 0
+    wait_time: float = 0
+    wait_time_max: float = 0
+    query_time: float = 0
+    query_time_max: float = 0
+
+    def average_wait_time(self) -> float:
+        """Returns the average time a query waited in the queue"""
+        return self.wait_time / self.queries if self.queries else 0
+
+    def average_query_time(self) -> float:
+        """Returns the average time a query took to run"""
+        return self.query_time / self.queries if self.queries else 0
+
+    def record(self, wait_time: float, query_time: float) -> None:
+        """Adds a finished query"""
+        self.queries += 1
+        self.wait_time += wait_time
+        self.wait_time_max = max(wait_time, self.wait_time_max)
+        self.query_time += query_time
+        self.query_time_max = max(query_time, self.query_time_max)
+
+
+@dataclass()
+class WriterStats(DatabaseStats):
+    """DatabaseStats of the writer, with the batches it committed"""
+    batches: int = 0
+    batch_size_max: int = 0
+    failed_batches: int = 0
+
+    def average_batch_size(self) -> float:
+        """Returns the average number of writes per transaction"""
+        return self.queries / self.batches if self.batches else 0
+
+
+@dataclass()
+class PendingWrite():
+    """Write waiting for the next batch"""
+    function: Callable[[sqlite3.Connection], Any]
+    future: asyncio.Future
+    queue_time: float
+
+
+_reader_executor = ThreadPoolExecutor(max_workers=READERS, thread_name_prefix='navi-db-reader')
+_writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='navi-db-writer')
+_reader_local = threading.local()
+_readers: List[sqlite3.Connection] = []
+_readers_lock = threading.Lock()
+_pending_writes: List[PendingWrite] = []
+_batch_running = False
+read_stats = DatabaseStats()
+write_stats = WriterStats()
+
+
+# Reader thread
+def _get_reader() -> sqlite3.Connection:
+    """Returns the read-only connection of the current reader thread, opening it on first use"""
+    reader = getattr(_reader_local, 'connection', None)
+    if reader is not None: return reader
+    reader = sqlite3.connect(f'file:{settings.DB_FILE}?mode=ro', uri=True, isolation_level=None,
+                             detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    reader.row_factory = sqlite3.Row
+    _reader_local.connection = reader
+    with _readers_lock:
+        _readers.append(reader)
+    return reader
+
+
+# Writer thread
+def _write_batch(batch: List[PendingWrite]) -> Tuple[float, List[Tuple[Any, Optional[BaseException], float]]]:
+    """Runs a batch of writes in one transaction. Returns the start time of the batch and, per write, its result,
+    its exception and its query time."""
+    writer = settings.NAVI_DB
+    start_time = time.perf_counter()
+    results = []
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        for pending_write in batch:
+            query_start = time.perf_counter()
+            writer.execute('SAVEPOINT pending_write')
+            try:
+                result = pending_write.function(writer)
+            except Exception as error:
+                writer.execute('ROLLBACK TO pending_write')
+                writer.execute('RELEASE pending_write')
+                results.append((None, error, time.perf_counter() - query_start))
+            else:
+                writer.execute('RELEASE pending_write')
+                results.append((result, None, time.perf_counter() - query_start))
+        writer.execute('COMMIT')
+    except BaseException:
+        if writer.in_transaction: writer.execute('ROLLBACK')
+        raise
+    return start_time, results
+
+
+# Event loop
+def _schedule_batch() -> None:
+    """Hands all pending writes to the writer thread unless it is still busy with the last batch"""
+    global _batch_running
+    if _batch_running or not _pending_writes: return
+    batch = _pending_writes[:]
+    _pending_writes.clear()
+    _batch_running = True
+    write_stats.batch_size_max = max(len(batch), write_stats.batch_size_max)
+    future = asyncio.get_running_loop().run_in_executor(_writer_executor, _write_batch, batch)
+    future.add_done_callback(partial(_finish_batch, batch))
+
+
+def _finish_batch(batch: List[PendingWrite], batch_future: asyncio.Future) -> None:
+    """Hands the results of a batch to the waiting writes and starts the next batch"""
+    global _batch_running
+    _batch_running = False
+    write_stats.queue_depth -= len(batch)
+    error = batch_future.exception() if not batch_future.cancelled() else asyncio.CancelledError()
+    if error is not None:
+        write_stats.failed_batches += 1
+        for pending_write in batch:
+            if not pending_write.future.done(): pending_write.future.set_exception(error)
+    else:
+        start_time, results = batch_future.result()
+        write_stats.batches += 1
+        for pending_write, (result, write_error, query_time) in zip(batch, results):
+            write_stats.record(start_time - pending_write.queue_time, query_time)
+            if pending_write.future.done(): continue
+            if write_error is not None:
+                pending_write.future.set_exception(write_error)
+            else:
+                pending_write.future.set_result(result)
+    _schedule_batch()
+
+
+async def _read(function: Callable[[sqlite3.Connection], Any]) -> Any:
+    """Runs a function that gets a read-only connection on a reader thread and returns its result"""
+    start_times = []
+    def run_function() -> Any:
+        start_times.append(time.perf_counter())
+        return function(_get_reader())
+    queue_time = time.perf_counter()
+    read_stats.queue_depth += 1
+    read_stats.queue_depth_max = max(read_stats.queue_depth, read_stats.queue_depth_max)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_reader_executor, run_function)
+    finally:
+        end_time = time.perf_counter()
+        read_stats.queue_depth -= 1
+        if start_times: read_stats.record(start_times[0] - queue_time, end_time - start_times[0])
+
+
+# Functions
+async def run(function: Callable[[sqlite3.Connection], Any]) -> Any:
+    """Queues a function that gets the writer connection for the next batch and returns its result once the batch
+    is committed. Exceptions raised by the function are raised here, its changes are rolled back.
+    Use this for work that needs several statements in a row, otherwise use execute, fetchone or fetchall."""
+    future = asyncio.get_running_loop().create_future()
+    _pending_writes.append(PendingWrite(function, future, time.perf_counter()))
+    write_stats.queue_depth += 1
+    write_stats.queue_depth_max = max(write_stats.queue_depth, write_stats.queue_depth_max)
+    _schedule_batch()
+    return await future
+
+
+async def execute(sql: str, parameters: Parameters = ()) -> None:
+    """Runs a statement that doesn't return rows on the writer"""
+    await run(lambda connection: connection.execute(sql, parameters))
+
+
+async def fetchone(sql: str, parameters: Parameters = ()) -> Optional[sqlite3.Row]:
+    """Runs a query on a reader and returns the first row or None"""
+    return await _read(lambda connection: connection.execute(sql, parameters).fetchone())
+
+
+async def fetchall(sql: str, parameters: Parameters = ()) -> List[sqlite3.Row]:
+    """Runs a query on a reader and returns all rows"""
+    return await _read(lambda connection: connection.execute(sql, parameters).fetchall())
+
+
+def close() -> None:
+    """Waits for the database threads to finish and closes the reader connections"""
+    _reader_executor.shutdown(wait=True)
+    _writer_executor.shutdown(wait=True)
+    with _readers_lock:
+        for reader in _readers:
+            reader.close()
+        _readers.clear()
@@ -2,13 +2,14 @@
 """Provides access to the table "cooldowns" in the database"""
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from math import ceil
 import sqlite3
-from typing import Tuple
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
 
-from database import errors
-from resources import exceptions, settings, strings
+from database import connection, errors, statements
+from resources import exceptions, strings
 
 
 # Containers
@@ -32,7 +33,7 @@ class Cooldown():
         self.event_reduction = new_settings.event_reduction
 
     async def update(self, **kwargs) -> None:
-        """Updates the cooldown record in the database. Also calls refresh().
+        """Updates the cooldown record in the database and sets the updated values on the object.
 
         Arguments
         ---------
@@ -42,10 +43,37 @@ class Cooldown():
             event_reduction: float
         """
         await _update_cooldown(self.activity, **kwargs)
-        await self.refresh()
+        try:
+            _apply_columns(self, kwargs)
+        except LookupError:
+            await self.refresh()
+
+
+# All cooldowns by activity. The table only changes via Cooldown.update, so it is read once by load_cooldowns and
+# then replaced as a whole with a patched copy after every update. get_cooldown and get_all_cooldowns hand out
+# copies.
+all_cooldowns: Mapping[str, Cooldown] = MappingProxyType({})
 
 
 # Miscellaneous functions
+def _apply_columns(cooldown: Cooldown, columns: Dict[str, Any]) -> None:
+    """Sets the values of updated columns on a Cooldown object, converted the same way _dict_to_cooldown does.
+
+    Raises
+    ------
+    LookupError if a column has no matching attribute on Cooldown.
+    """
+    for column, value in columns.items():
+        if column == 'cooldown':
+            cooldown.base_cooldown = value
+        elif column == 'donor_affected':
+            cooldown.donor_affected = bool(value)
+        elif column == 'event_reduction':
+            cooldown.event_reduction = value
+        else:
+            raise LookupError(f'Cooldown has no attribute "{column}".')
+
+
 async def _dict_to_cooldown(record: dict) -> Cooldown:
     """Creates a Cooldown object from a database record
 
@@ -79,47 +107,72 @@ async def _dict_to_cooldown(record: dict) -> Cooldown:
 
 
 # Read Data
-async def get_cooldown(activity: str) -> Cooldown:
-    """Gets the cooldown settings for an activity.
-
-    Returns
-    -------
-    Cooldown object
+async def load_cooldowns() -> None:
+    """Reads all cooldowns from the database into all_cooldowns.
 
     Raises
     ------
     sqlite3.Error if something happened within the database.
     exceptions.NoDataFoundError if no cooldown was found.
+    LookupError if something goes wrong reading the dict.
     Also logs all errors to the database.
     """
+    global all_cooldowns
     table = 'cooldowns'
-    function_name = 'get_cooldown'
-    sql = f'SELECT * FROM {table} WHERE activity=?'
+    function_name = 'load_cooldowns'
+    sql = f'SELECT * FROM {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (activity,))
-        record = cur.fetchone()
+        records = await connection.fetchall(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
-    if not record:
+    if not records:
         await errors.log_error(
             strings.INTERNAL_ERROR_NO_DATA_FOUND.format(table=table, function=function_name, sql=sql)
         )
+        raise exceptions.NoDataFoundError('No cooldown data found in database.')
+    cooldowns = {}
+    for record in records:
+        cooldown = await _dict_to_cooldown(dict(record))
+        cooldowns[cooldown.activity] = cooldown
+    all_cooldowns = MappingProxyType(cooldowns)
+
+
+async def get_cooldown(activity: str) -> Cooldown:
+    """Gets the cooldown settings for an activity from all_cooldowns.
+
+    Returns
+    -------
+    Cooldown object
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    exceptions.NoDataFoundError if no cooldown was found.
+    Also logs all errors to the database.
+    """
+    table = 'cooldowns'
+    function_name = 'get_cooldown'
+    if not all_cooldowns: await load_cooldowns()
+    cooldown = all_cooldowns.get(activity)
+    if cooldown is None:
+        await errors.log_error(
+            strings.INTERNAL_ERROR_NO_DATA_FOUND.format(table=table, function=function_name,
+                                                      sql=f'all_cooldowns[{activity!r}]')
+        )
         raise exceptions.NoDataFoundError(f'No cooldown data found in database for activity "{activity}".')
-    cooldown = await _dict_to_cooldown(dict(record))
 
-    return cooldown
+    return replace(cooldown)
 
 
 async def get_all_cooldowns() -> Tuple[Cooldown]:
-    """Gets the cooldown settings for all activities.
+    """Gets the cooldown settings for all activities from all_cooldowns.
 
     Returns
     -------
-    Tuple[Cooldown]
+    Tuple[Cooldown], sorted by activity
 
     Raises
     ------
@@ -128,30 +181,9 @@ async def get_all_cooldowns() -> Tuple[Cooldown]:
     LookupError if something goes wrong reading the dict.
     Also logs all errors to the database.
     """
-    table = f'cooldowns'
-    function_name = 'get_all_cooldowns'
-    sql = f'SELECT * FROM {table} ORDER BY activity ASC'
-    try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        records = cur.fetchall()
-    except sqlite3.Error as error:
-        await errors.log_error(
-            strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
-        )
-        raise
+    if not all_cooldowns: await load_cooldowns()
 
-    if not records:
-        await errors.log_error(
-            strings.INTERNAL_ERROR_NO_DATA_FOUND.format(table=table, function=function_name, sql=sql)
-        )
-        raise exceptions.NoDataFoundError('No cooldown data found in database.')
-    cooldowns = []
-    for record in records:
-        cooldown = await _dict_to_cooldown(dict(record))
-        cooldowns.append(cooldown)
-
-    return tuple(cooldowns)
+    return tuple(replace(all_cooldowns[activity]) for activity in sorted(all_cooldowns))
 
 
 # Write Data
@@ -172,6 +204,7 @@ async def _update_cooldown(activity: str, **kwargs) -> None:
     NoArgumentsError if no kwargs are passed (need to pass at least one).
     Also logs all errors to the database.
     """
+    global all_cooldowns
     table = 'cooldowns'
     function_name = '_update_cooldown'
     if not kwargs:
@@ -179,17 +212,25 @@ async def _update_cooldown(activity: str, **kwargs) -> None:
             strings.INTERNAL_ERROR_NO_ARGUMENTS.format(table=table, function=function_name)
         )
         raise exceptions.NoArgumentsError('You need to specify at least one keyword argument.')
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
+        sql = await statements.update_sql(table, kwargs, 'activity = :activity')
         kwargs['activity'] = activity
-        sql = f'{sql} WHERE activity = :activity'
-        cur.execute(sql, kwargs)
+        await connection.execute(sql, kwargs)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
-        raise
\ No newline at end of file
+        raise
+    cooldowns = dict(all_cooldowns)
+    cooldown = cooldowns.get(activity)
+    if cooldown is None:
+        await load_cooldowns()
+        return
+    cooldown = cooldowns[activity] = replace(cooldown)
+    try:
+        _apply_columns(cooldown, {column: value for column, value in kwargs.items() if column != 'activity'})
+    except LookupError:
+        await load_cooldowns()
+        return
+    all_cooldowns = MappingProxyType(cooldowns)
\ No newline at end of file
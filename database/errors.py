@@ -9,7 +9,8 @@ from typing import Optional, Union
 import discord
 from discord.ext import commands
 
-from resources import exceptions, logs, settings, strings
+from database import connection
+from resources import exceptions, logs, strings
 
 
 async def log_error(error: Union[Exception, str], ctx: Optional[Union[commands.Context, discord.Message]] = None) -> None:
@@ -57,7 +58,7 @@ async def log_error(error: Union[Exception, str], ctx: Optional[Union[commands.C
         message = ctx
         user_input = message.content
     if message is None:
-        date_time = datetime.utcnow(tzinfo=None)
+        date_time = datetime.utcnow()
         user_input = 'N/A'
         jump_url = 'N/A'
         user_settings = 'N/A'
@@ -71,8 +72,7 @@ async def log_error(error: Union[Exception, str], ctx: Optional[Union[commands.C
         except exceptions.FirstTimeUserError:
             user_settings = 'N/A'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (date_time, user_input, error_message, user_settings, jump_url))
+        await connection.execute(sql, (date_time, user_input, error_message, user_settings, jump_url))
         logs.logger.error(
             f'Time: {date_time}. User input: {user_input}. Error: {error_message}. User settings: {user_settings}. '
             f'Jump URL: {jump_url}'
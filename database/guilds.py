@@ -3,13 +3,13 @@
 
 
 from dataclasses import dataclass
-import itertools
 import sqlite3
-from typing import List, Tuple
+from typing import Dict, List
 
+import discord
 from discord.ext import commands
 
-from database import errors
+from database import connection, errors, statements
 from resources import exceptions, settings, strings
 
 
@@ -26,7 +26,7 @@ class Guild():
         self.prefix = new_settings.prefix
 
     async def update(self, **kwargs) -> None:
-        """Updates the guild record in the database. Also calls refresh().
+        """Updates the guild record in the database and sets the updated values on the object.
 
         Arguments
         ---------
@@ -34,7 +34,16 @@ class Guild():
             prefix: str
         """
         await _update_guild(self.guild_id, **kwargs)
-        await self.refresh()
+        if 'prefix' in kwargs: self.prefix = kwargs['prefix']
+
+
+RPG_PREFIX = 'rpg '
+
+# Prefix of every guild that sent a message since startup, read by get_all_prefixes and dropped by _update_guild
+guild_prefixes: Dict[int, str] = {}
+# Counts updates. It goes up when an update starts and again when it is done, so get_all_prefixes only caches a
+# prefix if no update started or finished while it was read.
+_updates = 0
 
 
 # Miscellaneous functions
@@ -68,28 +77,22 @@ async def _dict_to_guild(record: dict) -> Guild:
     return guild
 
 
-async def _get_mixed_case_prefixes(prefix: str) -> List[str]:
-    """Turns a string into a list of all mixed case variations of said string
-
-    Returns
-    -------
-    All mixed case variations: List[str]
-    """
-    mixed_prefixes = []
-    all_prefixes = map(''.join, itertools.product(*((char.upper(), char.lower()) for char in prefix)))
-    for prefix in list(all_prefixes):
-        mixed_prefixes.append(prefix)
-    return mixed_prefixes
+def _match_prefix(content: str, prefix: str) -> str:
+    """Returns the start of the message content if it matches the prefix regardless of case, the prefix if not.
+    This way discord finds the prefix in the message without having to try every mixed case variant of it."""
+    content_start = content[:len(prefix)]
+    return content_start if content_start.lower() == prefix.lower() else prefix
 
 
 # Read data
-async def get_all_prefixes(bot: commands.Bot, ctx: commands.Context) -> Tuple:
-    """Gets all prefixes. If no prefix is found, a record for the guild is created with the
-    default prefix.
+async def get_all_prefixes(bot: commands.Bot, message: discord.Message) -> List[str]:
+    """Gets all prefixes. The guild prefix is cached in guild_prefixes. If no prefix is found, a record for the
+    guild is created with the default prefix.
+    Prefixes are case insensitive. If the message starts with one, it is returned as written in the message.
 
     Returns
     -------
-    A tuple with the current server prefix, all "rpg" prefixes and the pingable bot
+    A list with the pingable bot, the "rpg" prefix and the current server prefix
 
     Raises
     ------
@@ -97,32 +100,30 @@ async def get_all_prefixes(bot: commands.Bot, ctx: commands.Context) -> Tuple:
     """
     table = 'guilds'
     function_name = 'get_all_prefixes'
-    sql = f'SELECT prefix FROM {table} WHERE guild_id=?'
-    guild_id = ctx.guild.id
-    try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (guild_id,))
-        record = cur.fetchone()
-        prefixes = ['rpg ','Rpg ','rPg ','rpG ','RPg ','rPG ','RpG ','RPG ']
-        if record:
-            prefix_db = record['prefix'].replace('"','')
-            prefix_db_mixed_case = await _get_mixed_case_prefixes(prefix_db)
-            for prefix in prefix_db_mixed_case:
-                prefixes.append(prefix)
-        else:
-            sql = f'INSERT INTO {table} (guild_id, prefix) VALUES (?, ?)'
-            cur.execute(sql, (guild_id, settings.DEFAULT_PREFIX,))
-            prefix_default_mixed_case = await _get_mixed_case_prefixes(settings.DEFAULT_PREFIX)
-            for prefix in prefix_default_mixed_case:
-                prefixes.append(prefix)
-    except sqlite3.Error as error:
-        await errors.log_error(
-            strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql),
-            ctx
-        )
-        raise
-
-    return commands.when_mentioned_or(*prefixes)(bot, ctx)
+    guild_id = message.guild.id
+    prefix = guild_prefixes.get(guild_id)
+    if prefix is None:
+        updates = _updates
+        sql = f'SELECT prefix FROM {table} WHERE guild_id=?'
+        try:
+            record = await connection.fetchone(sql, (guild_id,))
+            if record:
+                prefix = record['prefix'].replace('"','')
+            else:
+                sql = f'INSERT INTO {table} (guild_id, prefix) VALUES (?, ?)'
+                await connection.execute(sql, (guild_id, settings.DEFAULT_PREFIX,))
+                prefix = settings.DEFAULT_PREFIX
+        except sqlite3.Error as error:
+            await errors.log_error(
+                strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql),
+                message
+            )
+            raise
+        # An update during the query might not be in the record
+        if updates == _updates: guild_prefixes[guild_id] = prefix
+    prefixes = [_match_prefix(message.content, RPG_PREFIX), _match_prefix(message.content, prefix)]
+
+    return commands.when_mentioned_or(*prefixes)(bot, message)
 
 
 async def get_guild(guild_id: int) -> Guild:
@@ -143,9 +144,7 @@ async def get_guild(guild_id: int) -> Guild:
     function_name = 'get_guild'
     sql = f'SELECT * FROM {table} WHERE guild_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (guild_id,))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (guild_id,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -173,6 +172,7 @@ async def _update_guild(guild_id: int, **kwargs) -> None:
     NoArgumentsError if no kwargs are passed (need to pass at least one)
     Also logs all errors to the database.
     """
+    global _updates
     table = 'guilds'
     function_name = '_update_guild'
     if not kwargs:
@@ -180,15 +180,16 @@ async def _update_guild(guild_id: int, **kwargs) -> None:
             strings.INTERNAL_ERROR_NO_ARGUMENTS.format(table=table, function=function_name)
         )
         raise exceptions.NoArgumentsError('You need to specify at least one keyword argument.')
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
+        sql = await statements.update_sql(table, kwargs, 'guild_id = :guild_id')
         kwargs['guild_id'] = guild_id
-        sql = f'{sql} WHERE guild_id = :guild_id'
-        cur.execute(sql, kwargs)
+        _updates += 1
+        try:
+            await connection.execute(sql, kwargs)
+        finally:
+            _updates += 1
+            guild_prefixes.pop(guild_id, None)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
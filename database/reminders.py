@@ -4,18 +4,12 @@
 import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+import math
 import sqlite3
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from discord.ext import tasks
-
-from database import errors
-from resources import exceptions, settings, strings
-
-
-# Reminders scheduled for task creation / deletion
-scheduled_for_tasks = {}
-scheduled_for_deletion = {}
+from database import connection, errors, statements
+from resources import exceptions, strings, timing_wheel
 
 
 # Containers
@@ -37,7 +31,7 @@ class Reminder():
 
     async def delete(self) -> None:
         """Deletes the reminder record from the database. Also calls refresh().
-        Also cancels and deletes an active task for this reminder.
+        Also removes the reminder from the schedule.
 
         Raises
         ------
@@ -76,7 +70,7 @@ class Reminder():
         self.user_id = new_settings.user_id
 
     async def update(self, **kwargs) -> None:
-        """Updates the clan record in the database. Also calls refresh().
+        """Updates the reminder record in the database and sets the updated values on the object.
 
         Arguments
         ---------
@@ -87,38 +81,232 @@ class Reminder():
             custom_id: int
             end_time: datetime UTC
             message: str
-            reminder_type: str  # "clan" or "user"
             triggered: bool
             user_id: int
         """
         await _update_reminder(self, **kwargs)
-        await self.refresh()
 
 
-# Tasks
-@tasks.loop(seconds=10.0)
-async def schedule_reminders():
-    """Task that reads all due reminders from the database and schedules them for task creation"""
+@dataclass()
+class SchedulerStats():
+    """Object that summarizes the reminder schedule since startup. Times are in seconds."""
+    scheduled: int = 0
+    unscheduled: int = 0
+    wakeups: int = 0
+    due: int = 0
+    lateness: float = 0
+    lateness_max: float = 0
+    loads: int = 0
+    loaded: int = 0
+    failed_loads: int = 0
+
+    def average_lateness(self) -> float:
+        """Returns the average time between the end time of a reminder and the moment it was handed out"""
+        return self.lateness / self.due if self.due else 0
+
+
+# Schedule
+# Reminders that end before loaded_until are kept in a timing wheel, keyed by their task name. All other reminders
+# are only in the database. Once the scheduler gets within LOAD_AHEAD of loaded_until, the reminders of the next
+# LOAD_WINDOW are read from the database (using the end_time index). Memory therefore only holds the reminders of
+# the next hour or so, no matter how many reminders there are in total.
+LOAD_WINDOW = timedelta(hours=1)
+LOAD_AHEAD = timedelta(minutes=10)
+LOAD_RETRY_SECONDS = 10
+EPOCH = datetime(1970, 1, 1)
+
+
+def _get_seconds(time: datetime) -> float:
+    """Returns the seconds since EPOCH of a naive UTC datetime"""
+    return (time - EPOCH).total_seconds()
+
+
+def _get_tick(time: datetime) -> int:
+    """Returns the timing wheel tick (second) of a naive UTC end time, rounded up so a reminder is never early"""
+    return math.ceil(_get_seconds(time))
+
+
+scheduled_reminders = timing_wheel.TimingWheel(math.floor(_get_seconds(datetime.utcnow())))
+loaded_until: Optional[datetime] = None
+_next_load_time: Optional[datetime] = None
+_load_task: Optional[asyncio.Task] = None
+_wakeup_time: Optional[float] = None # Seconds since EPOCH the scheduler sleeps until, None if it waits for a change
+_schedule_changed: Optional[asyncio.Event] = None
+_changed_while_loading: Optional[Set[str]] = None
+scheduler_stats = SchedulerStats()
+
+
+def _get_schedule_changed() -> asyncio.Event:
+    """Returns the event that wakes the scheduler. It is created on first use, so it belongs to the running loop."""
+    global _schedule_changed
+    if _schedule_changed is None: _schedule_changed = asyncio.Event()
+    return _schedule_changed
+
+
+def schedule_reminder(reminder: Reminder) -> None:
+    """Schedules a reminder for its end time. Replaces the earlier schedule of the same reminder.
+    Reminders that end after loaded_until are left to the database, they are scheduled when their window is loaded.
+    """
+    if _changed_while_loading is not None: _changed_while_loading.add(reminder.task_name)
+    if loaded_until is None or reminder.end_time >= loaded_until:
+        scheduled_reminders.cancel(reminder.task_name)
+        return
+    tick = _get_tick(reminder.end_time)
+    scheduled_reminders.add(reminder.task_name, tick, reminder)
+    scheduler_stats.scheduled += 1
+    if _wakeup_time is None or tick < _wakeup_time: _get_schedule_changed().set()
+
+
+def unschedule_reminder(task_name: str) -> None:
+    """Removes a reminder from the schedule if it is scheduled"""
+    if _changed_while_loading is not None: _changed_while_loading.add(task_name)
+    if scheduled_reminders.cancel(task_name): scheduler_stats.unscheduled += 1
+
+
+def _pop_due_reminders(current_time: datetime) -> List[Reminder]:
+    """Removes all reminders that are due at current_time from the schedule and returns them"""
+    due_reminders = []
+    for _, reminder in scheduled_reminders.advance(math.floor(_get_seconds(current_time))):
+        lateness = (current_time - reminder.end_time).total_seconds()
+        scheduler_stats.due += 1
+        scheduler_stats.lateness += lateness
+        scheduler_stats.lateness_max = max(lateness, scheduler_stats.lateness_max)
+        due_reminders.append(reminder)
+    return due_reminders
+
+
+async def _load_window(start_time: datetime, end_time: datetime) -> None:
+    """Moves loaded_until to end_time and schedules the reminders that end from start_time to end_time.
+    Reminders that are scheduled or unscheduled while this is running are left as they are, their state is newer
+    than what was read. If the read fails, loaded_until is set back to start_time.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    LookupError if something goes wrong reading a record.
+    Also logs all errors to the database.
+    """
+    global loaded_until, _next_load_time, _changed_while_loading
+    loaded_until = end_time
+    _changed_while_loading = changed_reminders = set()
     try:
-        due_user_reminders = await get_due_user_reminders()
+        window_reminders = await get_reminders_by_end_time(start_time, end_time)
     except exceptions.NoDataFoundError:
-        due_user_reminders = ()
+        window_reminders = ()
+    except:
+        loaded_until = start_time
+        scheduler_stats.failed_loads += 1
+        raise
+    finally:
+        _changed_while_loading = None
+    for reminder in window_reminders:
+        if reminder.task_name in changed_reminders or reminder.task_name in scheduled_reminders: continue
+        scheduled_reminders.add(reminder.task_name, _get_tick(reminder.end_time), reminder)
+    scheduler_stats.loads += 1
+    scheduler_stats.loaded += len(window_reminders)
+    _next_load_time = end_time - LOAD_AHEAD
+
+
+async def _load_next_window() -> None:
+    """Loads the next window and wakes the scheduler. If that fails, the load is retried after LOAD_RETRY_SECONDS."""
+    global _next_load_time
     try:
-        due_clan_reminders = await get_due_clan_reminders()
-    except exceptions.NoDataFoundError:
-        due_clan_reminders = ()
-    due_reminders = list(due_user_reminders) + list(due_clan_reminders)
-    for reminder in due_reminders:
+        await _load_window(loaded_until, loaded_until + LOAD_WINDOW)
+    except (sqlite3.Error, LookupError):
+        _next_load_time = datetime.utcnow() + timedelta(seconds=LOAD_RETRY_SECONDS)
+    _get_schedule_changed().set()
+
+
+async def get_due_reminders() -> List[Reminder]:
+    """Waits until the next scheduled reminder is due and returns all reminders that are due by then.
+    The returned reminders are removed from the schedule. Also loads the next window of reminders when it is time.
+
+    Returns
+    -------
+    List[Reminder] sorted by end time, never empty.
+    """
+    global _load_task, _wakeup_time
+    schedule_changed = _get_schedule_changed()
+    while True:
+        schedule_changed.clear()
+        current_time = datetime.utcnow()
+        if _next_load_time is not None and current_time >= _next_load_time and _load_task is None:
+            _load_task = asyncio.create_task(_load_next_window())
+            _load_task.add_done_callback(_clear_load_task)
+        due_reminders = _pop_due_reminders(current_time)
+        if due_reminders: return due_reminders
+        wakeup_times = []
+        next_tick = scheduled_reminders.next_tick()
+        if next_tick is not None: wakeup_times.append(next_tick)
+        if _next_load_time is not None and _load_task is None: wakeup_times.append(_get_seconds(_next_load_time))
+        _wakeup_time = min(wakeup_times) if wakeup_times else None
+        timeout = _wakeup_time - _get_seconds(current_time) if _wakeup_time is not None else None
         try:
-            scheduled_for_tasks[reminder.task_name] = reminder
-            await reminder.update(triggered=True)
-        except Exception as error:
-            await errors.log_error(
-                f'Error scheduling a reminder.\nFunction: schedule_reminders\nReminder: {reminder}\nError: {error}'
-        )
+            await asyncio.wait_for(schedule_changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup_time = None
+        scheduler_stats.wakeups += 1
+
+
+def _clear_load_task(task: asyncio.Task) -> None:
+    """Forgets the finished load task"""
+    global _load_task
+    _load_task = None
+
+
+async def load_reminders() -> None:
+    """Schedules the active reminders of the first window from the database. Call this once on startup.
+    If the read fails, get_due_reminders retries the load after LOAD_RETRY_SECONDS, like any other window.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    LookupError if something goes wrong reading a record.
+    Also logs all errors to the database.
+    """
+    global _next_load_time
+    if loaded_until is not None: return
+    current_time = datetime.utcnow().replace(microsecond=0)
+    scheduled_reminders.advance(_get_tick(current_time)) # Nothing is scheduled yet, this only moves the wheel to now
+    try:
+        await _load_window(current_time, current_time + LOAD_WINDOW)
+    except (sqlite3.Error, LookupError):
+        _next_load_time = datetime.utcnow() + timedelta(seconds=LOAD_RETRY_SECONDS)
+        raise
+    finally:
+        _get_schedule_changed().set()
 
 
 # Miscellaneous functions
+def _get_task_name(activity: str, user_id: Optional[int], clan_name: Optional[str],
+                   custom_id: Optional[int]) -> str:
+    """Returns the unique task name of a reminder"""
+    if user_id is None: return f'{clan_name}-{activity}'
+    if custom_id is not None: return f'{user_id}-{activity}-{custom_id}'
+    return f'{user_id}-{activity}'
+
+
+def _apply_columns(reminder: Reminder, columns: Dict[str, Any]) -> None:
+    """Sets the values of updated columns on a Reminder object, converted the same way _dict_to_reminder does.
+
+    Raises
+    ------
+    LookupError if a column has no matching attribute on Reminder.
+    """
+    for column, value in columns.items():
+        if column == 'end_time':
+            reminder.end_time = datetime.fromisoformat(value) if isinstance(value, str) else value
+        elif column == 'triggered':
+            reminder.triggered = bool(value)
+        elif column in ('activity', 'channel_id', 'clan_name', 'custom_id', 'message', 'user_id'):
+            setattr(reminder, column, value)
+        else:
+            raise LookupError(f'Reminder has no column "{column}".')
+    reminder.task_name = _get_task_name(reminder.activity, reminder.user_id, reminder.clan_name,
+                                        reminder.custom_id)
+
+
 async def _dict_to_reminder(record: dict) -> Reminder:
     """Creates a Reminder object from a database record
 
@@ -138,15 +326,8 @@ async def _dict_to_reminder(record: dict) -> Reminder:
     try:
         user_id = record.get('user_id', None)
         custom_id = record.get('custom_id', None)
-        if user_id is None:
-            reminder_type = 'clan'
-            task_name = f"{record['clan_name']}-{record['activity']}"
-        else:
-            reminder_type = 'user'
-            if custom_id is not None:
-                task_name = f"{user_id}-{record['activity']}-{custom_id}"
-            else:
-                task_name = f"{user_id}-{record['activity']}"
+        reminder_type = 'clan' if user_id is None else 'user'
+        task_name = _get_task_name(record['activity'], user_id, record.get('clan_name', None), custom_id)
         reminder = Reminder(
             activity = record['activity'],
             channel_id = record['channel_id'],
@@ -198,9 +379,9 @@ async def get_user_reminder(user_id: int, activity: str, custom_id: Optional[int
     sql = f'SELECT * FROM {table} WHERE user_id=? AND activity=?'
     if custom_id is not None: sql = f'{sql} AND custom_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id, activity)) if custom_id is None else cur.execute(sql, (user_id, activity, custom_id))
-        record = cur.fetchone()
+        record = await connection.fetchone(
+            sql, (user_id, activity) if custom_id is None else (user_id, activity, custom_id)
+        )
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -233,9 +414,7 @@ async def get_clan_reminder(clan_name: str) -> Reminder:
     function_name = 'get_clan_reminder'
     sql = f'SELECT * FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name,))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -288,9 +467,7 @@ async def get_active_user_reminders(user_id: Optional[int] = None, activity: Opt
         queries.append(f'{activity}%')
     sql = f'{sql} ORDER BY end_time'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, queries)
-        records = cur.fetchall()
+        records = await connection.fetchall(sql, queries)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -330,11 +507,11 @@ async def get_active_clan_reminders(clan_name: Optional[str] = None) -> Tuple[Re
     else:
         sql = f'SELECT * FROM {table} WHERE clan_name=? AND end_time>? ORDER BY end_time'
     try:
-        cur = settings.NAVI_DB.cursor()
         current_time = datetime.utcnow().replace(microsecond=0)
         current_time_str = current_time.isoformat(sep=' ')
-        cur.execute(sql, (current_time_str,)) if clan_name is None else cur.execute(sql, (clan_name, current_time_str))
-        records = cur.fetchall()
+        records = await connection.fetchall(
+            sql, (current_time_str,) if clan_name is None else (clan_name, current_time_str)
+        )
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -375,17 +552,15 @@ async def get_due_user_reminders(user_id: Optional[int] = None) -> Tuple[Reminde
     else:
         sql = f'SELECT * FROM {table} WHERE user_id=? AND triggered=? AND end_time BETWEEN ? AND ?'
     try:
-        cur = settings.NAVI_DB.cursor()
         current_time = datetime.utcnow().replace(microsecond=0)
         end_time = current_time + timedelta(seconds=15)
         current_time_str = current_time.isoformat(sep=' ')
         end_time_str = end_time.isoformat(sep=' ')
         triggered = False
         if user_id is None:
-            cur.execute(sql, (triggered, current_time_str, end_time_str))
+            records = await connection.fetchall(sql, (triggered, current_time_str, end_time_str))
         else:
-            cur.execute(sql, (user_id, triggered, current_time_str, end_time_str))
-        records = cur.fetchall()
+            records = await connection.fetchall(sql, (user_id, triggered, current_time_str, end_time_str))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -426,17 +601,15 @@ async def get_due_clan_reminders(clan_name: Optional[str] = None) -> Tuple[Remin
     else:
         sql = f'SELECT * FROM {table} WHERE clan_name=? AND triggered=? AND end_time BETWEEN ? AND ?'
     try:
-        cur = settings.NAVI_DB.cursor()
         current_time = datetime.utcnow().replace(microsecond=0)
         end_time  = current_time + timedelta(seconds=15)
         current_time_str = current_time.isoformat(sep=' ')
         end_time_str = end_time.isoformat(sep=' ')
         triggered = False
         if clan_name is None:
-            cur.execute(sql, (triggered, current_time_str, end_time_str))
+            records = await connection.fetchall(sql, (triggered, current_time_str, end_time_str))
         else:
-            cur.execute(sql, (clan_name, triggered, current_time_str, end_time_str))
-        records = cur.fetchall()
+            records = await connection.fetchall(sql, (clan_name, triggered, current_time_str, end_time_str))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -477,12 +650,10 @@ async def get_old_user_reminders(user_id: Optional[int] = None) -> Tuple[Reminde
     else:
         sql = f'SELECT * FROM {table} WHERE user_id=? AND end_time < ?'
     try:
-        cur = settings.NAVI_DB.cursor()
         current_time = datetime.utcnow().replace(microsecond=0)
         end_time  = current_time - timedelta(seconds=20)
         end_time_str = end_time.isoformat(sep=' ')
-        cur.execute(sql, (end_time_str,)) if user_id is None else cur.execute(sql, (user_id, end_time_str))
-        records = cur.fetchall()
+        records = await connection.fetchall(sql, (end_time_str,) if user_id is None else (user_id, end_time_str))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -523,12 +694,10 @@ async def get_old_clan_reminders(clan_name: Optional[str] = None) -> Tuple[Remin
     else:
         sql = f'SELECT * FROM {table} WHERE clan_name=? AND end_time < ?'
     try:
-        cur = settings.NAVI_DB.cursor()
         current_time = datetime.utcnow().replace(microsecond=0)
         end_time  = current_time - timedelta(seconds=20)
         end_time_str = end_time.isoformat(sep=' ')
-        cur.execute(sql, (end_time_str,)) if clan_name is None else cur.execute(sql, (clan_name, end_time_str))
-        records = cur.fetchall()
+        records = await connection.fetchall(sql, (end_time_str,) if clan_name is None else (clan_name, end_time_str))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -547,10 +716,49 @@ async def get_old_clan_reminders(clan_name: Optional[str] = None) -> Tuple[Remin
     return tuple(reminders)
 
 
+async def get_reminders_by_end_time(start_time: datetime, end_time: datetime) -> Tuple[Reminder]:
+    """Gets all user and clan reminders that end from start_time (inclusive) to end_time (exclusive).
+
+    Returns
+    -------
+    Tuple[Reminder] sorted by end time
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    exceptions.NoDataFoundError if no reminder was found.
+    LookupError if something goes wrong reading the dict.
+    Also logs all errors to the database.
+    """
+    function_name = 'get_reminders_by_end_time'
+    start_time_str = start_time.isoformat(sep=' ')
+    end_time_str = end_time.isoformat(sep=' ')
+    records = []
+    for table in ('reminders_users', 'reminders_clans'):
+        sql = f'SELECT * FROM {table} WHERE end_time >= ? AND end_time < ?'
+        try:
+            records += await connection.fetchall(sql, (start_time_str, end_time_str))
+        except sqlite3.Error as error:
+            await errors.log_error(
+                strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
+            )
+            raise
+
+    if not records:
+        raise exceptions.NoDataFoundError(f'No reminders found in database from {start_time} to {end_time}.')
+    reminders = []
+    for record in records:
+        reminder = await _dict_to_reminder(dict(record))
+        reminders.append(reminder)
+    reminders.sort(key=lambda reminder: reminder.end_time)
+
+    return tuple(reminders)
+
+
 # Write Data
 async def _delete_reminder(reminder: Reminder) -> None:
     """Deletes reminder record. Use Reminder.delete() to trigger this function.
-    Also cancels and deletes an active task for this reminder.
+    Also removes the reminder from the schedule.
 
     Raises
     ------
@@ -567,17 +775,17 @@ async def _delete_reminder(reminder: Reminder) -> None:
         sql = f'DELETE FROM {table} WHERE clan_name=? AND activity=?'
     if reminder.activity == 'custom': sql = f'{sql} AND custom_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
         reminder_id = reminder.user_id if reminder.reminder_type == 'user' else reminder.clan_name
         if reminder.activity == 'custom':
-            cur.execute(sql, (reminder_id, reminder.activity, reminder.custom_id))
+            await connection.execute(sql, (reminder_id, reminder.activity, reminder.custom_id))
         else:
-            cur.execute(sql, (reminder_id, reminder.activity))
+            await connection.execute(sql, (reminder_id, reminder.activity))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
+    unschedule_reminder(reminder.task_name)
 
 
 async def _update_reminder(reminder: Reminder, **kwargs) -> None:
@@ -593,7 +801,6 @@ async def _update_reminder(reminder: Reminder, **kwargs) -> None:
         custom_id: int
         end_time: datetime UTC
         message: str
-        reminder_type: str  # "clan" or "user"
         triggered: bool
         user_id: int
 
@@ -615,30 +822,34 @@ async def _update_reminder(reminder: Reminder, **kwargs) -> None:
     time_left = end_time - current_time
     triggered = False if time_left.total_seconds() > 15 else True
     if 'triggered' not in kwargs: kwargs['triggered'] = triggered
+    columns = dict(kwargs)
+    kwargs['activity_old'] = reminder.activity
+    where = 'activity = :activity_old'
+    if reminder.reminder_type == 'user':
+        kwargs['user_id_old'] = reminder.user_id
+        where = f'{where} AND user_id = :user_id_old'
+    else:
+        kwargs['clan_name_old'] = reminder.clan_name
+        where = f'{where} AND clan_name = :clan_name_old'
+    if reminder.activity == 'custom':
+        kwargs['custom_id_old'] = reminder.custom_id
+        where = f'{where} AND custom_id = :custom_id_old'
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
-        kwargs['activity_old'] = reminder.activity
-        sql = f'{sql} WHERE activity = :activity_old'
-        if reminder.reminder_type == 'user':
-            kwargs['user_id_old'] = reminder.user_id
-            sql = f'{sql} AND user_id = :user_id_old'
-        else:
-            kwargs['clan_name_old'] = reminder.clan_name
-            sql = f'{sql} AND clan_name = :clan_name_old'
-        if reminder.activity == 'custom':
-            kwargs['custom_id_old'] = reminder.custom_id
-            sql = f'{sql} AND custom_id = :custom_id_old'
-        cur.execute(sql, kwargs)
+        sql = await statements.update_sql(table, columns, where)
+        await connection.execute(sql, kwargs)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
-    if triggered: scheduled_for_tasks[reminder.task_name] = reminder
+    task_name = reminder.task_name
+    try:
+        _apply_columns(reminder, columns)
+    except LookupError:
+        await reminder.refresh()
+    if reminder.task_name != task_name: unschedule_reminder(task_name)
+    schedule_reminder(reminder)
 
 
 async def insert_user_reminder(user_id: int, activity: str, time_left: timedelta,
@@ -646,7 +857,7 @@ async def insert_user_reminder(user_id: int, activity: str, time_left: timedelta
     """Inserts a user reminder record.
     This function first checks if a reminder exists. If yes, the existing reminder will be updated instead and
     no new record is inserted.
-    If end_time is less than 16 seconds in the future, this also creates a background task.
+    The reminder is scheduled for its end time.
 
     Arguments
     ---------
@@ -668,11 +879,9 @@ async def insert_user_reminder(user_id: int, activity: str, time_left: timedelta
     custom_id = None
     triggered = False if time_left.total_seconds() > 15 else True
     try:
-        cur = settings.NAVI_DB.cursor()
         if activity == 'custom':
             sql = f'SELECT custom_id FROM {table} WHERE user_id = ? AND activity = ? ORDER BY custom_id ASC'
-            cur.execute(sql, (user_id, 'custom',))
-            record_custom_reminders = cur.fetchall()
+            record_custom_reminders = await connection.fetchall(sql, (user_id, 'custom',))
             if not record_custom_reminders:
                 custom_id = 1
             else:
@@ -713,19 +922,26 @@ async def insert_user_reminder(user_id: int, activity: str, time_left: timedelta
             f'VALUES (?, ?, ?, ?, ?, ?, ?)'
         )
         try:
-            cur.execute(sql, (user_id, activity, end_time, channel_id, message, custom_id, triggered))
+            await connection.execute(sql, (user_id, activity, end_time, channel_id, message, custom_id, triggered))
         except sqlite3.Error as error:
             await errors.log_error(
                 strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
             )
             raise
-        reminder = await get_user_reminder(user_id, activity, custom_id)
+        reminder = Reminder(
+            activity = activity,
+            channel_id = channel_id,
+            clan_name = None,
+            custom_id = custom_id,
+            end_time = end_time,
+            message = message,
+            reminder_type = 'user',
+            task_name = _get_task_name(activity, user_id, None, custom_id),
+            triggered = triggered,
+            user_id = user_id,
+        )
 
-    # Create background task if necessary
-    if triggered:
-        scheduled_for_tasks[reminder.task_name] = reminder
-    else:
-        scheduled_for_deletion[reminder.task_name] = reminder
+        schedule_reminder(reminder)
 
     return reminder
 
@@ -734,7 +950,7 @@ async def insert_clan_reminder(clan_name: str, time_left: timedelta, channel_id:
     """Inserts a clan reminder record.
     This function first checks if a reminder exists. If yes, the existing reminder will be updated instead and
     no new record is inserted.
-    If end_time is less than 16 seconds in the future, this also creates a background task.
+    The reminder is scheduled for its end time.
 
     Returns
     -------
@@ -763,19 +979,25 @@ async def insert_clan_reminder(clan_name: str, time_left: timedelta, channel_id:
             f'VALUES (?, ?, ?, ?, ?, ?)'
         )
         try:
-            cur = settings.NAVI_DB.cursor()
-            cur.execute(sql, (clan_name, 'guild', end_time, channel_id, message, triggered))
+            await connection.execute(sql, (clan_name, 'guild', end_time, channel_id, message, triggered))
         except sqlite3.Error as error:
             await errors.log_error(
                 strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
             )
             raise
-        reminder = await get_clan_reminder(clan_name)
-    # Create background task if necessary
-    if triggered:
-        scheduled_for_tasks[reminder.task_name] = reminder
-    else:
-        scheduled_for_deletion[reminder.task_name] = reminder
+        reminder = Reminder(
+            activity = 'guild',
+            channel_id = channel_id,
+            clan_name = clan_name,
+            custom_id = None,
+            end_time = end_time,
+            message = message,
+            reminder_type = 'clan',
+            task_name = _get_task_name('guild', None, clan_name, None),
+            triggered = triggered,
+            user_id = None,
+        )
+        schedule_reminder(reminder)
     return reminder
 
 
@@ -794,10 +1016,8 @@ async def reduce_reminder_time(user_id: int, time_reduction: timedelta) -> None:
             new_end_time = reminder.end_time - time_reduction
             time_left = new_end_time - current_time
             if time_left.total_seconds() <= 0:
-                scheduled_for_deletion[reminder.task_name] = reminder
                 await reminder.delete()
             elif 1 <= time_left.total_seconds() <= 15:
                 await reminder.update(end_time=new_end_time, triggered=True)
-                scheduled_for_tasks[reminder.task_name] = reminder
             else:
                 await reminder.update(end_time=new_end_time)
\ No newline at end of file
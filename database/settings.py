@@ -5,8 +5,8 @@
 from argparse import ArgumentError
 import sqlite3
 
-from database import errors
-from resources import exceptions, settings, strings
+from database import connection, errors
+from resources import exceptions, strings
 
 
 # Read Data
@@ -24,9 +24,7 @@ async def get_settings() -> dict:
     function_name = 'get_settings'
     sql = f'SELECT * FROM {table}'
     try:
-        cur=settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        records = cur.fetchall()
+        records = await connection.fetchall(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -65,16 +63,15 @@ async def update_setting(name: str, value: str) -> None:
             )
         )
         raise ArgumentError('Arguments can\'t be None.')
-    cur = settings.NAVI_DB.cursor()
     all_settings = await get_settings()
     setting = all_settings.get(name, 'No record')
     try:
         if setting == 'No record':
             sql = f'INSERT INTO {table} (name, value) VALUES (?, ?)'
-            cur.execute(sql, (name, value))
+            await connection.execute(sql, (name, value))
         else:
             sql = f'UPDATE {table} SET value = ? WHERE name = ?'
-            cur.execute(sql, (value, name))
+            await connection.execute(sql, (value, name))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -0,0 +1,66 @@
+# statements.py
+"""Builds the UPDATE statements of the _update_* functions.
+
+The statements are cached by table, updated columns and WHERE clause. The same update always gets the exact same
+statement text, so sqlite3 can reuse the prepared statement from its statement cache instead of preparing it again.
+Columns are checked against the columns of the table, so only real column names ever end up in the statement.
+"""
+
+from dataclasses import dataclass
+import sqlite3
+from typing import Dict, FrozenSet, Iterable, Tuple
+
+from database import connection
+
+
+# Containers
+@dataclass()
+class StatementCacheStats():
+    """Object that summarizes the statement cache since startup"""
+    hits: int = 0
+    misses: int = 0
+
+
+table_columns: Dict[str, FrozenSet[str]] = {}
+update_statements: Dict[Tuple[str, FrozenSet[str], str], str] = {}
+stats = StatementCacheStats()
+
+
+# Functions
+async def get_table_columns(table: str) -> FrozenSet[str]:
+    """Returns the column names of a table. They are read from the schema once per table."""
+    columns = table_columns.get(table)
+    if columns is not None: return columns
+    records = await connection.fetchall(f'PRAGMA table_info({table})')
+    columns = table_columns[table] = frozenset(record['name'] for record in records)
+    return columns
+
+
+async def update_sql(table: str, columns: Iterable[str], where: str) -> str:
+    """Returns an UPDATE statement that sets the given columns to the named parameters of the same name.
+
+    Arguments
+    ---------
+    table: str
+    columns: The column names to update
+    where: WHERE clause with named parameters, e.g. "user_id = :user_id"
+
+    Raises
+    ------
+    sqlite3.OperationalError if the table doesn't have one of the columns.
+    """
+    columns = frozenset(columns)
+    key = (table, columns, where)
+    sql = update_statements.get(key)
+    if sql is not None:
+        stats.hits += 1
+        return sql
+    stats.misses += 1
+    unknown_columns = columns - await get_table_columns(table)
+    if unknown_columns:
+        raise sqlite3.OperationalError(
+            f'Table {table} has no column(s) {", ".join(sorted(unknown_columns))}.'
+        )
+    assignments = ', '.join(f'{column} = :{column}' for column in sorted(columns))
+    sql = update_statements[key] = f'UPDATE {table} SET {assignments} WHERE {where}'
+    return sql
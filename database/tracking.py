@@ -2,15 +2,26 @@
 """Provides access to the tables "tracking_log" and "tracking_leaderboard" in the database"""
 
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import sqlite3
-from typing import NamedTuple, Optional, Tuple
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 from discord.ext import tasks
 
-from database import errors, users
-from resources import exceptions, settings, strings
+from database import connection, errors, statements, users
+from resources import exceptions, strings
+
+
+LOG_FLUSH_ROWS = 100 # Queued log entries are written once there are this many...
+LOG_FLUSH_SECONDS = 2 # ...or once the oldest one waited this long
+LOG_QUEUE_MAX = 5_000 # Queued and unwritten log entries. insert_log_entry waits for a flush above this.
+# Log entries are counted in minute buckets. compact_log_entries rolls them into hour buckets after
+# LOG_MINUTE_BUCKETS_KEPT and those into day buckets after LOG_HOUR_BUCKETS_KEPT.
+LOG_MINUTE_BUCKETS_KEPT = timedelta(days=2)
+LOG_HOUR_BUCKETS_KEPT = timedelta(days=35)
 
 
 # Containers
@@ -103,7 +114,7 @@ class LogLeaderboardUser():
         self.user_id = new_settings.user_id
 
     async def update(self, **kwargs) -> None:
-        """Updates the leaderboard record in the database. Also calls refresh().
+        """Updates the leaderboard record in the database and sets the updated values on the object.
 
         Arguments
         ---------
@@ -121,7 +132,35 @@ class LogLeaderboardUser():
             updated: datetime UTC - If not specified, will be set to current time
         """
         await _update_log_leaderboard_user(self, **kwargs)
-        await self.refresh()
+
+@dataclass()
+class LogQueueStats():
+    """Object that summarizes the tracking log write queue since startup. Times are in seconds."""
+    queued: int = 0
+    flushes: int = 0
+    flushed_rows: int = 0
+    flush_size_max: int = 0
+    flush_time: float = 0
+    flush_time_max: float = 0
+    failed_flushes: int = 0
+    full_queue_waits: int = 0
+
+    def average_flush_size(self) -> float:
+        """Returns the average number of log entries per flush"""
+        return self.flushed_rows / self.flushes if self.flushes else 0
+
+    def average_flush_time(self) -> float:
+        """Returns the average time a flush took to write"""
+        return self.flush_time / self.flushes if self.flushes else 0
+
+
+# Log entries waiting for the next flush, see insert_log_entry
+log_queue: List[Tuple[int, int, str, int, datetime]] = []
+log_queue_stats = LogQueueStats()
+_flush_tasks: Set[asyncio.Task] = set()
+_flush_timer: Optional[asyncio.TimerHandle] = None
+_unwritten_rows = 0
+
 
 # Tasks
 @tasks.loop(minutes=5.0)
@@ -162,6 +201,25 @@ async def log_to_leaderboard():
         await insert_log_leaderboard_user(user.user_id, )
 
 # Miscellaneous functions
+def _apply_leaderboard_columns(log_leaderboard_user: LogLeaderboardUser, columns: Dict[str, Any]) -> None:
+    """Sets the values of updated columns on a LogLeaderboardUser object, converted the same way
+    _dict_to_leaderboard_user does.
+
+    Raises
+    ------
+    LookupError if a column has no matching attribute on LogLeaderboardUser.
+    """
+    for column, value in columns.items():
+        if column == 'updated':
+            log_leaderboard_user.updated = datetime.fromisoformat(value) if isinstance(value, str) else value
+        elif column in ('all_time', 'command', 'guild_id', 'last_1h', 'last_12h', 'last_24h', 'last_7d', 'last_4w',
+                        'last_12m', 'user_id'):
+            setattr(log_leaderboard_user, column, value)
+        else:
+            raise LookupError(f'LogLeaderboardUser has no column "{column}".')
+    log_leaderboard_user.report_type = 'global' if log_leaderboard_user.guild_id is None else 'guild'
+
+
 async def _dict_to_log_entry(record: dict) -> LogEntry:
     """Creates a LogEntry object from a database record
 
@@ -252,13 +310,12 @@ async def get_log_entry(user_id: int, command: str, date_time: datetime) -> LogE
     LookupError if something goes wrong reading the dict.
     Also logs all errors to the database.
     """
+    await flush_log_entries()
     table = 'tracking_log'
     function_name = 'get_log_entry'
     sql = f'SELECT * FROM {table} WHERE user_id=? AND command=? AND date_time>=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id, command, date_time))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (user_id, command, date_time))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -296,6 +353,7 @@ async def get_log_entries(user_id: int, command: str, timeframe: timedelta,
     LookupError if something goes wrong reading the dict.
     Also logs all errors to the database.
     """
+    await flush_log_entries()
     table = 'tracking_log'
     function_name = 'get_log_entries'
     sql = (
@@ -304,12 +362,10 @@ async def get_log_entries(user_id: int, command: str, timeframe: timedelta,
     date_time = datetime.utcnow() - timeframe
     if guild_id is not None: sql = f'{sql} AND guild_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
         if guild_id is None:
-            cur.execute(sql, (user_id, date_time, command))
+            records = await connection.fetchall(sql, (user_id, date_time, command))
         else:
-            cur.execute(sql, (user_id, date_time, command, guild_id))
-        records = cur.fetchall()
+            records = await connection.fetchall(sql, (user_id, date_time, command, guild_id))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -358,6 +414,65 @@ async def get_log_report(user_id: int, command: str, timeframe: timedelta,
     return log_report
 
 
+async def get_log_reports(user_id: int, commands: Sequence[str], timeframes: Sequence[timedelta],
+                          guild_id: Optional[int] = None) -> Dict[Tuple[str, timedelta], LogReport]:
+    """Gets summary log reports for several commands and timeframes at once from a user id, with one query.
+    If the guild_id is specified, the reports are limited to that guild.
+    Commands without log entries in a timeframe get a report with a command count of 0.
+
+    Returns
+    -------
+    dict with a LogReport object for every command and timeframe
+    key: value --> (command, timeframe): LogReport
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    Also logs all errors to the database.
+    """
+    await flush_log_entries()
+    table = 'tracking_log'
+    function_name = 'get_log_reports'
+    current_time = datetime.utcnow()
+    start_times = [current_time - timeframe for timeframe in timeframes]
+    columns = ', '.join(
+        f'SUM(CASE WHEN date_time >= ? THEN command_count ELSE 0 END) AS count_{index}'
+        for index in range(len(timeframes))
+    )
+    placeholders = ', '.join('?' * len(commands))
+    sql = (
+        f'SELECT command, {columns} FROM {table} '
+        f'WHERE user_id = ? AND command IN ({placeholders}) AND date_time >= ?'
+    )
+    parameters = [*start_times, user_id, *commands, min(start_times)]
+    if guild_id is not None:
+        sql = f'{sql} AND guild_id = ?'
+        parameters.append(guild_id)
+    sql = f'{sql} GROUP BY command'
+    try:
+        records = await connection.fetchall(sql, parameters)
+    except sqlite3.Error as error:
+        await errors.log_error(
+            strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
+        )
+        raise
+    command_counts = {record['command']: record for record in records}
+    log_reports = {}
+    for command in commands:
+        record = command_counts.get(command)
+        for index, timeframe in enumerate(timeframes):
+            log_reports[(command, timeframe)] = LogReport(
+                command = command,
+                command_count = record[f'count_{index}'] if record is not None else 0,
+                guild_id = guild_id,
+                report_type = 'guild' if guild_id is not None else 'global',
+                timeframe = timeframe,
+                user_id = user_id
+            )
+
+    return log_reports
+
+
 async def get_log_leaderboard_user(user_id: int, guild_id: int, command: str) -> LogLeaderboardUser:
     """Gets a guild or global leaderboard.
 
@@ -381,9 +496,7 @@ async def get_log_leaderboard_user(user_id: int, guild_id: int, command: str) ->
     function_name = 'get_log_leaderboard_user'
     sql = f'SELECT * FROM {table} WHERE user_id=? AND guild_id=? AND command=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id, guild_id, command))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (user_id, guild_id, command))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -423,9 +536,7 @@ async def get_log_leaderboard(command: str, guild_id: Optional[int] = None) -> T
     sql = f'SELECT * FROM {table} WHERE command=?'
     if guild_id is not None: sql = f'{sql} AND guild_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (command,)) if guild_id is None else cur.execute(sql, (command, guild_id))
-        records = cur.fetchall()
+        records = await connection.fetchall(sql, (command,) if guild_id is None else (command, guild_id))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -457,8 +568,7 @@ async def _delete_log_entry(log_entry: LogEntry) -> None:
     function_name = '_delete_log_entry'
     sql = f'DELETE FROM {table} WHERE user_id=? AND command=? AND date_time=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (log_entry.user_id, log_entry.command, log_entry.date_time))
+        await connection.execute(sql, (log_entry.user_id, log_entry.command, log_entry.date_time))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -501,53 +611,215 @@ async def _update_log_leaderboard_user(log_leaderboard_user: LogLeaderboardUser,
     current_time = datetime.utcnow().replace(microsecond=0)
     if 'updated' not in kwargs:
         kwargs['updated'] = current_time
+    columns = dict(kwargs)
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
+        sql = await statements.update_sql(
+            table, kwargs, 'user_id = :user_id_old AND guild_id = :guild_id_old AND command = :command_old'
+        )
         kwargs['user_id_old'] = log_leaderboard_user.user_id
         kwargs['guild_id_old'] = log_leaderboard_user.guild_id
         kwargs['command_old'] = log_leaderboard_user.command
-        sql = f'{sql} WHERE user_id = :user_id_old AND guild_id = :guild_id_old AND command = :command_old'
-        cur.execute(sql, kwargs)
+        await connection.execute(sql, kwargs)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
+    try:
+        _apply_leaderboard_columns(log_leaderboard_user, columns)
+    except LookupError:
+        await log_leaderboard_user.refresh()
+
+
+def _take_queued_log_entries() -> List[Tuple[int, int, str, int, datetime]]:
+    """Empties the log queue and returns the log entries that were in it"""
+    global _flush_timer
+    if _flush_timer is not None:
+        _flush_timer.cancel()
+        _flush_timer = None
+    rows = log_queue[:]
+    log_queue.clear()
+    return rows
+
+
+async def _write_log_entries(rows: List[Tuple[int, int, str, int, datetime]]) -> None:
+    """Adds log entries to their minute buckets in one transaction. Buckets are updated if they exist and inserted
+    if not.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    Also logs all errors to the database.
+    """
+    global _unwritten_rows
+    function_name = '_write_log_entries'
+    table = 'tracking_log'
+    sql_update = (
+        f'UPDATE {table} SET command_count = command_count + ? '
+        f'WHERE user_id = ? AND command = ? AND date_time = ? AND guild_id IS ?'
+    )
+    sql_insert = (
+        f'INSERT INTO {table} (command_count, user_id, command, date_time, guild_id) VALUES (?, ?, ?, ?, ?)'
+    )
+    buckets: Dict[Tuple[int, str, datetime, int], int] = {}
+    for user_id, guild_id, command, command_count, date_time in rows:
+        bucket = (user_id, command, date_time.replace(second=0, microsecond=0), guild_id)
+        buckets[bucket] = buckets.get(bucket, 0) + command_count
+    def write_buckets(writer: sqlite3.Connection) -> None:
+        for bucket, command_count in buckets.items():
+            if writer.execute(sql_update, (command_count, *bucket)).rowcount == 0:
+                writer.execute(sql_insert, (command_count, *bucket))
+    sql = sql_update
+    start_time = time.perf_counter()
+    try:
+        await connection.run(write_buckets)
+    except sqlite3.Error as error:
+        log_queue_stats.failed_flushes += 1
+        await errors.log_error(
+            strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
+        )
+        raise
+    finally:
+        _unwritten_rows -= len(rows)
+    flush_time = time.perf_counter() - start_time
+    log_queue_stats.flushes += 1
+    log_queue_stats.flushed_rows += len(rows)
+    log_queue_stats.flush_size_max = max(len(rows), log_queue_stats.flush_size_max)
+    log_queue_stats.flush_time += flush_time
+    log_queue_stats.flush_time_max = max(flush_time, log_queue_stats.flush_time_max)
+
+
+async def _write_log_entries_in_background(rows: List[Tuple[int, int, str, int, datetime]]) -> None:
+    """Writes log entries without raising errors, they are already logged by _write_log_entries"""
+    try:
+        await _write_log_entries(rows)
+    except sqlite3.Error:
+        pass
+
+
+def _start_flush() -> None:
+    """Writes all queued log entries in a background task"""
+    rows = _take_queued_log_entries()
+    if not rows: return
+    task = asyncio.ensure_future(_write_log_entries_in_background(rows))
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
+
+async def flush_log_entries() -> None:
+    """Writes all queued log entries and waits until they and all flushes still running are written.
+    Called before reading the tracking log and when the bot shuts down.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    Also logs all errors to the database.
+    """
+    running_flushes = tuple(_flush_tasks)
+    rows = _take_queued_log_entries()
+    if running_flushes: await asyncio.wait(running_flushes)
+    if rows: await _write_log_entries(rows)
 
 
 async def insert_log_entry(user_id: int, guild_id: int,
-                           command: str, date_time: datetime) -> LogEntry:
-    """Inserts a a record to the table "tracking_log".
+                           command: str, date_time: datetime) -> None:
+    """Queues a command for the table "tracking_log". Commands are counted in minute buckets, the command is added
+    to the bucket of the minute it was used in.
+    The queue is written in one transaction once it has LOG_FLUSH_ROWS entries or its oldest entry waited
+    LOG_FLUSH_SECONDS. If more than LOG_QUEUE_MAX entries are not written yet, this waits for a flush first.
+    Nothing is returned because the bucket isn't written yet. Use flush_log_entries() before reading it.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    ValueError if guild_id is None. The column can't be NULL, and the entry would fail the whole flush.
+    Also logs all errors to the database.
+    """
+    global _flush_timer, _unwritten_rows
+    if guild_id is None:
+        await errors.log_error(
+            f'Log entry without a guild for user {user_id} and command "{command}".\nFunction: insert_log_entry'
+        )
+        raise ValueError('Log entries need a guild_id.')
+    if _unwritten_rows >= LOG_QUEUE_MAX:
+        log_queue_stats.full_queue_waits += 1
+        await flush_log_entries()
+    log_queue.append((user_id, guild_id, command, 1, date_time))
+    log_queue_stats.queued += 1
+    _unwritten_rows += 1
+    if len(log_queue) >= LOG_FLUSH_ROWS:
+        _start_flush()
+    elif _flush_timer is None:
+        _flush_timer = asyncio.get_running_loop().call_later(LOG_FLUSH_SECONDS, _start_flush)
+
+
+async def _compact_buckets(cutoff: datetime, bucket_format: str, bucket_length: timedelta) -> int:
+    """Rolls all buckets before cutoff into buckets of bucket_length. cutoff has to be the start of a bucket.
+
+    Arguments
+    ---------
+    cutoff: datetime UTC
+    bucket_format: strftime format that truncates a time to the start of its bucket
+    bucket_length: timedelta
 
     Returns
     -------
-    LogEntry object with the newly created log entry.
+    Number of buckets that were created or updated
 
     Raises
     ------
     sqlite3.Error if something happened within the database.
     Also logs all errors to the database.
     """
-    function_name = 'insert_log_entry'
+    function_name = '_compact_buckets'
     table = 'tracking_log'
-    sql = (
-        f'INSERT INTO {table} (user_id, guild_id, command, command_count, date_time) VALUES (?, ?, ?, ?, ?)'
+    sql_select = (
+        f"SELECT user_id, guild_id, command, strftime('{bucket_format}', date_time) AS bucket, "
+        f"SUM(command_count) AS command_count FROM {table} WHERE date_time < ? "
+        f"GROUP BY user_id, guild_id, command, bucket HAVING COUNT(*) > 1 OR MIN(date_time) != bucket"
+    )
+    sql_delete = (
+        f'DELETE FROM {table} '
+        f'WHERE user_id = ? AND command = ? AND date_time >= ? AND date_time < ? AND guild_id IS ?'
+    )
+    sql_insert = (
+        f'INSERT INTO {table} (user_id, command, date_time, guild_id, command_count) VALUES (?, ?, ?, ?, ?)'
     )
+    def compact(writer: sqlite3.Connection) -> int:
+        records = writer.execute(sql_select, (cutoff,)).fetchall()
+        for record in records:
+            bucket_start = datetime.fromisoformat(record['bucket'])
+            writer.execute(sql_delete, (record['user_id'], record['command'], bucket_start,
+                                        bucket_start + bucket_length, record['guild_id']))
+            writer.execute(sql_insert, (record['user_id'], record['command'], bucket_start, record['guild_id'],
+                                        record['command_count']))
+        return len(records)
+    sql = sql_select
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id, guild_id, command, 1, date_time))
+        return await connection.run(compact)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
-    log_entry = await get_log_entry(user_id, command, date_time)
 
-    return log_entry
+
+async def compact_log_entries() -> None:
+    """Rolls minute buckets older than LOG_MINUTE_BUCKETS_KEPT into hour buckets and hour buckets older than
+    LOG_HOUR_BUCKETS_KEPT into day buckets.
+    Reports only lose precision at the start of their timeframe, by at most the length of the bucket there.
+
+    Raises
+    ------
+    sqlite3.Error if something happened within the database.
+    Also logs all errors to the database.
+    """
+    current_time = datetime.utcnow()
+    hour_cutoff = (current_time - LOG_MINUTE_BUCKETS_KEPT).replace(minute=0, second=0, microsecond=0)
+    day_cutoff = (current_time - LOG_HOUR_BUCKETS_KEPT).replace(hour=0, minute=0, second=0, microsecond=0)
+    await _compact_buckets(hour_cutoff, '%Y-%m-%d %H:00:00', timedelta(hours=1))
+    await _compact_buckets(day_cutoff, '%Y-%m-%d 00:00:00', timedelta(days=1))
 
 
 async def insert_log_leaderboard_user(user_id: int, guild_id: int, command: str, all_time: int, last_1h: int,
@@ -581,9 +853,8 @@ async def insert_log_leaderboard_user(user_id: int, guild_id: int, command: str,
             f'INSERT INTO {table} (user_id, guild_id, command, command_count, date_time) VALUES (?, ?, ?, ?, ?)'
         )
         try:
-            cur = settings.NAVI_DB.cursor()
-            cur.execute(sql, (user_id, guild_id, command, all_time, last_1h, last_12h, last_24h, last_7d, last_4w,
-                            last_12h, updated))
+            await connection.execute(sql, (user_id, guild_id, command, all_time, last_1h, last_12h, last_24h, last_7d,
+                                           last_4w, last_12h, updated))
         except sqlite3.Error as error:
             await errors.log_error(
                 strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
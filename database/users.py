@@ -1,13 +1,18 @@
 # users.py
 """Provides access to the table "users" in the database"""
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
 from datetime import datetime
 import sqlite3
-from typing import NamedTuple, Tuple
+from typing import Any, Dict, NamedTuple, Tuple
 
-from database import errors
-from resources import exceptions, settings, strings
+from database import connection, errors, statements
+from resources import exceptions, strings
+
+
+USERS_MAX = 10_000
+NONE_DATE = datetime(1970, 1, 1, 0, 0, 0)
 
 
 # Containers
@@ -106,7 +111,7 @@ class User():
         self.user_donor_tier = new_settings.user_donor_tier
 
     async def update(self, **kwargs) -> None:
-        """Updates the user record in the database. Also calls refresh().
+        """Updates the user record in the database and sets the updated values on the object.
         If user_donor_tier is updated and a partner is set, the partner's partner_donor_tier is updated as well.
 
         Arguments
@@ -174,10 +179,98 @@ class User():
             user_donor_tier: int
         """
         await _update_user(self, **kwargs)
-        await self.refresh()
+        try:
+            _apply_columns(self, kwargs)
+        except LookupError:
+            await self.refresh()
+
+
+@dataclass()
+class UserCacheStats():
+    """Object that summarizes the user cache since startup"""
+    hits: int = 0
+    misses: int = 0
+    patches: int = 0
+    invalidations: int = 0
+
+
+# Users that were read recently, least recently used first. get_user hands out copies, so callers can't change
+# the cached objects. _update_user patches them with the columns it writes.
+cached_users: 'OrderedDict[int, User]' = OrderedDict()
+cache_stats = UserCacheStats()
+_BOOL_FIELDS = frozenset(field.name for field in fields(User) if field.type is bool)
+_FIELDS = frozenset(field.name for field in fields(User))
+# Counts writes to the users table. It goes up when a write starts and again when it is done, so get_user only
+# caches a record if no write started or finished while it was read.
+_writes = 0
 
 
 # Miscellaneous functions
+def _cache_user(user: User) -> None:
+    """Adds a user to the cache, evicting the least recently used user if the cache is full"""
+    cached_users[user.user_id] = user
+    cached_users.move_to_end(user.user_id)
+    if len(cached_users) > USERS_MAX: cached_users.popitem(last=False)
+
+
+def _uncache_user(user_id: int) -> None:
+    """Removes a user from the cache"""
+    if cached_users.pop(user_id, None) is not None: cache_stats.invalidations += 1
+
+
+def _patch_cached_user(user_id: int, columns: Dict[str, Any]) -> None:
+    """Applies updated columns to a cached user. Removes the user from the cache if that isn't possible."""
+    cached_user = cached_users.get(user_id)
+    if cached_user is None: return
+    try:
+        _apply_columns(cached_user, {column: value for column, value in columns.items() if column != 'user_id'})
+    except LookupError:
+        _uncache_user(user_id)
+        return
+    cache_stats.patches += 1
+
+
+def _convert_column(column: str, value: Any) -> Any:
+    """Converts a column value from the database to the type User uses. _apply_columns and _dict_to_user both
+    convert through this function, so cached users look the same whether they were loaded or patched."""
+    if column == 'last_tt':
+        if isinstance(value, str): value = datetime.fromisoformat(value)
+        return value if value is not None else NONE_DATE
+    if column in _BOOL_FIELDS or (column.startswith('alert_') and column.endswith('_enabled')):
+        return bool(value)
+    return value
+
+
+def _read_column(record: dict, column: str) -> Any:
+    """Returns the converted value of a column of a database record"""
+    return _convert_column(column, record[column])
+
+
+def _apply_columns(user: User, columns: Dict[str, Any]) -> None:
+    """Sets the values of updated columns on a User object, converted by _convert_column.
+
+    Raises
+    ------
+    LookupError if a column has no matching attribute on User.
+    """
+    for column, value in columns.items():
+        value = _convert_column(column, value)
+        if column.startswith('alert_') and column.endswith(('_enabled', '_message')):
+            alert_name, alert_setting = column.rsplit('_', 1)
+            alert = getattr(user, alert_name, None)
+            if not isinstance(alert, UserAlert):
+                raise LookupError(f'User has no alert "{alert_name}".')
+            if alert_setting == 'enabled':
+                alert = alert._replace(enabled=value)
+            else:
+                alert = alert._replace(message=value)
+            setattr(user, alert_name, alert)
+        elif column in _FIELDS:
+            setattr(user, column, value)
+        else:
+            raise LookupError(f'User has no attribute "{column}".')
+
+
 async def _dict_to_user(record: dict) -> User:
     """Creates a User object from a database record
 
@@ -194,71 +287,70 @@ async def _dict_to_user(record: dict) -> User:
     LookupError if something goes wrong reading the dict. Also logs this error to the database.
     """
     function_name = '_dict_to_user'
-    none_date = datetime(1970, 1, 1, 0, 0, 0)
     try:
         user = User(
-            alert_adventure = UserAlert(enabled=bool(record['alert_adventure_enabled']),
-                                        message=record['alert_adventure_message']),
-            alert_arena = UserAlert(enabled=bool(record['alert_arena_enabled']),
-                                    message=record['alert_arena_message']),
-            alert_big_arena = UserAlert(enabled=bool(record['alert_big_arena_enabled']),
-                                        message=record['alert_big_arena_message']),
-            alert_daily = UserAlert(enabled=bool(record['alert_daily_enabled']),
-                                    message=record['alert_daily_message']),
-            alert_duel = UserAlert(enabled=bool(record['alert_duel_enabled']),
-                                   message=record['alert_duel_message']),
-            alert_dungeon_miniboss = UserAlert(enabled=bool(record['alert_dungeon_miniboss_enabled']),
-                                               message=record['alert_dungeon_miniboss_message']),
-            alert_farm = UserAlert(enabled=bool(record['alert_farm_enabled']),
-                                   message=record['alert_farm_message']),
-            alert_horse_breed = UserAlert(enabled=bool(record['alert_horse_breed_enabled']),
-                                          message=record['alert_horse_breed_message']),
-            alert_horse_race = UserAlert(enabled=bool(record['alert_horse_race_enabled']),
-                                         message=record['alert_horse_race_message']),
-            alert_hunt = UserAlert(enabled=bool(record['alert_hunt_enabled']),
-                                   message=record['alert_hunt_message']),
-            alert_lootbox = UserAlert(enabled=bool(record['alert_lootbox_enabled']),
-                                      message=record['alert_lootbox_message']),
-            alert_lottery = UserAlert(enabled=bool(record['alert_lottery_enabled']),
-                                      message=record['alert_lottery_message']),
-            alert_not_so_mini_boss = UserAlert(enabled=bool(record['alert_not_so_mini_boss_enabled']),
-                                               message=record['alert_not_so_mini_boss_message']),
-            alert_partner = UserAlert(enabled=bool(record['alert_partner_enabled']),
-                                      message=record['alert_partner_message']),
-            alert_pet_tournament = UserAlert(enabled=bool(record['alert_pet_tournament_enabled']),
-                                             message=record['alert_pet_tournament_message']),
-            alert_pets = UserAlert(enabled=bool(record['alert_pets_enabled']),
-                                   message=record['alert_pets_message']),
-            alert_quest = UserAlert(enabled=bool(record['alert_quest_enabled']),
-                                    message=record['alert_quest_message']),
-            alert_training = UserAlert(enabled=bool(record['alert_training_enabled']),
-                                       message=record['alert_training_message']),
-            alert_vote = UserAlert(enabled=bool(record['alert_vote_enabled']),
-                                   message=record['alert_vote_message']),
-            alert_weekly = UserAlert(enabled=bool(record['alert_weekly_enabled']),
-                                    message=record['alert_weekly_message']),
-            alert_work = UserAlert(enabled=bool(record['alert_work_enabled']),
-                                   message=record['alert_work_message']),
-            bot_enabled = bool(record['bot_enabled']),
-            clan_name = record['clan_name'],
-            dnd_mode_enabled = bool(record['dnd_mode_enabled']),
-            guild_quest_prompt_active = bool(record['guild_quest_prompt_active']),
-            hardmode_mode_enabled = bool(record['hardmode_mode_enabled']),
-            heal_warning_enabled = bool(record['heal_warning_enabled']),
-            last_tt = datetime.fromisoformat(record['last_tt']) if record['last_tt'] is not None else none_date,
-            partner_channel_id = record['partner_channel_id'],
-            partner_donor_tier = record['partner_donor_tier'],
-            partner_id = record['partner_id'],
-            partner_name = record['partner_name'],
-            pet_helper_enabled = record['pet_helper_enabled'],
-            pet_tip_read = bool(record['pet_tip_read']),
-            reactions_enabled = bool(record['reactions_enabled']),
-            rubies = record['rubies'],
-            ruby_counter_enabled = bool(record['ruby_counter_enabled']),
-            tracking_enabled = bool(record['tracking_enabled']),
-            training_helper_enabled = bool(record['training_helper_enabled']),
-            user_donor_tier = record['user_donor_tier'],
-            user_id = record['user_id'],
+            alert_adventure = UserAlert(enabled=_read_column(record, 'alert_adventure_enabled'),
+                                        message=_read_column(record, 'alert_adventure_message')),
+            alert_arena = UserAlert(enabled=_read_column(record, 'alert_arena_enabled'),
+                                    message=_read_column(record, 'alert_arena_message')),
+            alert_big_arena = UserAlert(enabled=_read_column(record, 'alert_big_arena_enabled'),
+                                        message=_read_column(record, 'alert_big_arena_message')),
+            alert_daily = UserAlert(enabled=_read_column(record, 'alert_daily_enabled'),
+                                    message=_read_column(record, 'alert_daily_message')),
+            alert_duel = UserAlert(enabled=_read_column(record, 'alert_duel_enabled'),
+                                   message=_read_column(record, 'alert_duel_message')),
+            alert_dungeon_miniboss = UserAlert(enabled=_read_column(record, 'alert_dungeon_miniboss_enabled'),
+                                               message=_read_column(record, 'alert_dungeon_miniboss_message')),
+            alert_farm = UserAlert(enabled=_read_column(record, 'alert_farm_enabled'),
+                                   message=_read_column(record, 'alert_farm_message')),
+            alert_horse_breed = UserAlert(enabled=_read_column(record, 'alert_horse_breed_enabled'),
+                                          message=_read_column(record, 'alert_horse_breed_message')),
+            alert_horse_race = UserAlert(enabled=_read_column(record, 'alert_horse_race_enabled'),
+                                         message=_read_column(record, 'alert_horse_race_message')),
+            alert_hunt = UserAlert(enabled=_read_column(record, 'alert_hunt_enabled'),
+                                   message=_read_column(record, 'alert_hunt_message')),
+            alert_lootbox = UserAlert(enabled=_read_column(record, 'alert_lootbox_enabled'),
+                                      message=_read_column(record, 'alert_lootbox_message')),
+            alert_lottery = UserAlert(enabled=_read_column(record, 'alert_lottery_enabled'),
+                                      message=_read_column(record, 'alert_lottery_message')),
+            alert_not_so_mini_boss = UserAlert(enabled=_read_column(record, 'alert_not_so_mini_boss_enabled'),
+                                               message=_read_column(record, 'alert_not_so_mini_boss_message')),
+            alert_partner = UserAlert(enabled=_read_column(record, 'alert_partner_enabled'),
+                                      message=_read_column(record, 'alert_partner_message')),
+            alert_pet_tournament = UserAlert(enabled=_read_column(record, 'alert_pet_tournament_enabled'),
+                                             message=_read_column(record, 'alert_pet_tournament_message')),
+            alert_pets = UserAlert(enabled=_read_column(record, 'alert_pets_enabled'),
+                                   message=_read_column(record, 'alert_pets_message')),
+            alert_quest = UserAlert(enabled=_read_column(record, 'alert_quest_enabled'),
+                                    message=_read_column(record, 'alert_quest_message')),
+            alert_training = UserAlert(enabled=_read_column(record, 'alert_training_enabled'),
+                                       message=_read_column(record, 'alert_training_message')),
+            alert_vote = UserAlert(enabled=_read_column(record, 'alert_vote_enabled'),
+                                   message=_read_column(record, 'alert_vote_message')),
+            alert_weekly = UserAlert(enabled=_read_column(record, 'alert_weekly_enabled'),
+                                    message=_read_column(record, 'alert_weekly_message')),
+            alert_work = UserAlert(enabled=_read_column(record, 'alert_work_enabled'),
+                                   message=_read_column(record, 'alert_work_message')),
+            bot_enabled = _read_column(record, 'bot_enabled'),
+            clan_name = _read_column(record, 'clan_name'),
+            dnd_mode_enabled = _read_column(record, 'dnd_mode_enabled'),
+            guild_quest_prompt_active = _read_column(record, 'guild_quest_prompt_active'),
+            hardmode_mode_enabled = _read_column(record, 'hardmode_mode_enabled'),
+            heal_warning_enabled = _read_column(record, 'heal_warning_enabled'),
+            last_tt = _read_column(record, 'last_tt'),
+            partner_channel_id = _read_column(record, 'partner_channel_id'),
+            partner_donor_tier = _read_column(record, 'partner_donor_tier'),
+            partner_id = _read_column(record, 'partner_id'),
+            partner_name = _read_column(record, 'partner_name'),
+            pet_helper_enabled = _read_column(record, 'pet_helper_enabled'),
+            pet_tip_read = _read_column(record, 'pet_tip_read'),
+            reactions_enabled = _read_column(record, 'reactions_enabled'),
+            rubies = _read_column(record, 'rubies'),
+            ruby_counter_enabled = _read_column(record, 'ruby_counter_enabled'),
+            tracking_enabled = _read_column(record, 'tracking_enabled'),
+            training_helper_enabled = _read_column(record, 'training_helper_enabled'),
+            user_donor_tier = _read_column(record, 'user_donor_tier'),
+            user_id = _read_column(record, 'user_id'),
         )
     except Exception as error:
         await errors.log_error(
@@ -271,7 +363,7 @@ async def _dict_to_user(record: dict) -> User:
 
 # Get data
 async def get_user(user_id: int) -> User:
-    """Gets all user settings.
+    """Gets all user settings. Users are cached, see cached_users.
 
     Returns
     -------
@@ -286,11 +378,16 @@ async def get_user(user_id: int) -> User:
     """
     table = 'users'
     function_name = 'get_user'
+    user = cached_users.get(user_id)
+    if user is not None:
+        cache_stats.hits += 1
+        cached_users.move_to_end(user_id)
+        return replace(user)
+    cache_stats.misses += 1
+    writes = _writes
     sql = f'SELECT * FROM {table} WHERE user_id=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id,))
-        record = cur.fetchone()
+        record = await connection.fetchone(sql, (user_id,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -299,6 +396,8 @@ async def get_user(user_id: int) -> User:
     if not record:
         raise exceptions.FirstTimeUserError(f'No user data found in database for user "{user_id}".')
     user = await _dict_to_user(dict(record))
+    # A write during the query might not be in the record
+    if writes == _writes: _cache_user(replace(user))
 
     return user
 
@@ -321,9 +420,7 @@ async def get_all_users() -> Tuple[User]:
     function_name = 'get_all_users'
     sql = f'SELECT * FROM {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        records = cur.fetchall()
+        records = await connection.fetchall(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -357,9 +454,7 @@ async def get_users_by_clan_name(clan_name: str) -> Tuple[User]:
     function_name = 'get_users_by_clan_name'
     sql = f'SELECT * FROM {table} WHERE clan_name=?'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (clan_name,))
-        records = cur.fetchall()
+        records = await connection.fetchall(sql, (clan_name,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -390,9 +485,7 @@ async def get_user_count() -> int:
     function_name = 'get_user_count'
     sql = f'SELECT COUNT(user_id) FROM {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql)
-        record = cur.fetchone()
+        record = await connection.fetchone(sql)
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
@@ -474,6 +567,7 @@ async def _update_user(user: User, **kwargs) -> None:
     NoArgumentsError if no kwargs are passed (need to pass at least one)
     Also logs all errors to the database.
     """
+    global _writes
     table = 'users'
     function_name = '_update_user'
     if not kwargs:
@@ -481,15 +575,19 @@ async def _update_user(user: User, **kwargs) -> None:
             strings.INTERNAL_ERROR_NO_ARGUMENTS.format(table=table, function=function_name)
         )
         raise exceptions.NoArgumentsError('You need to specify at least one keyword argument.')
+    sql = f'UPDATE {table}'
     try:
-        cur = settings.NAVI_DB.cursor()
-        sql = f'UPDATE {table} SET'
-        for kwarg in kwargs:
-            sql = f'{sql} {kwarg} = :{kwarg},'
-        sql = sql.strip(",")
+        sql = await statements.update_sql(table, kwargs, 'user_id = :user_id')
         kwargs['user_id'] = user.user_id
-        sql = f'{sql} WHERE user_id = :user_id'
-        cur.execute(sql, kwargs)
+        _writes += 1
+        try:
+            await connection.execute(sql, kwargs)
+        except sqlite3.Error:
+            _uncache_user(user.user_id)
+            raise
+        finally:
+            _writes += 1
+        _patch_cached_user(user.user_id, kwargs)
         if 'user_donor_tier' in kwargs and user.partner_id is not None:
             partner = await get_user(user.partner_id)
             await partner.update(partner_donor_tier=kwargs['user_donor_tier'])
@@ -512,17 +610,22 @@ async def insert_user(user_id: int) -> User:
     sqlite3.Error if something happened within the database.
     Also logs all errors to the database.
     """
+    global _writes
     function_name = 'insert_user'
     table = 'users'
     sql = f'INSERT INTO {table} (user_id) VALUES (?)'
+    _writes += 1
+    _uncache_user(user_id)
     try:
-        cur = settings.NAVI_DB.cursor()
-        cur.execute(sql, (user_id,))
+        await connection.execute(sql, (user_id,))
     except sqlite3.Error as error:
         await errors.log_error(
             strings.INTERNAL_ERROR_SQLITE3.format(error=error, table=table, function=function_name, sql=sql)
         )
         raise
+    finally:
+        _writes += 1
+        _uncache_user(user_id)
     user = await get_user(user_id)
 
     return user
\ No newline at end of file
@@ -7,18 +7,13 @@ import discord
 
 from database import cooldowns, errors, reminders, users
 from database import settings as settings_db
-from resources import emojis, exceptions, settings, strings
+from resources import emojis, exceptions, interactions, members, outbox, settings, snapshot, strings
 
 
 # --- Misc ---
 async def get_interaction(message: discord.Message) -> discord.User:
     """Returns the interaction object if the message was triggered by a slash command. Returns None if no user was found."""
-    if message.reference is not None:
-        if message.reference.cached_message is not None:
-            message = message.reference.cached_message
-        else:
-            message = await message.channel.fetch_message(message.reference.message_id)
-    return message.interaction
+    return await interactions.get_interaction(message)
 
 
 async def get_interaction_user(message: discord.Message) -> discord.User:
@@ -30,20 +25,17 @@ async def get_interaction_user(message: discord.Message) -> discord.User:
 async def add_reminder_reaction(message: discord.Message, reminder: reminders.Reminder,  user_settings: users.User) -> None:
     """Adds a Navi reaction if the reminder was created, otherwise add a warning and send the error if debug mode is on"""
     if reminder.record_exists:
-        if user_settings.reactions_enabled: await message.add_reaction(emojis.NAVI)
+        if user_settings.reactions_enabled: outbox.add_reaction(message, emojis.NAVI)
     else:
         if settings.DEBUG_MODE or message.guild.id in settings.DEV_GUILDS:
-            await message.add_reaction(emojis.WARNING)
-            await message.channel.send(strings.MSG_ERROR)
+            outbox.add_reaction(message, emojis.WARNING)
+            await outbox.send_message(message.channel, strings.MSG_ERROR)
 
 
 # Time calculations
 async def get_guild_member_by_name(guild: discord.Guild, user_name: str) -> Union[discord.Member, None]:
     """Returns the first guild member found by the given name"""
-    for member in guild.members:
-        member_name = await encode_text(member.name)
-        if member_name == user_name: return member
-    return None
+    return members.find_member(guild, user_name)
 
 
 async def calculate_time_left_from_cooldown(message: discord.Message, user_settings: users.User, activity: str) -> timedelta:
@@ -270,116 +262,40 @@ async def encode_text(text: str) -> str:
 
 def encode_text_non_async(text: str) -> str:
     """Encodes all unicode characters in a text in a way that is consistent on both Windows and Linux (non async)"""
-    text = (
-        text
-        .encode('unicode-escape',errors='ignore')
-        .decode('ASCII')
-        .replace('\\','')
-        .strip('*')
-    )
-
-    return text
+    return snapshot.encode_text(text)
 
 
 async def encode_message(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters (async)"""
-    if not bot_message.embeds:
-        message = await encode_text(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_title = ''
-        if embed.author: message_author = await encode_text(str(embed.author))
-        if embed.description: message_description = await encode_text(str(embed.description))
-        if embed.title: message_title = str(embed.title)
-        if embed.fields: message_fields = str(embed.fields)
-        message = f'{message_author}{message_description}{message_fields}{message_title}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded
 
 
 def encode_message_non_async(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters (non async)"""
-    if not bot_message.embeds:
-        message = encode_text_non_async(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_title = ''
-        if embed.author: message_author = encode_text_non_async(str(embed.author))
-        if embed.description: message_description = encode_text_non_async(str(embed.description))
-        if embed.title: message_title = str(embed.title)
-        if embed.fields: message_fields = str(embed.fields)
-        message = f'{message_author}{message_description}{message_fields}{message_title}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded
 
 
 async def encode_message_clan(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters (async, clan)"""
-    if not bot_message.embeds:
-        message = await encode_text(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_footer = message_title = ''
-        if embed.author: message_author = await encode_text(str(embed.author))
-        if embed.description: message_description = await encode_text(str(embed.description))
-        if embed.title: message_title = await encode_text(str(embed.title))
-        if embed.footer: message_footer = await encode_text(str(embed.footer))
-        if embed.fields: message_fields = str(embed.fields)
-        message = f'{message_author}{message_description}{message_fields}{message_title}{message_footer}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded_clan
 
 
 async def encode_message_with_fields(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters
     (async, fields encoded)"""
-    if not bot_message.embeds:
-        message = await encode_text(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_title = ''
-        if embed.author: message_author = await encode_text(str(embed.author))
-        if embed.description: message_description = await encode_text(str(embed.description))
-        if embed.title: message_title = str(embed.title)
-        if embed.fields: message_fields = await encode_text(str(embed.fields))
-        message = f'{message_author}{message_description}{message_fields}{message_title}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded_with_fields
 
 
 def encode_message_clan_non_async(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters
     (non async, clan)"""
-    if not bot_message.embeds:
-        message = encode_text_non_async(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_footer = message_title = ''
-        if embed.author: message_author = encode_text_non_async(str(embed.author))
-        if embed.description: message_description = encode_text_non_async(str(embed.description))
-        if embed.title: message_title = encode_text_non_async(str(embed.title))
-        if embed.footer: message_footer = encode_text_non_async(str(embed.footer))
-        if embed.fields: message_fields = str(embed.fields)
-        message = f'{message_author}{message_description}{message_fields}{message_title}{message_footer}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded_clan
 
 
 def encode_message_with_fields_non_async(bot_message: discord.Message) -> str:
     """Encodes a message to a version that converts all potentionally problematic unicode characters
     (non async, fields encoded)"""
-    if not bot_message.embeds:
-        message = encode_text_non_async(bot_message.content)
-    else:
-        embed: discord.Embed = bot_message.embeds[0]
-        message_author = message_description = message_fields = message_title = ''
-        if embed.author: message_author = encode_text_non_async(str(embed.author))
-        if embed.description: message_description = encode_text_non_async(str(embed.description))
-        if embed.title: message_title = str(embed.title)
-        if embed.fields: message_fields = encode_text_non_async(str(embed.fields))
-        message = f'{message_author}{message_description}{message_fields}{message_title}'
-
-    return message
+    return snapshot.MessageSnapshot(bot_message).encoded_with_fields
 
 
 async def get_training_answer(message_content: str) -> str:
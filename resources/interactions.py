@@ -0,0 +1,101 @@
+# interactions.py
+"""Remembers the interactions of recent EPIC RPG messages.
+
+If EPIC RPG replies to one of its own slash command responses, the interaction is only on the referenced message.
+That message isn't always in the message cache of discord, so it had to be fetched from the API, once for
+get_interaction and once more for get_interaction_user. The on_message listener in bot.py now stores the
+interaction of every EPIC RPG message here, as do the lookups that still have to fetch a message. Fetches are shared
+by concurrent lookups of the same message.
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import discord
+
+from resources import settings
+
+
+INTERACTIONS_MAX = 20_000
+
+
+# Containers
+@dataclass()
+class InteractionCacheStats():
+    """Object that summarizes the interaction lookups since startup"""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+
+
+message_interactions: 'OrderedDict[int, Optional[discord.MessageInteraction]]' = OrderedDict()
+pending_fetches: Dict[int, asyncio.Future] = {}
+stats = InteractionCacheStats()
+
+
+# Functions
+def store(message_id: int, interaction: Optional[discord.MessageInteraction]) -> None:
+    """Stores the interaction of a message. None means the message has no interaction."""
+    message_interactions[message_id] = interaction
+    message_interactions.move_to_end(message_id)
+    if len(message_interactions) > INTERACTIONS_MAX: message_interactions.popitem(last=False)
+
+
+def add_message(message: discord.Message) -> None:
+    """Stores the interaction of a message if it was sent by EPIC RPG"""
+    if message.author.id != settings.EPIC_RPG_ID: return
+    store(message.id, message.interaction)
+
+
+async def get_interaction(message: discord.Message) -> Optional[discord.MessageInteraction]:
+    """Returns the interaction of a message. If the message is a reply, the interaction of the referenced message is
+    returned instead.
+
+    Returns
+    -------
+    discord.MessageInteraction if the message was triggered by a slash command, None if not
+    """
+    if message.reference is None: return message.interaction
+    message_id = message.reference.message_id
+    if message_id in message_interactions:
+        stats.hits += 1
+        interaction = message_interactions[message_id]
+        message_interactions.move_to_end(message_id)
+    elif message.reference.cached_message is not None:
+        stats.hits += 1
+        interaction = message.reference.cached_message.interaction
+        store(message_id, interaction)
+    else:
+        stats.misses += 1
+        interaction = await _fetch_interaction(message.channel, message_id)
+    return interaction
+
+
+async def _fetch_interaction(channel: discord.TextChannel,
+                             message_id: int) -> Optional[discord.MessageInteraction]:
+    """Fetches a message and returns its interaction. Concurrent fetches of the same message share one request."""
+    pending_fetch = pending_fetches.get(message_id)
+    if pending_fetch is not None:
+        stats.coalesced += 1
+        return await asyncio.shield(pending_fetch)
+    pending_fetch = pending_fetches[message_id] = asyncio.get_running_loop().create_future()
+    try:
+        stats.fetches += 1
+        referenced_message = await channel.fetch_message(message_id)
+    except asyncio.CancelledError:
+        pending_fetch.cancel()
+        raise
+    except Exception as error:
+        pending_fetch.set_exception(error)
+        # Retrieve the exception, so asyncio doesn't warn about it if nobody else was waiting
+        pending_fetch.exception()
+        raise
+    else:
+        store(message_id, referenced_message.interaction)
+        pending_fetch.set_result(referenced_message.interaction)
+        return referenced_message.interaction
+    finally:
+        del pending_fetches[message_id]
@@ -0,0 +1,73 @@
+# matcher.py
+"""Finds many phrases in a text in one pass (Aho-Corasick).
+
+The phrases are grouped by key. A TriggerMatcher is built once from all groups and returns the keys of all groups
+that have at least one phrase in a text. The text is only scanned once, no matter how many phrases there are.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class TriggerMatcher():
+    """Immutable Aho-Corasick automaton over groups of lowercase phrases.
+
+    Arguments
+    ---------
+    phrase_groups: Dict with the key of each group and the phrases of that group
+    """
+    __slots__ = ('_transitions', '_outputs', 'phrase_count', 'state_count')
+
+    def __init__(self, phrase_groups: Dict[str, Iterable[str]]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+        phrase_count = 0
+        # Trie
+        for key, phrases in phrase_groups.items():
+            for phrase in phrases:
+                if not phrase: continue
+                phrase_count += 1
+                state = 0
+                for char in phrase:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][char] = next_state
+                        goto.append({})
+                        outputs.append(set())
+                    state = next_state
+                outputs[state].add(key)
+        # Failure links, breadth first. Every state gets the full transition table of its failure state, so
+        # matching only needs one dict lookup per character.
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [{}] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque()
+        for state in goto[0].values():
+            transitions[state] = {**transitions[0], **goto[state]}
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                fail_state = fail[next_state] = transitions[fail[state]].get(char, 0)
+                outputs[next_state] |= outputs[fail_state]
+                transitions[next_state] = {**transitions[fail_state], **goto[next_state]}
+                queue.append(next_state)
+        self._transitions = transitions
+        self._outputs = [frozenset(output) for output in outputs]
+        self.phrase_count = phrase_count
+        self.state_count = len(goto)
+
+    def __repr__(self) -> str:
+        return f'TriggerMatcher(phrases={self.phrase_count}, states={self.state_count})'
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Returns the keys of all groups that have at least one phrase in the text.
+        The text has to be lowercase already."""
+        transitions = self._transitions
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]: found |= outputs[state]
+        return frozenset(found)
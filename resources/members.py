@@ -0,0 +1,212 @@
+# members.py
+"""Finds guild members by the name EPIC RPG shows in its messages or by their id.
+
+EPIC RPG messages contain the encoded user name (see snapshot.encode_text). Instead of encoding the name of every
+member of a guild for every lookup, every guild gets an index from encoded name to member ids. The index is built on
+the first lookup in a guild and then kept up to date by the member and user events in bot.py.
+
+Members looked up by id are taken from the gateway cache. Only members that are not in there are fetched from the
+API. Fetched members are kept for a while and concurrent fetches of the same member share one request.
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import time
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from resources.snapshot import encode_text
+
+
+FETCHED_MEMBERS_MAX = 10_000
+FETCHED_MEMBER_TTL = 600 # Seconds
+INCOMPLETE_REBUILD_SECONDS = 30 # Minimum time between two rebuilds of the index of a guild that isn't chunked
+
+
+# Containers
+@dataclass()
+class MemberIndexStats():
+    """Object that summarizes the name lookups since startup"""
+    lookups: int = 0
+    hits: int = 0
+    rebuilds: int = 0
+    stale_entries: int = 0
+
+
+@dataclass()
+class MemberResolverStats():
+    """Object that summarizes the member lookups by id since startup"""
+    gateway_hits: int = 0
+    fetched_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    fetches: int = 0
+
+
+class GuildMemberIndex():
+    """Encoded member names of one guild.
+    Every encoded name points to the ids of the members with that name in the order they were added, so a lookup
+    returns the same member the first match in guild.members would have been."""
+    __slots__ = ('member_ids', 'member_names', 'complete', 'built_at')
+
+    def __init__(self, complete: bool) -> None:
+        self.member_ids: Dict[str, Dict[int, None]] = {}
+        self.member_names: Dict[int, str] = {}
+        self.complete = complete # False if the member list of the guild wasn't fully loaded when the index was built
+        self.built_at = time.monotonic()
+
+    def add(self, member_id: int, name: str) -> None:
+        """Adds a member or updates its name"""
+        old_name = self.member_names.get(member_id)
+        if old_name == name: return
+        if old_name is not None: self.remove(member_id)
+        self.member_names[member_id] = name
+        self.member_ids.setdefault(encode_text(name), {})[member_id] = None
+
+    def remove(self, member_id: int) -> None:
+        """Removes a member if it is in the index"""
+        name = self.member_names.pop(member_id, None)
+        if name is None: return
+        encoded_name = encode_text(name)
+        member_ids = self.member_ids.get(encoded_name)
+        if member_ids is None: return
+        member_ids.pop(member_id, None)
+        if not member_ids: del self.member_ids[encoded_name]
+
+
+guild_indexes: Dict[int, GuildMemberIndex] = {}
+stats = MemberIndexStats()
+fetched_members: 'OrderedDict[Tuple[int, int], Tuple[discord.Member, float]]' = OrderedDict()
+pending_fetches: Dict[Tuple[int, int], asyncio.Future] = {}
+resolver_stats = MemberResolverStats()
+
+
+# Index
+def build_index(guild: discord.Guild) -> GuildMemberIndex:
+    """Builds the index of a guild from its cached members and stores it"""
+    index = GuildMemberIndex(guild.chunked)
+    for member in guild.members:
+        index.add(member.id, member.name)
+    guild_indexes[guild.id] = index
+    stats.rebuilds += 1
+    return index
+
+
+def add_member(member: discord.Member) -> None:
+    """Adds a member to the index of its guild. Does nothing if the guild isn't indexed yet."""
+    index = guild_indexes.get(member.guild.id)
+    if index is not None: index.add(member.id, member.name)
+
+
+def remove_member(member: discord.Member) -> None:
+    """Removes a member from the index of its guild and from the fetched members"""
+    fetched_members.pop((member.guild.id, member.id), None)
+    index = guild_indexes.get(member.guild.id)
+    if index is not None: index.remove(member.id)
+
+
+def update_user(user: discord.User) -> None:
+    """Updates the name of a user in every indexed guild the user is a member of"""
+    for guild in user.mutual_guilds:
+        index = guild_indexes.get(guild.id)
+        if index is not None and user.id in index.member_names: index.add(user.id, user.name)
+
+
+def remove_guild(guild: discord.Guild) -> None:
+    """Drops the index of a guild"""
+    guild_indexes.pop(guild.id, None)
+
+
+# Lookup
+def find_member(guild: discord.Guild, user_name: str) -> Optional[discord.Member]:
+    """Returns the first member of a guild with the given encoded name.
+    If the name isn't found and the member list of the guild was still being loaded when the index was built, the
+    index is rebuilt. To keep unknown names from rebuilding it on every lookup, this happens at most every
+    INCOMPLETE_REBUILD_SECONDS per guild.
+
+    Returns
+    -------
+    discord.Member if found, None if not
+    """
+    stats.lookups += 1
+    index = guild_indexes.get(guild.id)
+    if index is None: index = build_index(guild)
+    member = _find_in_index(guild, index, user_name)
+    if (member is None and not index.complete
+        and time.monotonic() - index.built_at >= INCOMPLETE_REBUILD_SECONDS):
+        member = _find_in_index(guild, build_index(guild), user_name)
+    if member is not None: stats.hits += 1
+    return member
+
+
+def _find_in_index(guild: discord.Guild, index: GuildMemberIndex, user_name: str) -> Optional[discord.Member]:
+    """Looks up a name in an index. Entries that don't match the member anymore (e.g. because an event was missed)
+    are fixed on the way."""
+    member_ids = index.member_ids.get(user_name)
+    if not member_ids: return None
+    for member_id in list(member_ids):
+        member = guild.get_member(member_id)
+        if member is None:
+            index.remove(member_id)
+            stats.stale_entries += 1
+            continue
+        if member.name != index.member_names[member_id]:
+            index.add(member_id, member.name)
+            stats.stale_entries += 1
+            if encode_text(member.name) != user_name: continue
+        return member
+    return None
+
+
+async def get_member(guild: discord.Guild, user_id: int) -> discord.Member:
+    """Returns a guild member by id. Use this instead of guild.fetch_member.
+    The member is taken from the gateway cache if possible, then from the members fetched in the last
+    FETCHED_MEMBER_TTL seconds. Only if both don't have it, it is fetched from the API.
+
+    Returns
+    -------
+    discord.Member
+
+    Raises
+    ------
+    The exceptions of guild.fetch_member (e.g. discord.NotFound if the user is not a member of the guild)
+    """
+    member = guild.get_member(user_id)
+    if member is not None:
+        resolver_stats.gateway_hits += 1
+        return member
+    key = (guild.id, user_id)
+    cached = fetched_members.get(key)
+    if cached is not None:
+        member, expires_at = cached
+        if expires_at > time.monotonic():
+            fetched_members.move_to_end(key)
+            resolver_stats.fetched_hits += 1
+            return member
+        del fetched_members[key]
+    resolver_stats.misses += 1
+    pending_fetch = pending_fetches.get(key)
+    if pending_fetch is not None:
+        resolver_stats.coalesced += 1
+        return await asyncio.shield(pending_fetch)
+    pending_fetch = pending_fetches[key] = asyncio.get_running_loop().create_future()
+    try:
+        resolver_stats.fetches += 1
+        member = await guild.fetch_member(user_id)
+    except asyncio.CancelledError:
+        pending_fetch.cancel()
+        raise
+    except Exception as error:
+        pending_fetch.set_exception(error)
+        # Retrieve the exception, so asyncio doesn't warn about it if nobody else was waiting
+        pending_fetch.exception()
+        raise
+    else:
+        pending_fetch.set_result(member)
+        fetched_members[key] = (member, time.monotonic() + FETCHED_MEMBER_TTL)
+        if len(fetched_members) > FETCHED_MEMBERS_MAX: fetched_members.popitem(last=False)
+        return member
+    finally:
+        del pending_fetches[key]
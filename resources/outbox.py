@@ -0,0 +1,422 @@
+# outbox.py
+"""Sends everything Navi posts to Discord through one queue with priorities.
+
+Reminders, replies and reactions all count against the same rate limits of Discord: per route and channel, and
+globally per bot. Sent directly, a burst of reactions can use up that budget and delay reminders. Every request
+therefore goes through this queue instead:
+- Requests are taken by priority: reminders first, then replies, then reactions.
+- Every route and channel has a bucket that estimates Discord's limit. A request is only taken once its bucket has
+room. Requests waiting for a full bucket don't block other channels.
+- A share of the global budget is reserved for higher priorities. Reactions are only sent while there is room left
+beyond RESERVED_TOKENS, otherwise they wait. Reactions that waited for more than REACTION_WAIT_MAX seconds, or
+don't fit into the queue anymore, are dropped.
+
+Reminders of different users often fire in the same channel at the same second. Instead of one message per user,
+the reminder blocks for a channel are collected for settings.REMINDER_COALESCE_SECONDS and then sent in as few
+messages as possible, each with at most MESSAGE_LENGTH_MAX characters. A block is never split. Every message only
+allows mentions of the users whose blocks are in it.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+from database import errors
+from resources import settings
+
+
+MESSAGE_LENGTH_MAX = 2_000
+PRIORITY_REMINDER = 0
+PRIORITY_REPLY = 1
+PRIORITY_REACTION = 2
+PRIORITY_NAMES = ('Reminders', 'Replies', 'Reactions')
+RESERVED_TOKENS = (0, 5, 15) # Global tokens per priority that have to be left for the higher priorities
+GLOBAL_LIMIT = (50, 1.0) # Requests, seconds
+ROUTE_LIMITS = {
+    'messages': (5, 5.0), # Requests per channel, seconds
+    'reactions': (1, 0.25),
+}
+SEND_WORKERS = 8
+REACTIONS_QUEUED_MAX = 1_000
+REACTION_WAIT_MAX = 10 # Seconds
+BUCKETS_MAX = 10_000
+
+Route = Tuple[str, int] # Route name, channel id
+ReminderBlock = Tuple[str, Tuple[discord.abc.Snowflake, ...], datetime] # Text, users, end time of the reminders
+
+
+# Containers
+@dataclass()
+class OutboxStats():
+    """Object that summarizes the sent blocks and messages since startup. Times are in seconds."""
+    blocks: int = 0
+    messages: int = 0
+    failed_messages: int = 0
+    timed_messages: int = 0 # Sent reminder messages with a lateness
+    lateness: float = 0
+    lateness_max: float = 0
+
+    def average_blocks_per_message(self) -> float:
+        """Returns how many blocks were merged into one message on average"""
+        return self.blocks / self.messages if self.messages else 0
+
+    def average_lateness(self) -> float:
+        """Returns the average time between the earliest end time of the reminders in a message and the moment
+        the message was sent"""
+        return self.lateness / self.timed_messages if self.timed_messages else 0
+
+
+@dataclass()
+class SendQueueStats():
+    """Object that summarizes the send queue since startup. Lists are indexed by priority, times are in seconds."""
+    sent: List[int] = field(default_factory=lambda: [0] * len(PRIORITY_NAMES))
+    wait_time: List[float] = field(default_factory=lambda: [0.0] * len(PRIORITY_NAMES))
+    wait_time_max: List[float] = field(default_factory=lambda: [0.0] * len(PRIORITY_NAMES))
+    failed: int = 0
+    dropped_reactions: int = 0
+    queue_depth_max: int = 0
+
+    def average_wait_time(self, priority: int) -> float:
+        """Returns the average time requests of a priority waited in the queue"""
+        return self.wait_time[priority] / self.sent[priority] if self.sent[priority] else 0
+
+
+@dataclass()
+class ChannelBuffer():
+    """Blocks waiting to be sent to a channel, with the users each block may mention and its end time"""
+    channel: discord.abc.Messageable
+    blocks: List[ReminderBlock] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+@dataclass()
+class Request():
+    """Request waiting in the send queue"""
+    priority: int
+    route: Route
+    function: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    queue_time: float
+
+
+class Bucket():
+    """Token bucket that estimates a rate limit of Discord"""
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, limit: Tuple[int, float]) -> None:
+        requests, seconds = limit
+        self.capacity = requests
+        self.rate = requests / seconds
+        self.tokens = float(requests)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def get_delay(self, now: float, reserve: int = 0) -> float:
+        """Returns the seconds until a request can be taken without going below reserve tokens"""
+        self._refill(now)
+        return max(0.0, (1 + reserve - self.tokens) / self.rate)
+
+    def take(self) -> None:
+        """Uses one token"""
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        """Returns True if the bucket has all its tokens back"""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+channel_buffers: Dict[int, ChannelBuffer] = {}
+_send_tasks: Set[asyncio.Task] = set()
+stats = OutboxStats()
+# One dict per priority with the waiting requests of each route. Routes are taken round robin.
+request_queues: List[Dict[Route, Deque[Request]]] = [{} for _ in PRIORITY_NAMES]
+_buckets: Dict[Route, Bucket] = {}
+_global_bucket = Bucket(GLOBAL_LIMIT)
+_requests_queued = 0
+_reactions_queued = 0
+_queue_changed: Optional[asyncio.Event] = None
+_workers: List[asyncio.Task] = []
+queue_stats = SendQueueStats()
+
+
+# Send queue
+def _get_queue_changed() -> asyncio.Event:
+    """Returns the event that wakes the workers. It is created on first use, so it belongs to the running loop."""
+    global _queue_changed
+    if _queue_changed is None: _queue_changed = asyncio.Event()
+    return _queue_changed
+
+
+def _get_bucket(route: Route, now: float) -> Bucket:
+    """Returns the bucket of a route. Full buckets of idle routes are dropped once there are too many."""
+    bucket = _buckets.get(route)
+    if bucket is not None: return bucket
+    if len(_buckets) >= BUCKETS_MAX:
+        queued_routes = set().union(*request_queues)
+        for idle_route in [bucket_route for bucket_route, idle_bucket in _buckets.items()
+                           if bucket_route not in queued_routes and idle_bucket.is_full(now)]:
+            del _buckets[idle_route]
+    bucket = _buckets[route] = Bucket(ROUTE_LIMITS[route[0]])
+    return bucket
+
+
+def _finish_request(request: Request, result: Any = None, error: Optional[Exception] = None) -> None:
+    """Removes a request from the queue counts and resolves its future"""
+    global _requests_queued, _reactions_queued
+    _requests_queued -= 1
+    if request.priority == PRIORITY_REACTION: _reactions_queued -= 1
+    if request.future.done(): return
+    if error is not None:
+        request.future.set_exception(error)
+    else:
+        request.future.set_result(result)
+
+
+def _drop_old_reactions(now: float) -> None:
+    """Drops the reactions that waited too long"""
+    routes = request_queues[PRIORITY_REACTION]
+    for route in list(routes):
+        requests = routes[route]
+        while requests and now - requests[0].queue_time > REACTION_WAIT_MAX:
+            _finish_request(requests.popleft())
+            queue_stats.dropped_reactions += 1
+        if not requests: del routes[route]
+
+
+def _take_request(now: float) -> Tuple[Optional[Request], Optional[float]]:
+    """Takes the next request that can be sent now. If there is none, returns the seconds until one can be sent,
+    or None if the queue is empty."""
+    if _reactions_queued: _drop_old_reactions(now)
+    delay = None
+    for priority, routes in enumerate(request_queues):
+        if not routes: continue
+        global_delay = _global_bucket.get_delay(now, RESERVED_TOKENS[priority])
+        for route, requests in routes.items():
+            route_delay = max(_get_bucket(route, now).get_delay(now), global_delay)
+            if route_delay <= 0:
+                request = requests.popleft()
+                del routes[route]
+                if requests: routes[route] = requests
+                _buckets[route].take()
+                _global_bucket.take()
+                return request, None
+            delay = route_delay if delay is None else min(delay, route_delay)
+    return None, delay
+
+
+async def _run_request(request: Request) -> None:
+    """Sends a request and hands the result or the error to its future"""
+    wait_time = time.monotonic() - request.queue_time
+    try:
+        result = await request.function()
+    except Exception as error:
+        queue_stats.failed += 1
+        _finish_request(request, error=error)
+        return
+    queue_stats.sent[request.priority] += 1
+    queue_stats.wait_time[request.priority] += wait_time
+    queue_stats.wait_time_max[request.priority] = max(wait_time, queue_stats.wait_time_max[request.priority])
+    _finish_request(request, result)
+
+
+async def _run_worker() -> None:
+    """Worker that sends the requests of the queue one after the other"""
+    queue_changed = _get_queue_changed()
+    while True:
+        queue_changed.clear()
+        request, delay = _take_request(time.monotonic())
+        if request is not None:
+            await _run_request(request)
+            continue
+        try:
+            await asyncio.wait_for(queue_changed.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _queue_request(priority: int, route: Route, function: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+    """Adds a request to the queue and returns a future with the result of the request"""
+    global _requests_queued, _reactions_queued
+    if not _workers:
+        _workers.extend(asyncio.ensure_future(_run_worker()) for _ in range(SEND_WORKERS))
+    future = asyncio.get_running_loop().create_future()
+    request = Request(priority, route, function, future, time.monotonic())
+    routes = request_queues[priority]
+    requests = routes.get(route)
+    if requests is None: requests = routes[route] = deque()
+    requests.append(request)
+    _requests_queued += 1
+    if priority == PRIORITY_REACTION: _reactions_queued += 1
+    queue_stats.queue_depth_max = max(_requests_queued, queue_stats.queue_depth_max)
+    _get_queue_changed().set()
+    return future
+
+
+def get_queue_depth() -> int:
+    """Returns the number of requests waiting in the queue or being sent"""
+    return _requests_queued
+
+
+async def _add_reaction(message: discord.Message, emoji: Any) -> None:
+    """Adds a reaction. Errors are logged, nobody waits for the result of a reaction."""
+    try:
+        await message.add_reaction(emoji)
+    except Exception as error:
+        await errors.log_error(
+            f'Error adding a reaction.\nFunction: _add_reaction\nEmoji: {emoji}\nError: {error}',
+            message
+        )
+
+
+def add_reaction(message: discord.Message, emoji: Any) -> None:
+    """Queues a reaction with the lowest priority. The reaction is dropped if the queue is under too much pressure.
+    Errors are logged."""
+    if _reactions_queued >= REACTIONS_QUEUED_MAX:
+        queue_stats.dropped_reactions += 1
+        return
+    _queue_request(PRIORITY_REACTION, ('reactions', message.channel.id), lambda: _add_reaction(message, emoji))
+
+
+async def send_message(channel: discord.abc.Messageable, content: Optional[str] = None,
+                       **kwargs: Any) -> discord.Message:
+    """Sends a message with reply priority and returns it. Takes the same arguments as channel.send()."""
+    return await _queue_request(PRIORITY_REPLY, ('messages', channel.id),
+                                lambda: channel.send(content, **kwargs))
+
+
+async def reply(message: discord.Message, content: Optional[str] = None, **kwargs: Any) -> discord.Message:
+    """Replies to a message with reply priority and returns the reply. Takes the same arguments as
+    message.reply()."""
+    return await _queue_request(PRIORITY_REPLY, ('messages', message.channel.id),
+                                lambda: message.reply(content, **kwargs))
+
+
+# Reminders
+def _pack_blocks(blocks: List[ReminderBlock]) -> List[Tuple[str, List[discord.abc.Snowflake], datetime]]:
+    """Joins blocks in order into as few messages as possible. Returns the content, the users and the earliest end
+    time of each message."""
+    messages = []
+    content, users, end_time = '', {}, None
+    for block, block_users, block_end_time in blocks:
+        if content and len(content) + 1 + len(block) > MESSAGE_LENGTH_MAX:
+            messages.append((content, list(users.values()), end_time))
+            content, users, end_time = '', {}, None
+        content = f'{content}\n{block}' if content else block
+        for user in block_users:
+            users[user.id] = user
+        if end_time is None or block_end_time < end_time: end_time = block_end_time
+    if content: messages.append((content, list(users.values()), end_time))
+    return messages
+
+
+def _record_lateness(end_time: datetime) -> None:
+    """Adds the time since end_time to the lateness of the sent reminder messages"""
+    lateness = (datetime.utcnow() - end_time).total_seconds()
+    stats.timed_messages += 1
+    stats.lateness += lateness
+    stats.lateness_max = max(lateness, stats.lateness_max)
+
+
+async def _send_buffer(buffer: ChannelBuffer) -> None:
+    """Sends the blocks of a channel buffer with reminder priority. Errors are logged and don't stop the following
+    messages."""
+    channel = buffer.channel
+    messages = _pack_blocks(buffer.blocks)
+    futures = [
+        _queue_request(PRIORITY_REMINDER, ('messages', channel.id),
+                       lambda content=content, users=users: channel.send(
+                           content, allowed_mentions=discord.AllowedMentions(users=users)
+                       ))
+        for content, users, _ in messages
+    ]
+    for future, (_, _, end_time) in zip(futures, messages):
+        try:
+            await future
+        except Exception as error:
+            stats.failed_messages += 1
+            await errors.log_error(
+                f'Error sending a reminder message.\nFunction: _send_buffer\nError: {error}'
+            )
+            continue
+        stats.messages += 1
+        _record_lateness(end_time)
+
+
+def _start_send(channel_id: int) -> None:
+    """Sends the blocks waiting for a channel in a background task"""
+    buffer = channel_buffers.pop(channel_id, None)
+    if buffer is None: return
+    if buffer.timer is not None: buffer.timer.cancel()
+    task = asyncio.ensure_future(_send_buffer(buffer))
+    _send_tasks.add(task)
+    task.add_done_callback(_send_tasks.discard)
+
+
+def send_reminder(channel: discord.abc.Messageable, block: str, end_time: datetime,
+                  users: Iterable[discord.abc.Snowflake] = ()) -> None:
+    """Queues a reminder block for a channel. It is sent after settings.REMINDER_COALESCE_SECONDS, merged with the
+    blocks that were queued for the same channel in the meantime. Send errors are logged.
+
+    Arguments
+    ---------
+    channel: The channel to send to
+    block: Text with at most MESSAGE_LENGTH_MAX characters
+    end_time: datetime UTC, when the reminders of the block were due. Used for the lateness in stats.
+    users: The users the block mentions. Only these users get pinged.
+
+    Raises
+    ------
+    ValueError if the block is too long.
+    """
+    if len(block) > MESSAGE_LENGTH_MAX:
+        raise ValueError(f'Block has {len(block):,} characters, the limit is {MESSAGE_LENGTH_MAX:,}.')
+    buffer = channel_buffers.get(channel.id)
+    if buffer is None:
+        buffer = channel_buffers[channel.id] = ChannelBuffer(channel)
+        buffer.timer = asyncio.get_running_loop().call_later(settings.REMINDER_COALESCE_SECONDS, _start_send,
+                                                             channel.id)
+    buffer.blocks.append((block, tuple(users), end_time))
+    stats.blocks += 1
+
+
+async def send_reminder_message(channel: discord.abc.Messageable, content: Optional[str] = None,
+                                embed: Optional[discord.Embed] = None,
+                                allowed_mentions: Optional[discord.AllowedMentions] = None,
+                                end_time: Optional[datetime] = None) -> discord.Message:
+    """Sends a message with reminder priority and returns it. Unlike send_reminder, the message is sent on its own
+    and can have an embed.
+
+    Arguments
+    ---------
+    channel: The channel to send to
+    content, embed, allowed_mentions: Same as for channel.send()
+    end_time: datetime UTC, when the reminder was due. If set, the lateness is added to stats.
+
+    Raises
+    ------
+    discord.HTTPException and the other errors of channel.send().
+    """
+    message = await _queue_request(PRIORITY_REMINDER, ('messages', channel.id),
+                                   lambda: channel.send(content, embed=embed, allowed_mentions=allowed_mentions))
+    if end_time is not None: _record_lateness(end_time)
+    return message
+
+
+async def flush() -> None:
+    """Sends all waiting reminder blocks right away and waits until the queue is empty. Called when the bot shuts
+    down."""
+    for channel_id in list(channel_buffers):
+        _start_send(channel_id)
+    if _send_tasks: await asyncio.gather(*_send_tasks)
+    waiting_futures = [request.future for routes in request_queues
+                       for requests in routes.values() for request in requests]
+    if waiting_futures: await asyncio.gather(*waiting_futures, return_exceptions=True)
@@ -0,0 +1,124 @@
+# recent_commands.py
+"""Keeps the last rpg commands of every channel in memory.
+
+EPIC RPG replies often don't say who used the command. Instead of reading the channel history from discord every
+time, the cogs look up the command here. The buffer is fed by the on_message listener in bot.py with every message
+that starts with "rpg". Reading the channel history is only done if a command isn't in the buffer (e.g. because the
+bot was restarted since).
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, NamedTuple, Optional
+
+import discord
+
+
+RECENT_COMMANDS_PER_CHANNEL = 50
+RECENT_COMMANDS_PER_AUTHOR = 10
+CHANNELS_MAX = 5_000
+
+
+# Containers
+class RecentCommand(NamedTuple):
+    """Object that represents a rpg command a user sent"""
+    message: discord.Message
+    content_lower: str # Lowercase content
+    compact: str # Lowercase content without spaces, e.g. "rpghunth"
+    verb: str # First word after "rpg", e.g. "hunt". Empty if there is no space after "rpg".
+
+
+@dataclass()
+class RecentCommandsStats():
+    """Object that summarizes the lookups since startup"""
+    commands_added: int = 0
+    hits: int = 0
+    fallbacks: int = 0
+    fallback_hits: int = 0
+
+
+class ChannelCommands():
+    """Recent commands of one channel, newest last"""
+    __slots__ = ('commands', 'by_author')
+
+    def __init__(self) -> None:
+        self.commands: Deque[RecentCommand] = deque(maxlen=RECENT_COMMANDS_PER_CHANNEL)
+        self.by_author: Dict[int, Deque[RecentCommand]] = {}
+
+    def add(self, command: RecentCommand) -> None:
+        """Adds a command and drops the oldest one if the channel is full"""
+        if len(self.commands) == self.commands.maxlen:
+            oldest = self.commands[0]
+            author_commands = self.by_author.get(oldest.message.author.id)
+            if author_commands and author_commands[0] is oldest:
+                author_commands.popleft()
+                if not author_commands: del self.by_author[oldest.message.author.id]
+        self.commands.append(command)
+        author_commands = self.by_author.get(command.message.author.id)
+        if author_commands is None:
+            author_commands = self.by_author[command.message.author.id] = deque(maxlen=RECENT_COMMANDS_PER_AUTHOR)
+        author_commands.append(command)
+
+
+# Channels with commands, least recently used first
+channels: 'OrderedDict[int, ChannelCommands]' = OrderedDict()
+stats = RecentCommandsStats()
+
+
+# Functions
+def get_recent_command(message: discord.Message) -> Optional[RecentCommand]:
+    """Returns a RecentCommand if the message is a rpg command, otherwise None"""
+    if not message.content: return None
+    content_lower = message.content.lower()
+    compact = content_lower.replace(' ','')
+    if not compact.startswith('rpg'): return None
+    words = content_lower.split()
+    verb = words[1] if len(words) > 1 and words[0] == 'rpg' else ''
+    return RecentCommand(message, content_lower, compact, verb)
+
+
+def add_message(message: discord.Message) -> None:
+    """Adds a message to the buffer of its channel if it is a rpg command from a user. If there are more than
+    CHANNELS_MAX channels, the least recently used channel is dropped."""
+    if message.author.bot: return
+    command = get_recent_command(message)
+    if command is None: return
+    channel_commands = channels.get(message.channel.id)
+    if channel_commands is None:
+        if len(channels) >= CHANNELS_MAX: channels.popitem(last=False)
+        channel_commands = channels[message.channel.id] = ChannelCommands()
+    else:
+        channels.move_to_end(message.channel.id)
+    channel_commands.add(command)
+    stats.commands_added += 1
+
+
+async def find_command(channel: discord.TextChannel, check: Callable[[RecentCommand], bool],
+                       author: Optional[discord.User] = None) -> Optional[discord.Message]:
+    """Returns the newest command in a channel that passes the check.
+    If an author is given, only the commands of that author are checked.
+    If nothing is found in the buffer, the last 50 messages of the channel history are checked instead.
+
+    Returns
+    -------
+    discord.Message if found, None if not
+    """
+    channel_commands = channels.get(channel.id)
+    if channel_commands is not None:
+        if author is not None:
+            commands = channel_commands.by_author.get(author.id, ())
+        else:
+            commands = channel_commands.commands
+        for command in reversed(commands):
+            if check(command):
+                stats.hits += 1
+                return command.message
+    stats.fallbacks += 1
+    async for message in channel.history(limit=50):
+        if message.author.bot: continue
+        if author is not None and message.author != author: continue
+        command = get_recent_command(message)
+        if command is not None and check(command):
+            stats.fallback_hits += 1
+            return message
+    return None
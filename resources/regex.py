@@ -0,0 +1,221 @@
+# regex.py
+"""Contains all regex patterns used for parsing EPIC RPG messages.
+
+All patterns are compiled once when this module is imported. Every pattern has a name and counts how often it was
+used and how long that took (see "dev regex").
+Patterns that contain text only known at runtime (e.g. a user name) can be compiled with get_dynamic_pattern.
+They are cached as well.
+"""
+
+from collections import OrderedDict
+import re
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+_perf_counter_ns = time.perf_counter_ns
+
+
+# Containers
+class NamedPattern():
+    """Compiled regex pattern with a name and usage statistics. Times are in nanoseconds."""
+    __slots__ = ('name', 'pattern', 'calls', 'matches', 'time')
+
+    def __init__(self, name: str, pattern: str, flags: int = 0) -> None:
+        self.name: str = name
+        self.pattern: re.Pattern = re.compile(pattern, flags)
+        self.calls: int = 0
+        self.matches: int = 0
+        self.time: int = 0
+
+    def __repr__(self) -> str:
+        return f'NamedPattern(name={self.name!r}, pattern={self.pattern.pattern!r})'
+
+    def search(self, string: str) -> Optional[re.Match]:
+        """Same as re.Pattern.search, but records the call"""
+        start_time = _perf_counter_ns()
+        match = self.pattern.search(string)
+        self.time += _perf_counter_ns() - start_time
+        self.calls += 1
+        if match is not None: self.matches += 1
+        return match
+
+    def findall(self, string: str) -> List:
+        """Same as re.Pattern.findall, but records the call"""
+        start_time = _perf_counter_ns()
+        matches = self.pattern.findall(string)
+        self.time += _perf_counter_ns() - start_time
+        self.calls += 1
+        if matches: self.matches += 1
+        return matches
+
+    def average_time(self) -> float:
+        """Returns the average time per call in nanoseconds"""
+        if self.calls == 0: return 0.0
+        return self.time / self.calls
+
+
+patterns: Dict[str, NamedPattern] = {}
+_dynamic_patterns: 'OrderedDict[str, NamedPattern]' = OrderedDict()
+DYNAMIC_PATTERNS_MAX = 256
+
+
+# Registry
+def _compile(name: str, pattern: str, flags: int = 0) -> NamedPattern:
+    """Compiles a pattern and adds it to the registry. Names have to be unique."""
+    if name in patterns:
+        raise ValueError(f'There already is a pattern with the name {name}.')
+    named_pattern = patterns[name] = NamedPattern(name, pattern, flags)
+    return named_pattern
+
+
+def get_dynamic_pattern(name: str, pattern: str, flags: int = 0) -> NamedPattern:
+    """Returns a compiled pattern for a pattern string that is only known at runtime.
+    Compiled patterns are kept in a LRU cache with DYNAMIC_PATTERNS_MAX entries."""
+    key = f'{flags}:{pattern}'
+    named_pattern = _dynamic_patterns.get(key)
+    if named_pattern is not None:
+        _dynamic_patterns.move_to_end(key)
+        return named_pattern
+    named_pattern = _dynamic_patterns[key] = NamedPattern(name, pattern, flags)
+    if len(_dynamic_patterns) > DYNAMIC_PATTERNS_MAX: _dynamic_patterns.popitem(last=False)
+    return named_pattern
+
+
+def get_all_patterns() -> Iterator[NamedPattern]:
+    """Returns all static patterns and the dynamic patterns that are currently cached"""
+    yield from patterns.values()
+    yield from _dynamic_patterns.values()
+
+
+def reset_stats() -> None:
+    """Resets the statistics of all patterns"""
+    for named_pattern in get_all_patterns():
+        named_pattern.calls = named_pattern.matches = named_pattern.time = 0
+
+
+# --- Users ---
+USER_ID_FROM_ICON_URL = _compile('user id from icon url', r"avatars\/(.+?)\/")
+USER_NAME_COOLDOWN = _compile('user name cooldown', r"^(.+?)'s cooldown")
+USER_NAME_COOLDOWNS = _compile('user name cooldowns', r"^(.+?)'s cooldowns")
+USER_NAME_DAILY = _compile('user name daily', r"^(.+?)'s daily reward")
+USER_NAME_WEEKLY = _compile('user name weekly', r"^(.+?)'s weekly reward")
+USER_NAME_QUEST = _compile('user name quest', r"^(.+?)'s quest")
+USER_NAME_EPIC_QUEST = _compile('user name epic quest', r"^(.+?)'s epic quest")
+USER_NAME_PETS = _compile('user name pets', r"^(.+?)'s pets")
+USER_NAME_BUNNY = _compile('user name bunny', r"^(.+?)'s bunny")
+USER_NAME_LOOTBOX = _compile('user name lootbox', r"^(.+?)'s lootbox")
+USER_NAME_INVENTORY = _compile('user name inventory', r"^(.+?)'s inventory")
+NAME_BOLD = _compile('name bold', r"\*\*(.+?)\*\*")
+NAME_BOLD_START = _compile('name bold start', r"^\*\*(.+?)\*\*")
+NAME_BOLD_START_SPACE = _compile('name bold start space', r"^\*\*(.+?)\*\* ")
+NAME_BOLD_START_COMMA = _compile('name bold start comma', r"^\*\*(.+?)\*\*,")
+NAMES_BOLD_AND = _compile('names bold and', r"\*\*(.+?)\*\* and \*\*(.+?)\*\*")
+NAME_DRINKS = _compile('name drinks', r"^\*\*(.+?)\*\* drinks")
+NAME_FIGHTS = _compile('name fights', r"\*\*(.+?)\*\* fights")
+NAME_FOUND = _compile('name found', r"\*\*(.+?)\*\* found a")
+NAME_FOUND_START = _compile('name found start', r"^\*\*(.+?)\*\* found a")
+NAME_GOT = _compile('name got', r"\*\*(.+?)\*\* got", re.IGNORECASE)
+NAME_HAS = _compile('name has', r"\*\*(.+?)\*\* has")
+NAME_HITS = _compile('name hits', r"\*\*(.+?)\*\* HITS")
+NAME_JAIL = _compile('name jail', r"car \*\*(.+?)\n")
+NAME_PLANTS = _compile('name plants', r"^\*\*(.+?)\*\* plants")
+NAME_THROWS = _compile('name throws', r"\*\*(.+?)\*\* throws")
+NAME_TRAINING_DESCRIPTION = _compile('name training description', r", \*\*(.+?)\*\*!")
+NAME_TRAINING_CONTENT = _compile('name training content', r", \*\*(.+?)\*\* !")
+NAME_TRIES_TO = _compile('name tries to', r"\*\*(.+?)\*\* tries to")
+NAME_USES_A = _compile('name uses a', r"\*\*(.+?)\*\* uses a")
+NAME_PET_CATCH = _compile('name pet catch', r"APPROACHING \*\*(.+?)\*\*")
+NAMES_WORK = (
+    _compile('name work 1', r"[!1] \*\*(.+?)\*\* got", re.IGNORECASE),
+    _compile('name work 2', r"\?\?\?\?\? \*\*(.+?)\*\* got", re.IGNORECASE),
+    _compile('name work 3', r"WOOAAAA!! (.+?)\*\* got", re.IGNORECASE),
+    _compile('name work 4', r"WwWOoOOoOAAa!!!1 (.+?)\*\* got", re.IGNORECASE),
+    _compile('name work 5', r"\.\.\. \*\*(.+?)\*\* got", re.IGNORECASE),
+    NAME_GOT,
+)
+
+
+# --- Cooldowns ---
+COOLDOWN_TIMESTRING = _compile('cooldown timestring', r"wait at least \*\*(.+?)\*\*...")
+COOLDOWN_ADVENTURE = _compile('cooldown adventure', r"Adventure`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_ADVENTURE_HARDMODE = _compile('cooldown adventure hardmode', r"Adventure hardmode`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_ARENA = _compile('cooldown arena', r"rena`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_DAILY = _compile('cooldown daily', r"Daily`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_DUEL = _compile('cooldown duel', r"Duel`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_DUNGEON_MINIBOSS = _compile('cooldown dungeon miniboss', r"boss`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_FARM = _compile('cooldown farm', r"Farm`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_HORSE = _compile('cooldown horse', r"race`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_LOOTBOX = _compile('cooldown lootbox', r"Lootbox`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_QUEST = _compile('cooldown quest', r"quest`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_TRAINING = _compile('cooldown training', r"raining`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_VOTE = _compile('cooldown vote', r"Vote`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_WEEKLY = _compile('cooldown weekly', r"Weekly`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_WORK_DRILL = _compile('cooldown work drill', r"Drill`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_WORK_DYNAMITE = _compile('cooldown work dynamite', r"Dynamite`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_WORK_MINE = _compile('cooldown work mine', r"Mine`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_WORK_PICKAXE = _compile('cooldown work pickaxe', r"Pickaxe`\*\* \(\*\*(.+?)\*\*")
+COOLDOWN_VOTE_EMBED = _compile('cooldown vote embed', r"Cooldown: \*\*(.+?)\*\*")
+
+
+# --- Clan ---
+CLAN_ENERGY = _compile('clan energy', r"earned \*\*(.+?)\*\*")
+CLAN_RAID_TIMESTRING = _compile('clan raid timestring', r":clock4: \*\*(.+?)\*\*")
+CLAN_STEALTH = _compile('clan stealth', r"STEALTH\*\*: (.+?)\n")
+CLAN_STEALTH_UPGRADE = _compile('clan stealth upgrade', r"--> \*\*(.+?)\*\*")
+
+
+# --- Events ---
+EVENT_BIG_ARENA = _compile('event big arena', r"Big arena\*\*: (.+?)\n")
+EVENT_HORSE_RACE = _compile('event horse race', r"race\*\*: (.+?)\n")
+EVENT_LOTTERY = _compile('event lottery', r"Lottery\*\*: (.+?)\n")
+EVENT_PET_TOURNAMENT = _compile('event pet tournament', r"tournament\*\*: (.+?)\n")
+BIG_ARENA_TIMESTRING = _compile('big arena timestring', r"next event is in \*\*(.+?)\*\*")
+CEL_MULTIPLY_TIMESTRING = _compile('cel multiply timestring', r"another \*\*(.+?)\*\*")
+HORSE_RACE_TIMESTRING = _compile('horse race timestring', r"next race is in \*\*(.+?)\*\*")
+LOTTERY_NEXT_DRAW = _compile('lottery next draw', r"Next draw\*\*: (.+?)$")
+LOTTERY_TIMESTRING = _compile('lottery timestring', r"the winner in \*\*(.+?)\*\*")
+PET_TOURNAMENT_TIMESTRING = _compile('pet tournament timestring', r"next pet tournament is in \*\*(.+?)\*\*")
+SEAL_TIMESTRING = _compile('seal timestring', r"__: (.+?)$")
+
+
+# --- Heal warning ---
+HEALTH_LOST = _compile('health lost', r"Lost (.+?) HP, remaining HP is (.+?)/")
+HEALTH_PARTNER = _compile('health partner', r"-(.+?) HP \(:heart: (.+?)/")
+
+
+# --- Lootboxes ---
+PARTNER_LOOTBOX_NAMES = (
+    'common lootbox', 'uncommon lootbox', 'rare lootbox', 'EPIC lootbox', 'EDGY lootbox', 'OMEGA lootbox',
+    'MEGA present', 'ULTRA present', 'OMEGA present', 'GODLY present', 'easter lootbox',
+)
+PARTNER_LOOTBOXES = {
+    lb_name: (
+        _compile(f'partner lootbox got {lb_name}', rf"\*\* got (.+?) (.+?) {re.escape(lb_name)}"),
+        _compile(f'partner lootbox plus {lb_name}', rf"\+(.+?) (.+?) {re.escape(lb_name)}"),
+    )
+    for lb_name in PARTNER_LOOTBOX_NAMES
+}
+
+
+# --- Pets ---
+PET_BACK_TIMESTRING = _compile('pet back timestring', r"will be back in \*\*(.+?)\*\*")
+PET_HAPPINESS = _compile('pet happiness', r"Happiness\*\*: (.+?)\n")
+PET_HAPPINESS_PLAIN = _compile('pet happiness plain', r"Happiness: (.+?)\n")
+PET_HUNGER = _compile('pet hunger', r"Hunger\*\*: (.+?)$")
+PET_HUNGER_PLAIN = _compile('pet hunger plain', r"Hunger: (.+?)$")
+PET_ID = _compile('pet id', r"`ID: (.+?)`")
+PET_STATUS = _compile('pet status', r"Status__:\*\* (.+?) \| \*\*(.+?)\*\*")
+PET_TOURNAMENT_ID = _compile('pet tournament id', r'pet id "(.+?)" registered')
+
+
+# --- Rubies ---
+RUBIES_GOT = _compile('rubies got', r"\*\* got (.+?) <:ruby", re.IGNORECASE)
+RUBIES_HAD = _compile('rubies had', r" had (.+?) <:ruby")
+RUBIES_INVENTORY = _compile('rubies inventory', r"ruby\*\*: (.+?)\n")
+RUBIES_INVENTORY_LAST = _compile('rubies inventory last', r"ruby\*\*: (.+?)$")
+RUBIES_LOOTBOX = _compile('rubies lootbox', r"\+(.+?) <:ruby")
+RUBIES_MORE_THAN = _compile('rubies more than', r"more than (.+?) <:ruby")
+RUBIES_START = _compile('rubies start', r"^(.+?) <:ruby", re.IGNORECASE)
+RUBIES_TRADE_E = _compile('rubies trade e', r"603304907650629653> x(.+?) \n")
+RUBIES_TRADE_F = _compile('rubies trade f', r"603304907650629653> x(.+?)$")
@@ -0,0 +1,147 @@
+# router.py
+"""Routes messages from EPIC RPG to the cogs that handle them.
+
+Every detection cog registers one handler together with a tuple of lowercase trigger phrases (see
+strings.TRIGGERS_*). The router checks the author once per message, builds one snapshot.MessageSnapshot and only
+hands the message and the snapshot to the handlers that have at least one trigger in its search text.
+
+All triggers are compiled into one matcher.TriggerMatcher, so the search text is scanned once per message, no
+matter how many triggers there are. Cogs can add further phrase groups (e.g. monster names) with register_phrases
+and check them with get_matches, which reuses the result of that one scan.
+"""
+
+from dataclasses import dataclass, field
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from resources import settings
+from resources.matcher import TriggerMatcher
+from resources.snapshot import MessageSnapshot
+
+
+# Containers
+class Route(NamedTuple):
+    """Object that represents a handler registered with the router"""
+    name: str
+    handler: Callable[[discord.Message, MessageSnapshot], Awaitable[None]]
+    triggers: Tuple[str]
+
+
+@dataclass()
+class RouterStats():
+    """Object that summarizes the work of the router since startup. All times are in seconds."""
+    messages_checked: int = 0
+    messages_routed: int = 0
+    classify_time: float = 0.0
+    classify_time_max: float = 0.0
+    handler_calls: Dict[str, int] = field(default_factory=dict)
+    handler_time: Dict[str, float] = field(default_factory=dict)
+
+    def average_classify_time(self) -> float:
+        """Returns the average time it took to classify a message"""
+        if self.messages_checked == 0: return 0.0
+        return self.classify_time / self.messages_checked
+
+    def average_handler_time(self, name: str) -> float:
+        """Returns the average time a handler took per call"""
+        calls = self.handler_calls.get(name, 0)
+        if calls == 0: return 0.0
+        return self.handler_time.get(name, 0.0) / calls
+
+
+routes: Dict[str, Route] = {}
+phrase_groups: Dict[str, Tuple[str]] = {}
+stats = RouterStats()
+_matcher: Optional[TriggerMatcher] = None
+
+
+# Registration
+def register(name: str, handler: Callable[[discord.Message, MessageSnapshot], Awaitable[None]],
+             triggers: Tuple[str]) -> None:
+    """Registers a handler for a tuple of lowercase triggers. Registering the same name again replaces the route,
+    so reloading a cog doesn't create duplicates."""
+    global _matcher
+    routes[name] = Route(name=name, handler=handler, triggers=tuple(trigger.lower() for trigger in triggers))
+    _matcher = None
+
+
+def unregister(name: str) -> None:
+    """Removes a route if it exists"""
+    global _matcher
+    if routes.pop(name, None) is not None: _matcher = None
+
+
+def register_phrases(name: str, phrases: Tuple[str]) -> None:
+    """Registers a group of phrases that isn't tied to a handler. The name must not be used by a route."""
+    global _matcher
+    if name in routes:
+        raise ValueError(f'There already is a route with the name {name}.')
+    phrase_groups[name] = tuple(phrase.lower() for phrase in phrases)
+    _matcher = None
+
+
+def unregister_phrases(name: str) -> None:
+    """Removes a phrase group if it exists"""
+    global _matcher
+    if phrase_groups.pop(name, None) is not None: _matcher = None
+
+
+# Classification
+def get_matcher() -> TriggerMatcher:
+    """Returns the matcher for all routes and phrase groups. It is built again after routes or phrase groups
+    changed, so loading all cogs at startup only builds it once."""
+    global _matcher
+    if _matcher is None:
+        all_groups = {name: route.triggers for name, route in routes.items()}
+        all_groups.update(phrase_groups)
+        _matcher = TriggerMatcher(all_groups)
+    return _matcher
+
+
+def get_matches(snapshot: MessageSnapshot) -> FrozenSet[str]:
+    """Returns the names of all routes and phrase groups that have at least one phrase in the search text of the
+    snapshot"""
+    return snapshot.find_triggers(get_matcher())
+
+
+def classify(snapshot: MessageSnapshot) -> List[Route]:
+    """Returns all routes that have at least one trigger in the search text of the snapshot"""
+    matches = get_matches(snapshot)
+    if not matches: return []
+    return [route for route in routes.values() if route.name in matches]
+
+
+# Dispatch
+async def _run_handler(bot: commands.Bot, route: Route, message: discord.Message,
+                       snapshot: MessageSnapshot) -> None:
+    """Runs a handler and measures its time. Errors are handed to the bot's on_error, the same way they are
+    when a listener fails."""
+    start_time = time.perf_counter()
+    try:
+        await route.handler(message, snapshot)
+    except Exception:
+        await bot.on_error('on_message', message)
+    finally:
+        stats.handler_calls[route.name] = stats.handler_calls.get(route.name, 0) + 1
+        stats.handler_time[route.name] = (
+            stats.handler_time.get(route.name, 0.0) + time.perf_counter() - start_time
+        )
+
+
+async def dispatch(bot: commands.Bot, message: discord.Message) -> None:
+    """Checks if a message is from EPIC RPG, classifies it and starts the matching handlers as tasks"""
+    if message.author.id != settings.EPIC_RPG_ID: return
+    start_time = time.perf_counter()
+    snapshot = MessageSnapshot(message)
+    matched_routes = classify(snapshot)
+    classify_time = time.perf_counter() - start_time
+    stats.messages_checked += 1
+    stats.classify_time += classify_time
+    if classify_time > stats.classify_time_max: stats.classify_time_max = classify_time
+    if not matched_routes: return
+    stats.messages_routed += 1
+    for route in matched_routes:
+        bot.loop.create_task(_run_handler(bot, route, message, snapshot))
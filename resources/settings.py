@@ -15,8 +15,12 @@ DEBUG_MODE = True if os.getenv('DEBUG_MODE') == 'ON' else False
 BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_FILE = os.path.join(BOT_DIR, 'database/navi_db.db')
 
-NAVI_DB = sqlite3.connect(DB_FILE, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
+# Writer connection, only used on the database writer thread, see database/connection.py
+NAVI_DB = sqlite3.connect(DB_FILE, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES,
+                          check_same_thread=False)
 NAVI_DB.row_factory = sqlite3.Row
+NAVI_DB.execute('PRAGMA journal_mode = WAL')
+NAVI_DB.execute('PRAGMA synchronous = NORMAL')
 
 LOG_FILE = os.path.join(BOT_DIR, 'logs/discord.log')
 
@@ -35,6 +39,8 @@ TIMEOUT = 20
 TIMEOUT_LONGER = 30
 TIMEOUT_LONGEST = 40
 
+REMINDER_COALESCE_SECONDS = 0.25 # How long reminder messages wait for others in the same channel, see outbox.py
+
 class ClanReset(NamedTuple):
     """Clan Reset time. Week starts at monday, UTC"""
     weekday: int = 5
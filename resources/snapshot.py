@@ -0,0 +1,192 @@
+# snapshot.py
+"""Contains the message snapshot that is handed to all detection handlers"""
+
+from typing import Any, Callable, FrozenSet, Tuple
+
+import discord
+
+from resources.matcher import TriggerMatcher
+
+
+class MessageSnapshot():
+    """Immutable view of a message with the text of its first embed already extracted.
+    Lowercase and encoded variants are only calculated when they are first used and are then cached, so no handler
+    has to build the same string again.
+
+    Attributes (raw)
+    ----------------
+    message: discord.Message
+    content, author, icon_url, title, description, footer: str - Empty string if not present
+    field_names, field_values: Tuple[str] - Fields of the first embed
+
+    Attributes (lazy)
+    -----------------
+    content_lower, author_lower, title_lower, description_lower, footer_lower: str
+    field_names_lower, field_values_lower: Tuple[str]
+    fields_text: str - All field values, separated by newlines
+    search_text: str - Everything above in lowercase, used by the router for matching triggers
+    encoded, encoded_clan, encoded_with_fields: str - Same as functions.encode_message(_clan/_with_fields)
+    content_hash: int - Hash of all raw text above, equal for messages (or edits) with the same text
+    """
+    __slots__ = (
+        'message', 'content', 'author', 'icon_url', 'title', 'description', 'footer', 'field_names', 'field_values',
+        'has_embed', '_cache',
+    )
+
+    def __init__(self, message: discord.Message) -> None:
+        content = author = icon_url = title = description = footer = ''
+        field_names = field_values = ()
+        embed = message.embeds[0] if message.embeds else None
+        if message.content: content = message.content
+        if embed is not None:
+            if embed.author:
+                author = str(embed.author.name)
+                icon_url = str(embed.author.icon_url)
+            if embed.title: title = str(embed.title)
+            if embed.description: description = str(embed.description)
+            if embed.footer: footer = str(embed.footer.text)
+            if embed.fields:
+                field_names = tuple(str(field.name) for field in embed.fields)
+                field_values = tuple(str(field.value) for field in embed.fields)
+        set_attribute = object.__setattr__
+        set_attribute(self, 'message', message)
+        set_attribute(self, 'content', content)
+        set_attribute(self, 'author', author)
+        set_attribute(self, 'icon_url', icon_url)
+        set_attribute(self, 'title', title)
+        set_attribute(self, 'description', description)
+        set_attribute(self, 'footer', footer)
+        set_attribute(self, 'field_names', field_names)
+        set_attribute(self, 'field_values', field_values)
+        set_attribute(self, 'has_embed', embed is not None)
+        set_attribute(self, '_cache', {})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError('MessageSnapshot is immutable.')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError('MessageSnapshot is immutable.')
+
+    def __repr__(self) -> str:
+        return f'MessageSnapshot(message_id={self.message.id}, has_embed={self.has_embed})'
+
+    def _cached(self, key: Any, function: Callable[[], Any]) -> Any:
+        """Returns a cached value, calculating it first if necessary"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = function()
+            return value
+
+    # Fields
+    def field_name(self, index: int, lower: bool = False) -> str:
+        """Returns the name of the field at the given index or an empty string if there is no such field"""
+        field_names = self.field_names_lower if lower else self.field_names
+        return field_names[index] if index < len(field_names) else ''
+
+    def field_value(self, index: int, lower: bool = False) -> str:
+        """Returns the value of the field at the given index or an empty string if there is no such field"""
+        field_values = self.field_values_lower if lower else self.field_values
+        return field_values[index] if index < len(field_values) else ''
+
+    # Lowercase variants
+    @property
+    def content_lower(self) -> str:
+        return self._cached('content_lower', self.content.lower)
+
+    @property
+    def author_lower(self) -> str:
+        return self._cached('author_lower', self.author.lower)
+
+    @property
+    def title_lower(self) -> str:
+        return self._cached('title_lower', self.title.lower)
+
+    @property
+    def description_lower(self) -> str:
+        return self._cached('description_lower', self.description.lower)
+
+    @property
+    def footer_lower(self) -> str:
+        return self._cached('footer_lower', self.footer.lower)
+
+    @property
+    def field_names_lower(self) -> Tuple[str]:
+        return self._cached('field_names_lower', lambda: tuple(name.lower() for name in self.field_names))
+
+    @property
+    def field_values_lower(self) -> Tuple[str]:
+        return self._cached('field_values_lower', lambda: tuple(value.lower() for value in self.field_values))
+
+    @property
+    def fields_text(self) -> str:
+        return self._cached('fields_text', lambda: '\n'.join(self.field_values).strip())
+
+    @property
+    def search_text(self) -> str:
+        def build() -> str:
+            parts = [self.content, self.author, self.title, self.description]
+            for name, value in zip(self.field_names, self.field_values):
+                parts.append(name)
+                parts.append(value)
+            parts.append(self.footer)
+            return '\n'.join(part for part in parts if part).lower()
+        return self._cached('search_text', build)
+
+    @property
+    def content_hash(self) -> int:
+        return self._cached('content_hash', lambda: hash((
+            self.content, self.author, self.icon_url, self.title, self.description, self.footer,
+            self.field_names, self.field_values,
+        )))
+
+    def find_triggers(self, matcher: TriggerMatcher) -> FrozenSet[str]:
+        """Returns the keys of all phrase groups of a matcher that are in the search text. The result is cached per
+        matcher, so the text is only scanned once."""
+        return self._cached(matcher, lambda: matcher.find(self.search_text))
+
+    # Encoded variants
+    @property
+    def encoded(self) -> str:
+        def build() -> str:
+            if not self.has_embed: return encode_text(self.content)
+            embed: discord.Embed = self.message.embeds[0]
+            message_author = encode_text(str(embed.author)) if embed.author else ''
+            message_fields = str(embed.fields) if embed.fields else ''
+            return f'{message_author}{encode_text(self.description)}{message_fields}{self.title}'
+        return self._cached('encoded', build)
+
+    @property
+    def encoded_clan(self) -> str:
+        def build() -> str:
+            if not self.has_embed: return encode_text(self.content)
+            embed: discord.Embed = self.message.embeds[0]
+            message_author = encode_text(str(embed.author)) if embed.author else ''
+            message_footer = encode_text(str(embed.footer)) if embed.footer else ''
+            message_fields = str(embed.fields) if embed.fields else ''
+            return (
+                f'{message_author}{encode_text(self.description)}{message_fields}{encode_text(self.title)}'
+                f'{message_footer}'
+            )
+        return self._cached('encoded_clan', build)
+
+    @property
+    def encoded_with_fields(self) -> str:
+        def build() -> str:
+            if not self.has_embed: return encode_text(self.content)
+            embed: discord.Embed = self.message.embeds[0]
+            message_author = encode_text(str(embed.author)) if embed.author else ''
+            message_fields = encode_text(str(embed.fields)) if embed.fields else ''
+            return f'{message_author}{encode_text(self.description)}{message_fields}{self.title}'
+        return self._cached('encoded_with_fields', build)
+
+
+def encode_text(text: str) -> str:
+    """Encodes all unicode characters in a text in a way that is consistent on both Windows and Linux"""
+    return (
+        text
+        .encode('unicode-escape',errors='ignore')
+        .decode('ASCII')
+        .replace('\\','')
+        .strip('*')
+    )
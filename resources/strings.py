@@ -357,4 +357,175 @@ TRACKED_COMMANDS = (
     'training',
     'adventure',
     'epic guard'
-) # Sorted by cooldown length
\ No newline at end of file
+) # Sorted by cooldown length
+
+# Message triggers. The router only hands an EPIC RPG message to a cog if one of these is in the message (lowercase).
+TRIGGERS_ADVENTURE = (
+    'you have already been in an adventure',
+    '** found a',
+)
+
+TRIGGERS_ARENA = (
+    'you have started an arena recently',
+)
+
+TRIGGERS_CLAN = (
+    'your guild has already raided or been upgraded',
+    'your guild was raided',
+    'guild successfully upgraded!',
+    'guild upgrade failed!',
+    '** raided **',
+)
+
+TRIGGERS_COOLDOWNS = (
+    'check the short version of this command',
+)
+
+TRIGGERS_DAILY = (
+    'you have claimed your daily rewards already',
+    '\'s daily reward',
+)
+
+TRIGGERS_DUEL = (
+    'you have been in a duel recently',
+)
+
+TRIGGERS_DUNGEON_MINIBOSS = (
+    'you have been in a fight with a boss recently',
+)
+
+TRIGGERS_EVENTS = (
+    'you feel 5% more rich',
+    'you cannot multiply your celebration coins',
+    'normal events',
+)
+
+TRIGGERS_FARM = (
+    'you have farmed already',
+    'have grown from the seed',
+    'hits the floor with the',
+    'is about to plant another seed',
+)
+
+TRIGGERS_FUN = (
+    'died fighting the **mysterious man**',
+    'is now in the jail',
+    'again, it **exploded**',
+    'took the seed from the ground and decided to try planting it again later',
+    'fighting them wasn\'t very clever',
+    'you just lost your lootbox',
+    'christmas slime',
+    '** got bored and left',
+    'lootbox opened',
+)
+
+TRIGGERS_HEAL_WARNING = (
+    'are hunting together',
+    '** found a',
+)
+
+TRIGGERS_HORSE = (
+    'you have used this command recently',
+)
+
+TRIGGERS_HORSE_RACE = (
+    'the next race is in',
+)
+
+TRIGGERS_HUNT = (
+    'you have already looked around',
+    'found a',
+    'pretends to be a zombie',
+    'fights the horde',
+    'thankfully, the horde did not notice',
+)
+
+TRIGGERS_LOOTBOX = (
+    'you have already bought a lootbox',
+    'lootbox` successfully bought for',
+)
+
+TRIGGERS_LOTTERY = (
+    'join with `rpg lottery',
+    'lottery ticket successfully bought',
+)
+
+TRIGGERS_NSMB_BIGARENA = (
+    'successfully registered for the next **big arena** event!',
+    'successfully registered for the next **minin\'tboss** event!',
+    'you are already registered!',
+)
+
+TRIGGERS_PET_HELPER = (
+    'suddenly',
+)
+
+TRIGGERS_PET_TOURNAMENT = (
+    'pet successfully sent to the pet tournament!',
+    'pets can collect items and coins, more information',
+)
+
+TRIGGERS_PETS = (
+    'your pet has started an adventure and will be back',
+    'pets have started an adventure!',
+    'pet adventure(s) cancelled',
+    'it came back instantly!!',
+    'pets can collect items and coins, more information',
+)
+
+TRIGGERS_QUEST = (
+    'are you looking for a quest',
+    'you have already claimed a quest',
+    'i don\'t think i can give you any quest here',
+    '__wave #1__',
+    'you did not accept the quest',
+    'got a **new quest**!',
+    'you don\'t have a quest anymore',
+)
+
+TRIGGERS_RUBY_COUNTER = (
+    'our trade is done then',
+    '\'s lootbox',
+    '\'s inventory',
+    '** is training in the mine!',
+    '`ruby` successfully sold',
+    '<:ruby',
+    '`ruby sword` successfully crafted',
+    '`ruby armor` successfully crafted',
+    '`coin sword` successfully crafted',
+    '`ultra-edgy armor` successfully forged',
+)
+
+TRIGGERS_SLEEPY_POTION = (
+    'has slept for a day',
+)
+
+TRIGGERS_TRACKING = (
+    'we have to check you are actually playing',
+    'has traveled in time',
+)
+
+TRIGGERS_TRAINING = (
+    'you have trained already',
+    'well done, **',
+    'better luck next time, **',
+)
+
+TRIGGERS_TRAINING_HELPER = (
+    'help us unseal the next areas!',
+    '** is training in the',
+)
+
+TRIGGERS_VOTE = (
+    'next vote rewards',
+)
+
+TRIGGERS_WEEKLY = (
+    'you have claimed your weekly rewards already',
+    '\'s weekly reward',
+)
+
+TRIGGERS_WORK = (
+    'you have already got some resources',
+    '** got ',
+)
@@ -0,0 +1,118 @@
+# timing_wheel.py
+"""Keeps items by the second they are due (hierarchical timing wheel).
+
+Time is counted in ticks of one second. The wheel has three levels: 60 slots of one second, 60 slots of one minute
+and 24 slots of one hour, so it covers the next 24 hours. An item goes into the finest level that reaches the tick it
+is due. Whenever the wheel passes a full minute or hour, the items of the next slot of the level above are moved down.
+Adding and cancelling an item is O(1), no matter how many items the wheel holds.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+LEVELS = ((1, 60), (60, 60), (3_600, 24)) # Seconds per slot, slots
+HORIZON = 86_400 # Seconds
+
+Slot = Dict[Hashable, Tuple[int, Any]]
+
+
+class TimingWheel():
+    """Hierarchical timing wheel. Every item has a unique key and a tick it is due.
+
+    Arguments
+    ---------
+    current_tick: The tick the wheel starts at. Items due at or before this tick are due right away.
+    """
+    __slots__ = ('current_tick', '_levels', '_ready', '_slots')
+
+    def __init__(self, current_tick: int) -> None:
+        self.current_tick = current_tick
+        self._levels: List[List[Slot]] = [[{} for _ in range(slot_count)] for _, slot_count in LEVELS]
+        self._ready: Slot = {}
+        self._slots: Dict[Hashable, Slot] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __repr__(self) -> str:
+        return f'<TimingWheel current_tick={self.current_tick} items={len(self._slots)}>'
+
+    def _place(self, key: Hashable, tick: int, item: Any) -> None:
+        """Puts an item into the slot that covers its tick"""
+        time_left = tick - self.current_tick
+        if time_left <= 0:
+            slot = self._ready
+        else:
+            for level, (slot_length, slot_count) in enumerate(LEVELS):
+                if time_left < slot_length * slot_count:
+                    slot = self._levels[level][(tick // slot_length) % slot_count]
+                    break
+            else:
+                raise ValueError(f'Tick {tick} is more than {HORIZON} seconds after tick {self.current_tick}.')
+        slot[key] = (tick, item)
+        self._slots[key] = slot
+
+    def _cascade(self, level: int, index: int) -> None:
+        """Moves the items of a slot down to the finer levels"""
+        slot = self._levels[level][index]
+        self._levels[level][index] = {}
+        for key, (tick, item) in slot.items():
+            self._place(key, tick, item)
+
+    def add(self, key: Hashable, tick: int, item: Any) -> None:
+        """Adds an item that is due at tick. Replaces the item with the same key if there is one.
+
+        Raises
+        ------
+        ValueError if tick is HORIZON or more seconds after current_tick.
+        """
+        self.cancel(key)
+        self._place(key, tick, item)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Removes the item with this key. Returns False if there is none."""
+        slot = self._slots.pop(key, None)
+        if slot is None: return False
+        del slot[key]
+        return True
+
+    def advance(self, tick: int) -> List[Tuple[int, Any]]:
+        """Moves the wheel forward to tick and removes and returns all items that are due by then.
+
+        Returns
+        -------
+        List of (tick, item) sorted by tick.
+        """
+        while self.current_tick < tick:
+            self.current_tick += 1
+            current_tick = self.current_tick
+            if current_tick % 60 == 0:
+                if current_tick % 3_600 == 0: self._cascade(2, (current_tick // 3_600) % 24)
+                self._cascade(1, (current_tick // 60) % 60)
+            slot = self._levels[0][current_tick % 60]
+            if not slot: continue
+            self._levels[0][current_tick % 60] = {}
+            for key, entry in slot.items():
+                self._ready[key] = entry
+                self._slots[key] = self._ready
+        if not self._ready: return []
+        ready = self._ready
+        self._ready = {}
+        for key in ready:
+            del self._slots[key]
+        return sorted(ready.values(), key=lambda entry: entry[0])
+
+    def next_tick(self) -> Optional[int]:
+        """Returns the next tick at which advance() has something to do, current_tick if items are due already
+        or None if the wheel is empty.
+        Items that are due after the current minute are only looked at when the wheel gets to the next minute, so
+        this returns the start of the next minute at the latest."""
+        if not self._slots: return None
+        if self._ready: return self.current_tick
+        next_minute = (self.current_tick // 60 + 1) * 60
+        for tick in range(self.current_tick + 1, next_minute):
+            if self._levels[0][tick % 60]: return tick
+        return next_minute
@@ -0,0 +1,62 @@
+# test_reminders.py
+"""Tests for the reminder scheduler in database/reminders.py
+
+Usage: python -m unittest discover tests
+"""
+
+import asyncio
+from datetime import timedelta
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.replay_benchmark import use_temporary_database
+from database import connection, reminders
+from resources import settings
+
+
+USER_ID = 123456789012345678
+CHANNEL_ID = 1
+
+
+class FirstLoadTest(unittest.IsolatedAsyncioTestCase):
+    """The first window load has to be retried if it fails, otherwise no reminder ever fires"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.db_file = settings.DB_FILE
+        use_temporary_database(cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        connection.close()
+        settings.NAVI_DB.close()
+        settings.DB_FILE = cls.db_file
+        cls.directory.cleanup()
+
+    async def test_failed_first_load_is_retried(self) -> None:
+        get_reminders_by_end_time = reminders.get_reminders_by_end_time
+        reads = []
+        async def fail_first_read(start_time, end_time):
+            reads.append((start_time, end_time))
+            if len(reads) == 1: raise sqlite3.OperationalError('database is locked')
+            return await get_reminders_by_end_time(start_time, end_time)
+        with mock.patch.object(reminders, 'get_reminders_by_end_time', fail_first_read), \
+             mock.patch.object(reminders, 'LOAD_RETRY_SECONDS', 0.1):
+            with self.assertRaises(sqlite3.Error):
+                await reminders.load_reminders()
+            reminder = await reminders.insert_user_reminder(USER_ID, 'hunt', timedelta(seconds=1), CHANNEL_ID,
+                                                            'Hunt!')
+            due_reminders = await asyncio.wait_for(reminders.get_due_reminders(), 5)
+        self.assertEqual(len(reads), 2)
+        self.assertEqual([due_reminder.task_name for due_reminder in due_reminders], [reminder.task_name])
+
+
+if __name__ == '__main__':
+    unittest.main()